@@ -0,0 +1,443 @@
+"""
+Benchmark Suite - throughput, ratio, startup time and peak memory for every codec.
+
+Generates deterministic corpora (prose, code, logs, random binary) of any
+size and times compression and decompression for:
+
+    compressor          core.compressor via SyllableCodec (run mode, lossless)
+    cyclic_hybrid       core.cyclic_hybrid CCC2 real-time format
+    keyboard_simple     core.keyboard_simple mod-97 keyboard encoding
+    signature_archiver  core.signature_archiver archive / signature_recovery manifest
+
+Each (codec, corpus, size) case runs in a fresh interpreter by default, so
+peak RSS and startup time (module import plus table loading) are measured
+per case. Corpora are streamed to a scratch file by the parent, and peak
+RSS is reported as the growth over the worker's reading once that input
+is loaded, so neither the generator nor the interpreter itself is counted.
+Results are written as JSON; --baseline compares them against a
+saved run and exits with status 1 if any metric regressed by more than
+--threshold.
+
+    python benchmark_suite.py --sizes 64KB,1MB --output results.json
+    python benchmark_suite.py --sizes 64KB,1MB --baseline results.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+CORPORA = ("prose", "code", "logs", "binary")
+CODECS = ("compressor", "cyclic_hybrid", "keyboard_simple", "signature_archiver")
+TEXT_ONLY = {"compressor", "signature_archiver"}
+
+# Largest input each codec is run on unless --no-limits is given:
+# keyboard_simple stores the length in four base-97 digits, and the
+# signature archiver keeps 32 rotor streams as long as its input.
+SIZE_LIMITS = {"keyboard_simple": 64 << 20, "signature_archiver": 16 << 20}
+
+# Metrics compared against a baseline, and whether higher is better
+METRICS = {
+    "compress_mb_s": True,
+    "decompress_mb_s": True,
+    "ratio": False,
+    "startup_seconds": False,
+    "peak_rss_kb": False,
+}
+
+_UNITS = {"B": 1, "KB": 1 << 10, "MB": 1 << 20, "GB": 1 << 30}
+
+def parse_size(text):
+    """Parses sizes such as 4096, 64KB, 1MB or 2GB into a byte count."""
+    text = text.strip().upper()
+    for unit in ("GB", "MB", "KB", "B"):
+        if text.endswith(unit):
+            return int(float(text[:-len(unit)]) * _UNITS[unit])
+    return int(text)
+
+def format_size(size):
+    for unit in ("GB", "MB", "KB"):
+        if size >= _UNITS[unit] and size % _UNITS[unit] == 0:
+            return f"{size // _UNITS[unit]}{unit}"
+    return f"{size}B"
+
+# --- Corpora ---
+_WORDS = (
+    "the of and to in is that it was for on are with as his they be at one have this from or had by word but "
+    "what some we can out other were all there when up use your how said an each she which do their time if "
+    "will way about many then them write would like so these her long make thing see him two has look more day "
+    "could go come did number sound no most people my over know water than call first who may down side been "
+    "now find any new work part take get place made live where after back little only round man year came show "
+    "every good me give our under name very through just form sentence great think say help low line differ "
+    "turn cause much mean before move right boy old too same tell does set three want air well also play small "
+    "end put home read hand port large spell add even land here must big high such follow act why ask men "
+    "change went light kind off need house picture try us again animal point mother world near build self earth"
+).split()
+_IDENTIFIERS = ("data", "result", "value", "index", "count", "buffer", "offset", "length", "token", "record",
+                "stream", "chunk", "header", "payload", "table", "cache", "config", "path", "item", "node")
+_LEVELS = ("DEBUG", "INFO", "INFO", "INFO", "WARNING", "ERROR")
+_SERVICES = ("api", "auth", "db", "cache", "worker", "scheduler")
+_MESSAGES = ("request completed", "connection opened", "connection closed", "cache miss", "retrying operation",
+             "user logged in", "job finished", "slow query detected", "token refreshed", "upstream timeout")
+
+def _prose_chunk(rng):
+    lines = []
+    for _ in range(rng.randint(3, 8)):
+        words = [rng.choice(_WORDS) for _ in range(rng.randint(6, 18))]
+        words[0] = words[0].capitalize()
+        sentence = " ".join(words)
+        lines.append(sentence + rng.choice((".", ".", ".", ",", "?", "!")))
+    return " ".join(lines) + "\n\n"
+
+def _code_chunk(rng):
+    name = "_".join(rng.sample(_IDENTIFIERS, 2))
+    args = ", ".join(rng.sample(_IDENTIFIERS, rng.randint(1, 3)))
+    lines = [f"def {name}({args}):", f'    """Returns the {rng.choice(_WORDS)} {rng.choice(_IDENTIFIERS)}."""']
+    for _ in range(rng.randint(2, 6)):
+        target, source = rng.sample(_IDENTIFIERS, 2)
+        if rng.random() < 0.3:
+            lines.append(f"    if {source} is None:")
+            lines.append(f"        {target} = {rng.randint(0, 4096)}")
+        else:
+            lines.append(f"    {target} = {source}[{rng.randint(0, 64)}:] + {rng.randint(1, 255)}")
+    lines.append(f"    return {rng.choice(_IDENTIFIERS)}")
+    return "\n".join(lines) + "\n\n"
+
+def _logs_chunk(rng, state):
+    lines = []
+    for _ in range(16):
+        state[0] += rng.randint(1, 2500)
+        seconds, millis = divmod(state[0], 1000)
+        minutes, seconds = divmod(seconds, 60)
+        hours, minutes = divmod(minutes, 60)
+        lines.append(f"2024-01-{1 + hours // 24 % 28:02d} {hours % 24:02d}:{minutes:02d}:{seconds:02d}.{millis:03d} "
+                     f"{rng.choice(_LEVELS):<7} [{rng.choice(_SERVICES)}] {rng.choice(_MESSAGES)} "
+                     f"id={rng.randint(1, 99999)} took={rng.randint(1, 900)}ms")
+    return "\n".join(lines) + "\n"
+
+# Corpora are produced in blocks of this many bytes (a multiple of 4, so
+# binary blocks concatenate to the same bytes as one randbytes(size) call)
+_CORPUS_BLOCK = 1 << 20
+
+def _corpus_blocks(kind, size, seed):
+    """Yields the corpus as bytes blocks of at most about _CORPUS_BLOCK, totalling exactly size bytes."""
+    rng = random.Random(f"{kind}:{seed}")
+    if kind == "binary":
+        for start in range(0, size, _CORPUS_BLOCK):
+            yield rng.randbytes(min(_CORPUS_BLOCK, size - start))
+        return
+    if kind == "prose":
+        chunk = lambda: _prose_chunk(rng)
+    elif kind == "code":
+        chunk = lambda: _code_chunk(rng)
+    elif kind == "logs":
+        state = [0]
+        chunk = lambda: _logs_chunk(rng, state)
+    else:
+        raise ValueError(f"Unknown corpus: {kind!r}")
+    remaining = size
+    while remaining > 0:
+        out = io.StringIO()
+        written = 0
+        while written < min(_CORPUS_BLOCK, remaining):
+            text = chunk()
+            out.write(text)
+            written += len(text)
+        block = out.getvalue()[:remaining].encode("ascii")
+        remaining -= len(block)
+        yield block
+
+def generate_corpus(kind, size, seed=0):
+    """Returns exactly size bytes of deterministic corpus data (ASCII text unless kind is "binary")."""
+    return b"".join(_corpus_blocks(kind, size, seed))
+
+def write_corpus(path, kind, size, seed=0):
+    """Writes the generate_corpus() data to path one block at a time, without holding it all in memory."""
+    with open(path, "wb") as f:
+        for block in _corpus_blocks(kind, size, seed):
+            f.write(block)
+
+# --- Codec Adapters ---
+# Each returns (compress, decompress, expected): compress(bytes) -> payload
+# bytes, decompress(payload) -> restored bytes, and expected(data) -> the
+# bytes decompress should give back (None for lossy codecs).
+def _compressor_adapter(workdir):
+    from core.syllable_codec import get_syllable_codec
+    codec = get_syllable_codec(os.path.join(ROOT, "key", "syllable_library.txt"))
+    codec.artifact
+    compress = lambda data: codec.compress(data.decode("utf-8"), runs=True)
+    decompress = lambda payload: codec.decompress(payload).encode("utf-8")
+    return compress, decompress, lambda data: data
+
+def _cyclic_hybrid_adapter(workdir):
+    from core.cyclic_hybrid import compress_realtime_bytes, decompress_realtime_bytes
+    return compress_realtime_bytes, decompress_realtime_bytes, lambda data: data
+
+def _keyboard_simple_adapter(workdir):
+    from core.keyboard_simple import encode_to_keyboard_simple, decode_from_keyboard_simple, LIBRARY_SIZE
+    compress = lambda data: encode_to_keyboard_simple(data)[0].encode("utf-8")
+    decompress = lambda payload: decode_from_keyboard_simple(payload.decode("utf-8"))
+    # The encoding is lossless in mod-97 space only
+    return compress, decompress, lambda data: bytes(b % LIBRARY_SIZE for b in data)
+
+def _signature_archiver_adapter(workdir):
+    from core.signature_archiver import create_archive
+    from core.signature_recovery import restore_archive
+    source = os.path.join(workdir, "input.txt")
+    archive = os.path.join(workdir, "input.csa")
+    manifest = os.path.join(workdir, "manifest.txt")
+
+    def compress(data):
+        with open(source, "wb") as f:
+            f.write(data)
+        with contextlib.redirect_stdout(io.StringIO()):
+            create_archive(source, archive)
+        with open(archive, "rb") as f:
+            return f.read()
+
+    def decompress(payload):
+        with open(archive, "wb") as f:
+            f.write(payload)
+        with contextlib.redirect_stdout(io.StringIO()):
+            restore_archive(archive, manifest)
+        with open(manifest, "rb") as f:
+            return f.read()
+
+    # Signature archives are lossy; "decompress" produces the recovery manifest
+    return compress, decompress, lambda data: None
+
+ADAPTERS = {
+    "compressor": _compressor_adapter,
+    "cyclic_hybrid": _cyclic_hybrid_adapter,
+    "keyboard_simple": _keyboard_simple_adapter,
+    "signature_archiver": _signature_archiver_adapter,
+}
+
+# --- Running Cases ---
+def _peak_rss_kb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS, kilobytes elsewhere
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+def _best_time(fn, arg, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn(arg)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+def _mb_s(size, seconds):
+    return size / seconds / (1 << 20) if seconds else None
+
+def skip_reason(codec, corpus, size, limits=True):
+    """Returns why (codec, corpus, size) is not run, or None."""
+    if corpus == "binary" and codec in TEXT_ONLY:
+        return "text-only codec"
+    if limits and size > SIZE_LIMITS.get(codec, size):
+        return f"above {format_size(SIZE_LIMITS[codec])} size limit"
+    return None
+
+def run_case(codec, corpus, size, repeat=1, seed=0, input_path=None):
+    """Benchmarks one codec on one corpus in this process; returns the result dict.
+
+    input_path is a file written by write_corpus(); without one the corpus
+    is written to the case's working directory first. startup_seconds
+    covers importing the codec and loading its tables, and peak_rss_kb is
+    the growth of peak RSS over the reading taken once the input is
+    loaded, so both are only meaningful in a fresh interpreter (see
+    run_isolated()).
+    """
+    with tempfile.TemporaryDirectory(prefix="ccc-bench-") as workdir:
+        if input_path is None:
+            input_path = os.path.join(workdir, "corpus.bin")
+            write_corpus(input_path, corpus, size, seed)
+        with open(input_path, "rb") as f:
+            data = f.read()
+        baseline_rss = _peak_rss_kb()
+        started = time.perf_counter()
+        compress, decompress, expected = ADAPTERS[codec](workdir)
+        startup = time.perf_counter() - started
+        payload, compress_seconds = _best_time(compress, data, repeat)
+        restored, decompress_seconds = _best_time(decompress, payload, repeat)
+        peak_rss = _peak_rss_kb() - baseline_rss
+    target = expected(data)
+    return {
+        "codec": codec,
+        "corpus": corpus,
+        "size": size,
+        "compressed_size": len(payload),
+        "ratio": len(payload) / size if size else None,
+        "compress_seconds": compress_seconds,
+        "decompress_seconds": decompress_seconds,
+        "compress_mb_s": _mb_s(size, compress_seconds),
+        "decompress_mb_s": _mb_s(size, decompress_seconds),
+        "startup_seconds": startup,
+        "peak_rss_kb": peak_rss,
+        "verified": None if target is None else restored == target,
+    }
+
+def run_isolated(codec, corpus, size, repeat=1, seed=0, input_path=None):
+    """Runs run_case() in a fresh interpreter so startup and peak RSS belong to this case alone.
+
+    Pass input_path (see write_corpus()) so the corpus is generated in this
+    process rather than in the measured worker.
+    """
+    command = [sys.executable, os.path.abspath(__file__), "--worker", codec, corpus, str(size),
+               "--repeat", str(repeat), "--seed", str(seed)]
+    if input_path is not None:
+        command += ["--input", os.path.abspath(input_path)]
+    completed = subprocess.run(command, cwd=ROOT, capture_output=True, text=True)
+    if completed.returncode != 0:
+        return {"codec": codec, "corpus": corpus, "size": size,
+                "error": completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else "worker failed"}
+    return json.loads(completed.stdout)
+
+def run_suite(codecs=CODECS, corpora=CORPORA, sizes=(64 << 10,), repeat=1, seed=0, isolated=True, limits=True,
+              progress=None):
+    """Runs every (codec, corpus, size) case; returns the report dict that is written as JSON.
+
+    Each corpus is written once to a scratch file that every codec reads.
+    """
+    results = []
+    with tempfile.TemporaryDirectory(prefix="ccc-corpus-") as corpus_dir:
+        for size in sizes:
+            for corpus in corpora:
+                input_path = os.path.join(corpus_dir, f"{corpus}-{size}.bin")
+                for codec in codecs:
+                    reason = skip_reason(codec, corpus, size, limits)
+                    if reason is not None:
+                        result = {"codec": codec, "corpus": corpus, "size": size, "skipped": reason}
+                    else:
+                        if not os.path.exists(input_path):
+                            write_corpus(input_path, corpus, size, seed)
+                        if isolated:
+                            result = run_isolated(codec, corpus, size, repeat, seed, input_path)
+                        else:
+                            result = run_case(codec, corpus, size, repeat, seed, input_path)
+                    results.append(result)
+                    if progress is not None:
+                        progress(result)
+                if os.path.exists(input_path):
+                    os.remove(input_path)
+    return {
+        "version": 1,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "seed": seed,
+        "results": results,
+    }
+
+# --- Baseline Comparison ---
+def _case_key(result):
+    return result["codec"], result["corpus"], result["size"]
+
+def compare_results(report, baseline, threshold=0.10):
+    """Compares report against baseline; returns a list of regression dicts.
+
+    A metric regresses when it is more than threshold (a fraction) worse
+    than the baseline value, e.g. 10% lower throughput or 10% higher peak
+    RSS. A case that verified in the baseline but not now is always a
+    regression.
+    """
+    previous = {_case_key(result): result for result in baseline["results"]}
+    regressions = []
+    for result in report["results"]:
+        old = previous.get(_case_key(result))
+        if old is None or "skipped" in result or "skipped" in old or "error" in old:
+            continue
+        if "error" in result or (old.get("verified") and not result.get("verified")):
+            regressions.append({"codec": result["codec"], "corpus": result["corpus"], "size": result["size"],
+                                "metric": "verified", "baseline": old.get("verified"),
+                                "current": result.get("error", result.get("verified")), "change": None})
+            continue
+        for metric, higher_is_better in METRICS.items():
+            before, after = old.get(metric), result.get(metric)
+            if not before or after is None:
+                continue
+            change = (after - before) / before
+            if (-change if higher_is_better else change) > threshold:
+                regressions.append({"codec": result["codec"], "corpus": result["corpus"], "size": result["size"],
+                                    "metric": metric, "baseline": before, "current": after, "change": change})
+    return regressions
+
+def _describe(result):
+    case = f"{result['codec']:<19} {result['corpus']:<7} {format_size(result['size']):>6}"
+    if "skipped" in result:
+        return f"{case}  skipped ({result['skipped']})"
+    if "error" in result:
+        return f"{case}  ERROR {result['error']}"
+    status = {True: "ok", False: "MISMATCH", None: "lossy"}[result["verified"]]
+    return (f"{case}  ratio {result['ratio']:7.3f}  compress {result['compress_mb_s']:8.2f} MB/s  "
+            f"decompress {result['decompress_mb_s']:8.2f} MB/s  startup {result['startup_seconds'] * 1000:7.1f} ms  "
+            f"peak {result['peak_rss_kb'] / 1024:7.1f} MB  {status}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark every codec on deterministic corpora.")
+    parser.add_argument("--codecs", default=",".join(CODECS), help="Comma-separated codecs to run.")
+    parser.add_argument("--corpora", default=",".join(CORPORA), help="Comma-separated corpora to run.")
+    parser.add_argument("--sizes", default="64KB", help="Comma-separated input sizes, e.g. 64KB,1MB,1GB.")
+    parser.add_argument("--repeat", type=int, default=1, help="Timed runs per case (the best is kept).")
+    parser.add_argument("--seed", type=int, default=0, help="Corpus seed.")
+    parser.add_argument("--output", help="Write the JSON report to this file.")
+    parser.add_argument("--baseline", help="Saved JSON report to compare against.")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Allowed fractional slowdown/growth before a metric counts as a regression.")
+    parser.add_argument("--in-process", action="store_true",
+                        help="Run all cases in this interpreter (faster; startup and peak RSS are not per case).")
+    parser.add_argument("--no-limits", action="store_true", help="Ignore the per-codec input size limits.")
+    parser.add_argument("--worker", nargs=3, metavar=("CODEC", "CORPUS", "SIZE"), help=argparse.SUPPRESS)
+    parser.add_argument("--input", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        codec, corpus, size = args.worker
+        print(json.dumps(run_case(codec, corpus, int(size), args.repeat, args.seed, args.input)))
+        sys.exit(0)
+
+    codecs = [name for name in args.codecs.split(",") if name]
+    corpora = [name for name in args.corpora.split(",") if name]
+    for name in codecs:
+        if name not in ADAPTERS:
+            parser.error(f"unknown codec {name!r} (choose from {', '.join(CODECS)})")
+    for name in corpora:
+        if name not in CORPORA:
+            parser.error(f"unknown corpus {name!r} (choose from {', '.join(CORPORA)})")
+    sizes = [parse_size(size) for size in args.sizes.split(",") if size]
+
+    report = run_suite(codecs, corpora, sizes, args.repeat, args.seed, not args.in_process, not args.no_limits,
+                       progress=lambda result: print(_describe(result)))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    failed = any(result.get("verified") is False or "error" in result for result in report["results"])
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare_results(report, baseline, args.threshold)
+        print(f"\nCompared with {args.baseline} (threshold {args.threshold:.0%}): "
+              f"{len(regressions)} regression(s)")
+        for regression in regressions:
+            case = f"{regression['codec']} {regression['corpus']} {format_size(regression['size'])}"
+            if regression["change"] is None:
+                print(f"  REGRESSION {case}: {regression['metric']} {regression['baseline']} -> {regression['current']}")
+            else:
+                print(f"  REGRESSION {case}: {regression['metric']} {regression['baseline']:.4g} -> "
+                      f"{regression['current']:.4g} ({regression['change']:+.1%})")
+        failed = failed or bool(regressions)
+    sys.exit(1 if failed else 0)
@@ -1,41 +1,43 @@
 """Benchmark decompression (unfolding) performance on large datasets - Clean tracking"""
 import time
 import os
-import sys
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'core'))
+import tempfile
 
-from cyclic_compressor_paired import decompress_file_paired
+from core.cyclic_hybrid import compress_realtime, decompress_realtime
+from benchmark_suite import write_corpus
 
 print("=" * 80)
 print("UNFOLDING PERFORMANCE BENCHMARK - Clean Build Sequence Tracking")
 print("=" * 80)
 
-test_files = [
-    ('test_document.ccc', 'test_document.txt'),
-    ('test_large.ccc', 'test_large.txt'),
-    ('test_final_large.ccc', 'test_final_large_restored.txt'),
-]
+workdir = tempfile.mkdtemp(prefix='ccc-unfold-')
+
+# The sample document plus generated corpora (see benchmark_suite.py)
+test_files = []
+if os.path.exists('test_document.txt'):
+    test_files.append(('test_document.ccc', 'test_document.txt'))
+for kind, size in [('prose', 1 << 20), ('logs', 2 << 20), ('code', 4 << 20)]:
+    original_file = os.path.join(workdir, f'{kind}_{size >> 20}mb.txt')
+    write_corpus(original_file, kind, size)
+    test_files.append((os.path.basename(original_file).replace('.txt', '.ccc'), original_file))
 
 results = []
 
 for compressed_file, original_file in test_files:
-    if not os.path.exists(compressed_file):
-        continue
-    
-    comp_size = os.path.getsize(compressed_file)
-    orig_size = os.path.getsize(original_file) if os.path.exists(original_file) else 0
+    compressed_file = os.path.join(workdir, compressed_file)
+    compress_realtime(original_file, compressed_file)
     
     # Run decompression - clean, no trace output
     output_file = compressed_file.replace('.ccc', '_unfold.txt')
     start = time.perf_counter()
-    info = decompress_file_paired(compressed_file, output_file)
+    info = decompress_realtime(compressed_file, output_file)
     elapsed = time.perf_counter() - start
     
     decompressed_size = os.path.getsize(output_file)
     
     # Record essential info only
     result = {
-        'file': compressed_file,
+        'file': os.path.basename(compressed_file),
         'multiplier': info['multiplier'],
         'original': info['original_length'],
         'compressed': info['compressed_length'],
@@ -56,8 +58,13 @@ for compressed_file, original_file in test_files:
     results.append(result)
     
     # Cleanup
-    if os.path.exists(output_file):
-        os.remove(output_file)
+    for path in (compressed_file, output_file):
+        if os.path.exists(path):
+            os.remove(path)
+
+for name in os.listdir(workdir):
+    os.remove(os.path.join(workdir, name))
+os.rmdir(workdir)
 
 # Display clean results - only build sequence and multiplier tracking
 print("\nBUILD SEQUENCE & MULTIPLIER TRACKING\n")
@@ -0,0 +1,328 @@
+"""
+Async Codec - asyncio front end for the syllable and hybrid compressors.
+
+compress() and compress_realtime() are CPU bound and block the event loop
+on large payloads. AsyncCodec runs every such call in a bounded executor
+(a thread pool by default; pass a ProcessPoolExecutor to spread syllable
+work across cores) and limits how many jobs are in flight, so excess
+requests wait on the loop instead of queueing unbounded work.
+
+Streams are handled piecewise: CompressingWriter / DecompressingReader
+wrap asyncio StreamWriter / StreamReader objects, hand one chunk at a time
+to the executor and await drain() after every write, so a slow peer slows
+the producer down instead of growing buffers.
+"""
+
+import asyncio
+import codecs
+import inspect
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from core.compressor import RUN_WHITESPACE, _PendingText, _reopen_word_case, decompress
+from core.codec_artifact import DEFAULT_LIBRARY_PATH
+from core.cyclic_hybrid import compress_realtime_bytes, decompress_realtime_bytes
+from core.syllable_codec import get_syllable_codec
+from core.token_container import (
+    encode_header,
+    encode_tokens,
+    read_header,
+    scan_records,
+    decode_records,
+    HEADER_SIZE,
+    TAG_END,
+)
+
+DEFAULT_CHUNK_SIZE = 1 << 16
+
+# --- Executor Jobs ---
+# Top-level functions so they also run in a ProcessPoolExecutor.
+def _compress_text(text, library_path, options):
+    return get_syllable_codec(library_path).compress(text, **options)
+
+def _decompress_container(data, library_path):
+    return get_syllable_codec(library_path).decompress(data)
+
+def _encode_text(text, library_path, case_model, segmentation, runs, continued=False):
+    tokens = get_syllable_codec(library_path).tokenize(text, case_model, segmentation, runs)
+    return bytes(encode_tokens(_reopen_word_case(tokens, case_model) if continued else tokens))
+
+def _decode_records(records, library_path):
+    artifact = get_syllable_codec(library_path).artifact
+    tokens = decode_records(records, artifact.c2_map, artifact.reverse_c2_map)
+    return decompress(tokens, artifact.c2_map, reverse_c2_map=artifact.reverse_c2_map)
+
+def _header(library_path):
+    return encode_header(get_syllable_codec(library_path).artifact.c2_map)
+
+def _check_header(header, library_path):
+    read_header(io.BytesIO(header), get_syllable_codec(library_path).artifact.c2_map)
+
+# --- Chunk Sources ---
+async def aiter_chunks(source, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yields chunks from bytes/str, a StreamReader, an async or sync file object, or any iterable."""
+    if isinstance(source, (bytes, bytearray, memoryview, str)):
+        for start in range(0, len(source), chunk_size):
+            yield source[start:start + chunk_size]
+        return
+    if hasattr(source, "read"):
+        while True:
+            chunk = source.read(chunk_size)
+            if inspect.isawaitable(chunk):
+                chunk = await chunk
+            else:
+                # A regular file: give the loop a turn between reads
+                await asyncio.sleep(0)
+            if not chunk:
+                return
+            yield chunk
+    elif hasattr(source, "__aiter__"):
+        async for chunk in source:
+            yield chunk
+    else:
+        for chunk in source:
+            yield chunk
+            await asyncio.sleep(0)
+
+async def aiter_text(source, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Like aiter_chunks(), but decodes byte chunks as UTF-8 (split characters are carried over)."""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    async for chunk in aiter_chunks(source, chunk_size):
+        if not isinstance(chunk, str):
+            chunk = decoder.decode(bytes(chunk))
+        if chunk:
+            yield chunk
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+async def _write(writer, data):
+    """Writes to a StreamWriter-like object, honouring its drain() for backpressure."""
+    result = writer.write(data)
+    if inspect.isawaitable(result):
+        await result
+    drain = getattr(writer, "drain", None)
+    if drain is not None:
+        await drain()
+
+# --- Codec ---
+class AsyncCodec:
+    """Awaitable compress/decompress backed by a bounded executor.
+
+    At most max_pending jobs run or wait in the executor at once; further
+    calls wait on the event loop. Use as an async context manager (or call
+    close()) to shut down an executor the codec created itself.
+    """
+
+    def __init__(self, library_path=DEFAULT_LIBRARY_PATH, max_workers=None, max_pending=None, executor=None):
+        self.library_path = library_path
+        self.max_workers = max_workers or min(32, os.cpu_count() or 1)
+        self.max_pending = max_pending or self.max_workers * 2
+        self._executor = executor
+        self._owns_executor = executor is None
+        # Created on first use: before Python 3.10 a Semaphore binds to the loop current at creation
+        self._semaphore = None
+        self._semaphore_loop = None
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="async-codec")
+        return self._executor
+
+    async def run(self, fn, *args):
+        """Runs fn(*args) in the executor once a job slot is free."""
+        loop = asyncio.get_running_loop()
+        if self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_pending)
+            self._semaphore_loop = loop
+        async with self._semaphore:
+            return await loop.run_in_executor(self._get_executor(), fn, *args)
+
+    async def compress(self, data, case_model="word", segmentation="greedy", runs=False, entropy=False,
+                       index_interval=None):
+        """Compresses str or UTF-8 bytes into a binary token container."""
+        options = {"case_model": case_model, "segmentation": segmentation, "runs": runs, "entropy": entropy,
+                   "index_interval": index_interval}
+        return await self.run(_compress_text, data, self.library_path, options)
+
+    async def decompress(self, data):
+        """Decompresses a (plain or entropy-coded) binary token container to str."""
+        return await self.run(_decompress_container, bytes(data), self.library_path)
+
+    async def compress_realtime(self, data, compression_level=6):
+        """Compresses bytes into the hybrid CCC2 format (see core.cyclic_hybrid)."""
+        return await self.run(compress_realtime_bytes, bytes(data), compression_level)
+
+    async def decompress_realtime(self, data):
+        """Restores the original bytes from a CCC2 payload."""
+        return await self.run(decompress_realtime_bytes, bytes(data))
+
+    async def compress_stream(self, reader, writer, chunk_size=DEFAULT_CHUNK_SIZE, **options):
+        """Compresses text from reader into a binary token container on writer.
+
+        Returns the number of bytes written.
+        """
+        compressing = CompressingWriter(writer, self, **options)
+        async for text in aiter_text(reader, chunk_size):
+            await compressing.write(text)
+        return await compressing.close()
+
+    async def decompress_stream(self, reader, writer, chunk_size=DEFAULT_CHUNK_SIZE):
+        """Decompresses a binary token container from reader, writing UTF-8 text to writer.
+
+        Returns the number of characters written.
+        """
+        written = 0
+        async for text in DecompressingReader(reader, self, chunk_size):
+            await _write(writer, text.encode("utf-8"))
+            written += len(text)
+        return written
+
+    async def compress_realtime_stream(self, reader, writer, compression_level=6, chunk_size=DEFAULT_CHUNK_SIZE):
+        """Reads reader to the end and writes its CCC2 compression to writer.
+
+        CCC2 stores the original length in its header, so the input is
+        buffered; only the compression runs off the loop. Returns the
+        number of bytes written.
+        """
+        data = bytearray()
+        async for chunk in aiter_chunks(reader, chunk_size):
+            data.extend(chunk)
+        return await _write_chunked(writer, await self.compress_realtime(data, compression_level), chunk_size)
+
+    async def decompress_realtime_stream(self, reader, writer, chunk_size=DEFAULT_CHUNK_SIZE):
+        """Reads a CCC2 payload from reader and writes the original bytes to writer."""
+        data = bytearray()
+        async for chunk in aiter_chunks(reader, chunk_size):
+            data.extend(chunk)
+        return await _write_chunked(writer, await self.decompress_realtime(data), chunk_size)
+
+    def close(self):
+        if self._owns_executor and self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
+
+async def _write_chunked(writer, data, chunk_size):
+    view = memoryview(data)
+    for start in range(0, len(view), chunk_size):
+        await _write(writer, bytes(view[start:start + chunk_size]))
+    return len(data)
+
+# --- Stream Adapters ---
+class CompressingWriter:
+    """Text writer that compresses into a binary token container on a StreamWriter.
+
+    write() buffers text and, once flush_size characters are pending,
+    compresses everything up to the last word boundary in the executor and
+    awaits the underlying drain(). Text without a word boundary is held
+    back for at most MAX_PENDING characters (see core.compressor._PendingText).
+    close() writes the remaining text and the END record (it does not close
+    the wrapped writer).
+    """
+
+    def __init__(self, writer, codec, case_model="word", segmentation="greedy", runs=False,
+                 flush_size=DEFAULT_CHUNK_SIZE):
+        self.writer = writer
+        self.codec = codec
+        self.options = (case_model, segmentation, runs)
+        self.flush_size = flush_size
+        self.pending = _PendingText(RUN_WHITESPACE if runs else " \n")
+        self._parts = []
+        self._size = 0
+        self.written = 0
+        self._started = False
+
+    async def _emit(self, data):
+        await _write(self.writer, data)
+        self.written += len(data)
+
+    async def _flush_text(self, text, continued=False):
+        if not self._started:
+            self._started = True
+            await self._emit(await self.codec.run(_header, self.codec.library_path))
+        if text:
+            records = await self.codec.run(_encode_text, text, self.codec.library_path, *self.options, continued)
+            await self._emit(records)
+
+    def _take_parts(self):
+        text = "".join(self._parts)
+        self._parts = []
+        self._size = 0
+        return text
+
+    async def write(self, text):
+        self._parts.append(text)
+        self._size += len(text)
+        if self._size >= self.flush_size:
+            text = self.pending.feed(self._take_parts())
+            if text:
+                await self._flush_text(text, self.pending.continued)
+
+    async def close(self):
+        """Flushes pending text and the END record; returns the bytes written in total."""
+        text = self.pending.feed(self._take_parts())
+        if text:
+            await self._flush_text(text, self.pending.continued)
+        text = self.pending.flush()
+        await self._flush_text(text, self.pending.continued)
+        await self._emit(bytes([TAG_END]))
+        return self.written
+
+class DecompressingReader:
+    """Async iterator of decoded text pieces from a binary token container on a StreamReader.
+
+    Complete records up to the last word boundary are decoded in the
+    executor while the next chunk is awaited from the reader.
+    """
+
+    def __init__(self, reader, codec, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.reader = reader
+        self.codec = codec
+        self.chunk_size = chunk_size
+
+    def __aiter__(self):
+        return self._pieces()
+
+    async def read(self):
+        """Returns all remaining decoded text."""
+        return "".join([piece async for piece in self._pieces()])
+
+    async def _pieces(self):
+        chunks = aiter_chunks(self.reader, self.chunk_size)
+        data = bytearray()
+        header_checked = False
+        decoding = None
+        try:
+            async for chunk in chunks:
+                data.extend(chunk)
+                if not header_checked:
+                    if len(data) < HEADER_SIZE:
+                        continue
+                    await self.codec.run(_check_header, bytes(data[:HEADER_SIZE]), self.codec.library_path)
+                    del data[:HEADER_SIZE]
+                    header_checked = True
+                cut, end = scan_records(data)
+                if cut:
+                    records = bytes(data[:cut])
+                    del data[:cut]
+                    if decoding is not None:
+                        yield await decoding
+                    # Decode in the background while the loop goes back to the reader
+                    decoding = asyncio.ensure_future(self.codec.run(_decode_records, records,
+                                                                    self.codec.library_path))
+                if end is not None:
+                    if decoding is not None:
+                        text, decoding = await decoding, None
+                        yield text
+                    return
+            raise ValueError("Truncated token container")
+        finally:
+            if decoding is not None:
+                decoding.cancel()
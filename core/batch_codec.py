@@ -0,0 +1,244 @@
+"""
+Batch Codec - compresses many short strings (rows, titles, log lines) at once.
+
+Compressing short fields one by one pays the per-call overhead and a
+container header for every string. compress_many() encodes all strings
+into one shared record buffer and keeps an offsets array beside it, so
+each string costs only its own records and any one of them can still be
+decoded on its own.
+
+Serialized format (version 1):
+    [magic "SCB1"] [version:1] [library fingerprint:8] [varint count]
+    [count x varint record length] [records...]
+
+Large batches can be split into chunks that compress and decompress in
+worker processes (see core.parallel_codec); results are identical to the
+serial path.
+"""
+
+import io
+import time
+from array import array
+
+from core.compressor import compress, decompress
+from core.codec_artifact import DEFAULT_LIBRARY_PATH
+from core import parallel_codec
+from core.syllable_codec import get_syllable_codec
+from core.token_container import (
+    encode_varint,
+    decode_varint,
+    encode_tokens,
+    library_fingerprint,
+    iter_records,
+    FINGERPRINT_SIZE,
+    TAG_END,
+)
+
+MAGIC = b"SCB1"
+FORMAT_VERSION = 1
+DEFAULT_CHUNK_SIZE = 10000
+
+class CompressedBatch:
+    """A batch of compressed strings: one record buffer plus end offsets.
+
+    Item i occupies buffer[offsets[i]:offsets[i + 1]].
+    """
+
+    def __init__(self, buffer, offsets, fingerprint):
+        self.buffer = buffer
+        self.offsets = offsets
+        self.fingerprint = fingerprint
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def record(self, index):
+        """Returns the raw records of item index as a memoryview."""
+        return memoryview(self.buffer)[self.offsets[index]:self.offsets[index + 1]]
+
+    def to_bytes(self):
+        out = bytearray(MAGIC)
+        out.append(FORMAT_VERSION)
+        out.extend(self.fingerprint)
+        encode_varint(len(self), out)
+        offsets = self.offsets
+        for i in range(len(self)):
+            encode_varint(offsets[i + 1] - offsets[i], out)
+        out.extend(self.buffer)
+        return bytes(out)
+
+    @classmethod
+    def from_bytes(cls, data):
+        if data[:len(MAGIC)] != MAGIC:
+            raise ValueError("Not a compressed string batch")
+        version = data[len(MAGIC)]
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported batch version {version}")
+        pos = len(MAGIC) + 1
+        fingerprint = bytes(data[pos:pos + FINGERPRINT_SIZE])
+        count, pos = decode_varint(data, pos + FINGERPRINT_SIZE)
+        offsets = array("Q", [0])
+        end = 0
+        for _ in range(count):
+            length, pos = decode_varint(data, pos)
+            end += length
+            offsets.append(end)
+        buffer = bytes(data[pos:])
+        if len(buffer) != end:
+            raise ValueError("Truncated string batch")
+        return cls(buffer, offsets, fingerprint)
+
+# --- Chunk Workers ---
+def _encode_strings(strings, artifact, word_cache, case_model, segmentation, runs):
+    """Encodes strings into (record buffer, per-string record lengths)."""
+    buffer = bytearray()
+    lengths = array("Q")
+    c2_map, vowel_map, consonant_map, trie = artifact.c2_map, artifact.vowel_map, artifact.consonant_map, artifact.trie
+    for text in strings:
+        start = len(buffer)
+        encode_tokens(compress(text, c2_map, vowel_map, consonant_map, None, trie, case_model, segmentation, runs,
+                               word_cache), buffer)
+        lengths.append(len(buffer) - start)
+    return bytes(buffer), lengths
+
+def _decode_records(buffer, offsets, artifact):
+    """Decodes consecutive items whose records end at offsets (starting at 0)."""
+    c2_map, reverse_c2_map = artifact.c2_map, artifact.reverse_c2_map
+    view = memoryview(buffer)
+    texts = []
+    start = 0
+    for end in offsets:
+        records = io.BytesIO(bytes(view[start:end]) + bytes([TAG_END]))
+        texts.append(decompress(list(iter_records(records, c2_map, reverse_c2_map)), c2_map,
+                                reverse_c2_map=reverse_c2_map))
+        start = end
+    return texts
+
+def _compress_chunk(strings, case_model, segmentation, runs):
+    return _encode_strings(strings, parallel_codec._worker_artifact, parallel_codec._worker_word_cache,
+                           case_model, segmentation, runs)
+
+def _decompress_chunk(chunk):
+    buffer, offsets = chunk
+    return _decode_records(buffer, offsets, parallel_codec._worker_artifact)
+
+def _chunks(items, chunk_size):
+    for start in range(0, len(items), chunk_size):
+        yield items[start:start + chunk_size]
+
+def _record_stats(stats, count, started, compressed_size):
+    if stats is None:
+        return
+    seconds = time.perf_counter() - started
+    stats.update({
+        "strings": count,
+        "seconds": seconds,
+        "strings_per_second": count / seconds if seconds else float("inf"),
+        "compressed_bytes": compressed_size,
+    })
+
+# --- Public API ---
+def compress_many(strings, case_model="word", segmentation="greedy", runs=False, jobs=1,
+                  library_path=DEFAULT_LIBRARY_PATH, chunk_size=DEFAULT_CHUNK_SIZE, stats=None):
+    """Compresses a sequence of strings into a CompressedBatch.
+
+    jobs > 1 (or None for one per CPU) compresses chunks of chunk_size
+    strings in worker processes. If stats is a dict, it is filled with
+    the count, elapsed seconds and strings_per_second.
+    """
+    started = time.perf_counter()
+    strings = strings if isinstance(strings, (list, tuple)) else list(strings)
+    codec = get_syllable_codec(library_path)
+    artifact = codec.artifact
+    if jobs == 1:
+        buffer, lengths = _encode_strings(strings, artifact, codec.word_cache, case_model, segmentation, runs)
+        chunks = [(buffer, lengths)]
+    else:
+        executor, jobs = parallel_codec._executor(jobs, library_path)
+        try:
+            chunks = list(parallel_codec._ordered_map(executor, _compress_chunk, _chunks(strings, chunk_size),
+                                                      jobs * 2, case_model, segmentation, runs))
+        finally:
+            if executor is not None:
+                executor.shutdown()
+    offsets = array("Q", [0])
+    end = 0
+    for _, lengths in chunks:
+        for length in lengths:
+            end += length
+            offsets.append(end)
+    buffer = chunks[0][0] if len(chunks) == 1 else b"".join(buffer for buffer, _ in chunks)
+    batch = CompressedBatch(buffer, offsets, library_fingerprint(artifact.c2_map))
+    _record_stats(stats, len(strings), started, len(buffer))
+    return batch
+
+def decompress_many(batch, jobs=1, library_path=DEFAULT_LIBRARY_PATH, chunk_size=DEFAULT_CHUNK_SIZE, stats=None):
+    """Decompresses a CompressedBatch (or its to_bytes() form) into a list of strings."""
+    started = time.perf_counter()
+    if not isinstance(batch, CompressedBatch):
+        batch = CompressedBatch.from_bytes(batch)
+    artifact = _checked_artifact(batch, library_path)
+    offsets = batch.offsets
+    if jobs == 1:
+        texts = _decode_records(batch.buffer, offsets[1:], artifact)
+    else:
+        def chunks():
+            for first in range(0, len(batch), chunk_size):
+                last = min(first + chunk_size, len(batch))
+                base = offsets[first]
+                yield (batch.buffer[base:offsets[last]],
+                       array("Q", (offsets[i] - base for i in range(first + 1, last + 1))))
+        executor, jobs = parallel_codec._executor(jobs, library_path)
+        try:
+            texts = []
+            for chunk_texts in parallel_codec._ordered_map(executor, _decompress_chunk, chunks(), jobs * 2):
+                texts.extend(chunk_texts)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+    _record_stats(stats, len(texts), started, len(batch.buffer))
+    return texts
+
+def decompress_one(batch, index, library_path=DEFAULT_LIBRARY_PATH):
+    """Decompresses a single item of a CompressedBatch."""
+    artifact = _checked_artifact(batch, library_path)
+    records = batch.record(index)
+    return _decode_records(records, [len(records)], artifact)[0]
+
+# Fingerprints of the shared artifacts, so decompress_one() does not rehash the library per item
+_FINGERPRINTS = {}
+
+def _checked_artifact(batch, library_path):
+    """Returns the codec tables for library_path; raises ValueError if batch used another library."""
+    artifact = get_syllable_codec(library_path).artifact
+    fingerprint = _FINGERPRINTS.get(artifact)
+    if fingerprint is None:
+        fingerprint = _FINGERPRINTS[artifact] = library_fingerprint(artifact.c2_map)
+    if batch.fingerprint != fingerprint:
+        raise ValueError("Batch was written with a different syllable library")
+    return artifact
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Batch-compress the lines of a text file and report throughput.")
+    parser.add_argument("--input", required=True, help="Text file; every line is one string.")
+    parser.add_argument("--output", help="Optional path for the serialized batch.")
+    parser.add_argument("--jobs", type=int, default=1, help="Worker processes (0 = one per CPU).")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Strings per worker chunk.")
+    args = parser.parse_args()
+
+    with open(args.input, "r", encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    compress_stats, decompress_stats = {}, {}
+    batch = compress_many(lines, jobs=args.jobs or None, chunk_size=args.chunk_size, stats=compress_stats)
+    data = batch.to_bytes()
+    restored = decompress_many(data, jobs=args.jobs or None, chunk_size=args.chunk_size, stats=decompress_stats)
+    if restored != lines:
+        raise SystemExit("Roundtrip mismatch")
+    if args.output:
+        with open(args.output, "wb") as f:
+            f.write(data)
+    print(f"{len(lines)} strings, {sum(len(line) for line in lines)} chars -> {len(data)} bytes")
+    print(f"compress:   {compress_stats['strings_per_second']:,.0f} strings/s")
+    print(f"decompress: {decompress_stats['strings_per_second']:,.0f} strings/s")
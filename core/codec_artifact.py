@@ -0,0 +1,327 @@
+"""
+Codec Artifact - precompiled, memory-mappable syllable codec tables.
+
+load_syllable_library() + create_syllable_cypher_map() rebuild the same
+tables in every process. compile_codec_artifact() packs the syllable
+strings, their IDs and the longest-match trie into one flat binary file
+keyed by a hash of the source library. load_codec_artifact() maps that
+file read-only, so every worker on a host shares the same pages, and
+recompiles it whenever the source library changes.
+
+Build ahead of time with: python -m core.codec_artifact
+
+Layout (native-endian uint32 words, 4-byte aligned sections):
+    header   magic "SCA1", version, byte order, pad, sha256(source library)
+    counts   syllable_count, node_count, edge_count, blob_size
+    offsets  (syllable_count + 1) string offsets into blob, in ID order
+    blob     UTF-8 syllable strings, zero padded
+    library  syllable IDs in load_syllable_library() (longest-first) order
+    nodes    node_count x (first_edge, edge_count, syllable_id + 1 or 0)
+    edges    edge_count x (codepoint, child_node), sorted per node
+"""
+
+import hashlib
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections.abc import Mapping
+
+from core.compressor import (
+    load_syllable_library,
+    load_syllable_ranking,
+    syllable_id_order,
+    create_letter_cyphers,
+    build_c2_entry,
+)
+
+MAGIC = b"SCA1"
+FORMAT_VERSION = 1
+_BYTE_ORDER = 0 if sys.byteorder == "little" else 1
+_HEADER = struct.Struct("=4sBBxx32s4I")
+
+DEFAULT_LIBRARY_PATH = "key/syllable_library.txt"
+
+# --- Compilation ---
+def _source_hash(library_path):
+    with open(library_path, "rb") as f:
+        return hashlib.sha256(f.read()).digest()
+
+def default_artifact_path(library_path):
+    """Returns the artifact path used for a library file by default."""
+    return os.path.splitext(library_path)[0] + ".sca"
+
+def _words(values):
+    return array("I", values).tobytes()
+
+def _pad4(data):
+    return data + b"\0" * (-len(data) % 4)
+
+def compile_codec_artifact(library_path=DEFAULT_LIBRARY_PATH, artifact_path=None):
+    """Compiles the syllable library into a codec artifact file.
+
+    The file is written to a temporary name and renamed into place, so
+    concurrent readers never observe a partial artifact.
+    """
+    if artifact_path is None:
+        artifact_path = default_artifact_path(library_path)
+    source_hash = _source_hash(library_path)
+    syllable_library = load_syllable_library(library_path)
+    syllables = syllable_id_order(syllable_library, load_syllable_ranking(library_path))
+    ids = {syllable: i for i, syllable in enumerate(syllables)}
+
+    # Syllable strings in ID order
+    blob = bytearray()
+    offsets = [0]
+    for syllable in syllables:
+        blob.extend(syllable.encode("utf-8"))
+        offsets.append(len(blob))
+
+    # Trie nodes in breadth-first order with contiguous, sorted edge lists
+    tree = [{}]
+    terminal = [0]
+    for syllable in syllables:
+        node = 0
+        for char in syllable:
+            child = tree[node].get(char)
+            if child is None:
+                child = len(tree)
+                tree[node][char] = child
+                tree.append({})
+                terminal.append(0)
+            node = child
+        terminal[node] = ids[syllable] + 1
+    order = [0]
+    for node in order:
+        order.extend(child for _, child in sorted(tree[node].items()))
+    position = {node: i for i, node in enumerate(order)}
+    nodes = []
+    edges = []
+    for node in order:
+        children = sorted(tree[node].items())
+        nodes.extend((len(edges) // 2, len(children), terminal[node]))
+        for char, child in children:
+            edges.extend((ord(char), position[child]))
+
+    header = _HEADER.pack(MAGIC, FORMAT_VERSION, _BYTE_ORDER, source_hash,
+                          len(syllables), len(order), len(edges) // 2, len(blob))
+    payload = b"".join([
+        header,
+        _words(offsets),
+        _pad4(bytes(blob)),
+        _words(ids[syllable] for syllable in syllable_library),
+        _words(nodes),
+        _words(edges),
+    ])
+    temp_path = f"{artifact_path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(payload)
+    os.replace(temp_path, artifact_path)
+    return artifact_path
+
+# --- Mapped Structures ---
+class MappedSyllableTrie:
+    """Longest-match trie that reads the artifact's node/edge tables in place.
+
+    Each node's edge list is expanded into a small dict the first time it
+    is visited, so only the working set of nodes costs private memory.
+    """
+
+    def __init__(self, nodes, edges):
+        self.nodes = nodes
+        self.edges = edges
+        self._children = [None] * (len(nodes) // 3)
+
+    def _node_children(self, node):
+        children = self._children[node]
+        if children is None:
+            edges = self.edges
+            first = self.nodes[node * 3]
+            last = first + self.nodes[node * 3 + 1]
+            children = {chr(edges[edge * 2]): edges[edge * 2 + 1] for edge in range(first, last)}
+            self._children[node] = children
+        return children
+
+    def find(self, syllable):
+        """Returns the ID of an exact library syllable, or None."""
+        node = 0
+        for char in syllable:
+            node = self._node_children(node).get(char)
+            if node is None:
+                return None
+        syllable_id = self.nodes[node * 3 + 2]
+        return syllable_id - 1 if syllable_id else None
+
+    def longest_match(self, text, start=0):
+        """Returns the length of the longest syllable at text[start:], or 0."""
+        nodes = self.nodes
+        node = 0
+        best = 0
+        for i in range(start, len(text)):
+            node = self._node_children(node).get(text[i])
+            if node is None:
+                break
+            if nodes[node * 3 + 2]:
+                best = i + 1 - start
+        return best
+
+    def match_lengths(self, text, start=0):
+        """Returns the lengths of every syllable matching at text[start:], shortest first."""
+        nodes = self.nodes
+        node = 0
+        lengths = []
+        for i in range(start, len(text)):
+            node = self._node_children(node).get(text[i])
+            if node is None:
+                break
+            if nodes[node * 3 + 2]:
+                lengths.append(i + 1 - start)
+        return lengths
+
+class SyllableTable:
+    """Read-only ID -> syllable view over the artifact's string table."""
+
+    def __init__(self, offsets, blob):
+        self.offsets = offsets
+        self.blob = blob
+        self._decoded = [None] * (len(offsets) - 1)
+
+    def __len__(self):
+        return len(self._decoded)
+
+    def __getitem__(self, syllable_id):
+        syllable = self._decoded[syllable_id]
+        if syllable is None:
+            start = self.offsets[syllable_id]
+            end = self.offsets[syllable_id + 1]
+            syllable = bytes(self.blob[start:end]).decode("utf-8")
+            self._decoded[syllable_id] = syllable
+        return syllable
+
+    def get(self, syllable_id, default=None):
+        if isinstance(syllable_id, int) and 0 <= syllable_id < len(self._decoded):
+            return self[syllable_id]
+        return default
+
+class LazyC2Map(Mapping):
+    """C2 map that builds each syllable's entry on first access."""
+
+    def __init__(self, trie, syllables, vowel_map, consonant_map):
+        self.trie = trie
+        self.syllables_by_id = syllables
+        self.vowel_map = vowel_map
+        self.consonant_map = consonant_map
+        self._entries = {}
+
+    def __getitem__(self, syllable):
+        entry = self._entries.get(syllable)
+        if entry is None:
+            syllable_id = self.trie.find(syllable) if isinstance(syllable, str) else None
+            if syllable_id is None:
+                raise KeyError(syllable)
+            entry = build_c2_entry(syllable, syllable_id, self.vowel_map, self.consonant_map)
+            self._entries[syllable] = entry
+        return entry
+
+    def __contains__(self, syllable):
+        return syllable in self._entries or (isinstance(syllable, str) and self.trie.find(syllable) is not None)
+
+    def __iter__(self):
+        for syllable_id in range(len(self.syllables_by_id)):
+            yield self.syllables_by_id[syllable_id]
+
+    def __len__(self):
+        return len(self.syllables_by_id)
+
+# --- Loading ---
+class CodecArtifact:
+    """Codec tables backed by a read-only memory map of an artifact file."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mmap)
+        (magic, version, byte_order, self.source_hash,
+         syllable_count, node_count, edge_count, blob_size) = _HEADER.unpack_from(view)
+        if magic != MAGIC or version != FORMAT_VERSION or byte_order != _BYTE_ORDER:
+            view.release()
+            self._mmap.close()
+            raise ValueError(f"Incompatible codec artifact: {path}")
+
+        pos = _HEADER.size
+        def words(count):
+            nonlocal pos
+            section = view[pos:pos + count * 4].cast("I")
+            pos += count * 4
+            return section
+        offsets = words(syllable_count + 1)
+        blob = view[pos:pos + blob_size]
+        pos += blob_size + (-blob_size % 4)
+        self._library_ids = words(syllable_count)
+        nodes = words(node_count * 3)
+        edges = words(edge_count * 2)
+
+        self.vowel_map, self.consonant_map = create_letter_cyphers()
+        self.trie = MappedSyllableTrie(nodes, edges)
+        self.reverse_c2_map = SyllableTable(offsets, blob)
+        self.c2_map = LazyC2Map(self.trie, self.reverse_c2_map, self.vowel_map, self.consonant_map)
+        self._syllable_library = None
+
+    def close(self):
+        """Releases the memory map (views handed out become invalid)."""
+        self.trie = self.c2_map = self.reverse_c2_map = self._library_ids = None
+        self._mmap.close()
+
+    @property
+    def syllable_library(self):
+        """The library in load_syllable_library() order (decoded on first use)."""
+        if self._syllable_library is None:
+            self._syllable_library = [self.reverse_c2_map[i] for i in self._library_ids]
+        return self._syllable_library
+
+def load_codec_artifact(library_path=DEFAULT_LIBRARY_PATH, artifact_path=None):
+    """Maps the codec artifact for library_path, compiling it if stale or missing.
+
+    If the artifact cannot be written (e.g. a read-only install), it is
+    compiled to a temporary file named after the library's hash instead,
+    which later processes reuse rather than compiling their own.
+    """
+    if artifact_path is None:
+        artifact_path = default_artifact_path(library_path)
+    source_hash = _source_hash(library_path)
+    artifact = _open_current(artifact_path, source_hash)
+    if artifact is not None:
+        return artifact
+    try:
+        compile_codec_artifact(library_path, artifact_path)
+    except OSError:
+        import tempfile
+        artifact_path = os.path.join(tempfile.gettempdir(), f"syllable_library.{source_hash.hex()[:16]}.sca")
+        artifact = _open_current(artifact_path, source_hash)
+        if artifact is not None:
+            return artifact
+        compile_codec_artifact(library_path, artifact_path)
+    return CodecArtifact(artifact_path)
+
+def _open_current(artifact_path, source_hash):
+    """Maps artifact_path if it exists and was compiled from source_hash; None otherwise."""
+    try:
+        artifact = CodecArtifact(artifact_path)
+    except (OSError, ValueError, struct.error):
+        return None
+    if artifact.source_hash == source_hash:
+        return artifact
+    artifact.close()
+    return None
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compile the syllable library into a memory-mappable codec artifact.")
+    parser.add_argument("--library", default=DEFAULT_LIBRARY_PATH, help="Path to the syllable library text file.")
+    parser.add_argument("--output", default=None, help="Artifact path (default: next to the library, .sca).")
+    args = parser.parse_args()
+    path = compile_codec_artifact(args.library, args.output)
+    print(f"Compiled '{args.library}' to '{path}'.")
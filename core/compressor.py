@@ -1,7 +1,12 @@
 # core/compressor.py
+import io
+import os
+import re
+import functools
+import sys
 import json
 import argparse
-from itertools import cycle
+from itertools import chain, cycle
 
 # --- Constants ---
 VOWELS = "aeiouy"
@@ -9,15 +14,37 @@ CONSONANTS = "bcdfghjklmnpqrstvwxz"
 VOWEL_CYPHER_STRING = "142857"
 CONSONANT_CYPHER_STRING = "1428570"
 
+RANKED_LIBRARY_HEADER = "# order: ranked"
+
 # --- Library Loading ---
+def _read_library_lines(path):
+    """Returns (syllables in file order, whether the file declares ranked IDs)."""
+    with open(path, "r") as f:
+        lines = [line.strip() for line in f if line.strip()]
+    ranked = RANKED_LIBRARY_HEADER in lines
+    return [line for line in lines if not line.startswith("#")], ranked
+
 def load_syllable_library(path="key/syllable_library.txt"):
-    """Loads the syllable library from a file, longest first for greedy matching."""
+    """Loads the syllable library from a file, longest first for greedy matching.
+
+    Raises FileNotFoundError if the library file does not exist.
+    """
     try:
-        with open(path, "r") as f:
-            return sorted([line.strip() for line in f if line.strip()], key=len, reverse=True)
-    except FileNotFoundError:
-        print(f"Error: Syllable library not found at '{path}'. Please ensure the file exists.")
-        exit(1)
+        syllables, _ = _read_library_lines(path)
+    except FileNotFoundError as e:
+        raise FileNotFoundError(e.errno, "Syllable library not found", path) from None
+    return sorted(syllables, key=len, reverse=True)
+
+def load_syllable_ranking(path="key/syllable_library.txt"):
+    """Returns the syllables in ID order for a ranked library file, or None.
+
+    Trained libraries (see key/generate_syllables.py --train) start with
+    RANKED_LIBRARY_HEADER and list syllables most frequent first, so the
+    commonest syllables get the smallest IDs. Other libraries use
+    alphabetical IDs.
+    """
+    syllables, ranked = _read_library_lines(path)
+    return syllables if ranked else None
 
 # --- Mapping Generation ---
 def get_vowel_consonant_pattern(syllable):
@@ -42,127 +69,538 @@ def create_letter_cyphers():
         consonant_map[letter] = int(next(consonant_cypher_sequence))
     return vowel_map, consonant_map
 
-def create_syllable_cypher_map(syllable_library, vowel_map, consonant_map):
-    """Creates the C2 master map for all syllables with unique IDs."""
+def build_c2_entry(syllable, base_value, vowel_map, consonant_map):
+    """Builds the C2 map entry for one syllable with the given ID."""
+    pattern = get_vowel_consonant_pattern(syllable)
+    letter_values = []
+    for char in syllable:
+        if char in VOWELS:
+            letter_values.append(vowel_map.get(char, 0))
+        else:
+            letter_values.append(consonant_map.get(char, 0))
+    multiplied_values = {}
+    for j in range(1, 7):
+        multiplied_values[f"x{j}"] = base_value * j
+    return {
+        "type": "C2", "pattern": pattern, "base_value": base_value,
+        "letter_values": letter_values, "multipliers": multiplied_values,
+    }
+
+def syllable_id_order(syllable_library, ranking=None):
+    """Returns the syllables in ID order: ranking order if given, else alphabetical."""
+    if ranking is None:
+        return sorted(list(set(syllable_library)))
+    return list(dict.fromkeys(ranking))
+
+def create_syllable_cypher_map(syllable_library, vowel_map, consonant_map, ranking=None):
+    """Creates the C2 master map for all syllables with unique IDs.
+
+    IDs are alphabetical unless a ranking (see load_syllable_ranking) is given.
+    """
     cypher_map = {}
-    sorted_syllables = sorted(list(set(syllable_library)))
+    sorted_syllables = syllable_id_order(syllable_library, ranking)
     for i, syllable in enumerate(sorted_syllables):
-        base_value = i
-        pattern = get_vowel_consonant_pattern(syllable)
-        letter_values = []
-        for char in syllable:
-            if char in VOWELS:
-                letter_values.append(vowel_map.get(char, 0))
-            else:
-                letter_values.append(consonant_map.get(char, 0))
-        multiplied_values = {}
-        for j in range(1, 7):
-            multiplied_values[f"x{j}"] = base_value * j
-        syllable_data = {
-            "type": "C2", "pattern": pattern, "base_value": base_value,
-            "letter_values": letter_values, "multipliers": multiplied_values,
-        }
-        cypher_map[syllable] = syllable_data
+        cypher_map[syllable] = build_c2_entry(syllable, i, vowel_map, consonant_map)
     return cypher_map
 
+# --- Syllable Matching ---
+class SyllableTrie:
+    """Prefix trie over the syllable library for longest-match lookups."""
+
+    _END = ""
+
+    def __init__(self, syllable_library):
+        self.root = {}
+        self.max_length = 0
+        for syllable in syllable_library:
+            node = self.root
+            for char in syllable:
+                node = node.setdefault(char, {})
+            node[self._END] = True
+            self.max_length = max(self.max_length, len(syllable))
+
+    def longest_match(self, text, start=0):
+        """Returns the length of the longest syllable at text[start:], or 0."""
+        node = self.root
+        end = self._END
+        best = 0
+        i = start
+        n = len(text)
+        while i < n:
+            node = node.get(text[i])
+            if node is None:
+                break
+            i += 1
+            if end in node:
+                best = i - start
+        return best
+
+    def match_lengths(self, text, start=0):
+        """Returns the lengths of every syllable matching at text[start:], shortest first."""
+        node = self.root
+        end = self._END
+        lengths = []
+        for i in range(start, len(text)):
+            node = node.get(text[i])
+            if node is None:
+                break
+            if end in node:
+                lengths.append(i + 1 - start)
+        return lengths
+
+_TRIE_CACHE = {}
+
+def build_syllable_trie(syllable_library):
+    """Returns a (cached) SyllableTrie for the given syllable library."""
+    key = tuple(syllable_library)
+    trie = _TRIE_CACHE.get(key)
+    if trie is None:
+        trie = SyllableTrie(key)
+        _TRIE_CACHE[key] = trie
+    return trie
+
+# --- Case Model ---
+CASE_MODES = ("lower", "title", "upper", "mixed")
+
+def apply_word_case(lower_word, mode, mask=0):
+    """Restores a word from its lowercase form, case mode and mixed-case bitmap."""
+    if mode == "lower":
+        return lower_word
+    if mode == "title":
+        return lower_word.title()
+    if mode == "upper":
+        return lower_word.upper()
+    chars = list(lower_word)
+    for i in range(len(chars)):
+        if (mask >> i) & 1:
+            chars[i] = chars[i].upper()
+    return "".join(chars)
+
+def detect_word_case(word, lower_word):
+    """Returns (mode, mask) reproducing word from lower_word, or None if no mode can."""
+    if word == lower_word:
+        return "lower", 0
+    if len(word) != len(lower_word):
+        return None
+    if word == lower_word.upper():
+        return "upper", 0
+    if word == lower_word.title():
+        return "title", 0
+    mask = 0
+    for i, (char, lower_char) in enumerate(zip(word, lower_word)):
+        if char != lower_char:
+            mask |= 1 << i
+    if apply_word_case(lower_word, "mixed", mask) == word:
+        return "mixed", mask
+    return None
+
 # --- Core Logic ---
-def compress(text, c2_map, c1_vowel_map, c1_consonant_map, syllable_library):
-    """Compresses text, handling words, spaces, newlines, and case preservation."""
-    compressed_data = []
+def _segment_greedy(lower_word, trie):
+    """Returns the greedy segmentation as match lengths (0 = C1 character)."""
+    steps = []
+    idx = 0
+    word_length = len(lower_word)
+    while idx < word_length:
+        match_length = trie.longest_match(lower_word, idx)
+        steps.append(match_length)
+        idx += match_length or 1
+    return steps
+
+def _segment_optimal(lower_word, trie, c2_map):
+    """Returns the segmentation with the smallest binary container size.
+
+    Dynamic programming over word positions with two states: whether the
+    prefix ends inside a C1 run (extra C1 characters are cheaper than
+    opening a new run) or not. Ties keep the longer syllable.
+    """
+    from core.token_container import c1_char_cost, c2_token_cost, C1_RUN_OVERHEAD
+
+    word_length = len(lower_word)
+    infinity = float("inf")
+    # cost[state][i]: cheapest encoding of lower_word[:i]; state 1 = ends in a C1 run
+    cost = [[infinity] * (word_length + 1), [infinity] * (word_length + 1)]
+    back = [[None] * (word_length + 1), [None] * (word_length + 1)]
+    cost[0][0] = 0
+    for i in range(word_length):
+        base = min(cost[0][i], cost[1][i])
+        if base == infinity:
+            continue
+        prev_state = 0 if cost[0][i] <= cost[1][i] else 1
+        for length in reversed(trie.match_lengths(lower_word, i)):
+            syllable = lower_word[i:i + length]
+            total = base + c2_token_cost(c2_map[syllable]["base_value"])
+            if total < cost[0][i + length]:
+                cost[0][i + length] = total
+                back[0][i + length] = (i, prev_state, length)
+        char_cost = c1_char_cost(lower_word[i])
+        for state, extra in ((1, 0), (0, C1_RUN_OVERHEAD)):
+            total = cost[state][i] + char_cost + extra
+            if total < cost[1][i + 1]:
+                cost[1][i + 1] = total
+                back[1][i + 1] = (i, state, 0)
+    steps = []
+    state = 0 if cost[0][word_length] <= cost[1][word_length] else 1
+    i = word_length
+    while i > 0:
+        i, state, length = back[state][i]
+        steps.append(length)
+    steps.reverse()
+    return steps
+
+def _word_templates(lower_word, c2_map, c1_vowel_map, c1_consonant_map, trie, segmentation="greedy"):
+    """Segments a lowercase word; returns ((start, length, token), ...) without case fields."""
+    if segmentation == "optimal":
+        steps = _segment_optimal(lower_word, trie, c2_map)
+    else:
+        steps = _segment_greedy(lower_word, trie)
+    templates = []
+    idx = 0
+    for match_length in steps:
+        if match_length:
+            syllable = lower_word[idx:idx + match_length]
+            if syllable in c2_map:
+                templates.append((idx, match_length, {"type": "C2", **c2_map[syllable]}))
+            idx += match_length
+        else:
+            char = lower_word[idx]
+            if char in c1_vowel_map: value = c1_vowel_map[char]
+            elif char in c1_consonant_map: value = c1_consonant_map[char]
+            else: value = -1
+            templates.append((idx, 1, {"type": "C1", "char": char, "value": value}))
+            idx += 1
+    return tuple(templates)
+
+class WordTokenCache:
+    """Bounded LRU cache of lowercase word -> segmented token templates.
+
+    Case is applied per occurrence, so "The", "THE" and "the" share one
+    entry. A cache is bound to one set of codec tables; pass it to
+    compress()/compress_stream() as word_cache. maxsize=None disables
+    eviction.
+    """
+
+    def __init__(self, c2_map, c1_vowel_map, c1_consonant_map, trie, maxsize=50000):
+        self.maxsize = maxsize
+        self._build = functools.lru_cache(maxsize)(
+            lambda lower_word, segmentation: _word_templates(lower_word, c2_map, c1_vowel_map, c1_consonant_map,
+                                                             trie, segmentation))
+
+    def lookup(self, lower_word, segmentation="greedy"):
+        return self._build(lower_word, segmentation)
+
+    @property
+    def hits(self):
+        return self._build.cache_info().hits
+
+    @property
+    def misses(self):
+        return self._build.cache_info().misses
+
+    def __len__(self):
+        return self._build.cache_info().currsize
+
+    def clear(self):
+        """Drops every entry and resets the hit/miss counters."""
+        self._build.cache_clear()
+
+def _append_word_tokens(word, compressed_data, c2_map, c1_vowel_map, c1_consonant_map, trie,
+                        case_model="char", segmentation="greedy", word_cache=None):
+    """Segments one word into C2/C1 tokens, appending them to compressed_data.
+
+    With case_model="word", case is recorded once per word as a CASE token
+    (omitted for lowercase words) instead of per syllable and character.
+    """
+    lower_word = word.lower()
+    per_char_case = True
+    if case_model == "word":
+        word_case = detect_word_case(word, lower_word)
+        if word_case is not None:
+            per_char_case = False
+            mode, mask = word_case
+            if mode == "mixed":
+                compressed_data.append({"type": "CASE", "mode": mode, "mask": mask})
+            elif mode != "lower":
+                compressed_data.append({"type": "CASE", "mode": mode})
+    if word_cache is not None:
+        templates = word_cache.lookup(lower_word, segmentation)
+    else:
+        templates = _word_templates(lower_word, c2_map, c1_vowel_map, c1_consonant_map, trie, segmentation)
+    extend_word = getattr(compressed_data, "extend_word", None)
+    if extend_word is not None:
+        # Array-backed sinks (core.token_stream.TokenStream) take the templates directly
+        extend_word(word, templates, per_char_case)
+        return
+    if not per_char_case:
+        compressed_data.extend([{**template} for _, _, template in templates])
+        return
+    for idx, length, template in templates:
+        if template["type"] == "C2":
+            # Preserve case information from original word
+            case_pattern = [1 if c.isupper() else 0 for c in word[idx:idx + length]]
+            compressed_data.append({**template, "case": case_pattern})
+        else:
+            compressed_data.append({**template, "is_uppercase": word[idx].isupper()})
+
+# Run mode splits text into whitespace runs, ASCII letter runs (words) and literal runs
+_RUN_PATTERN = re.compile(r"[ \t\r\n]+|[A-Za-z]+|[^A-Za-z \t\r\n]+")
+RUN_WHITESPACE = " \t\r\n"
+
+def _append_run_tokens(text, compressed_data, c2_map, c1_vowel_map, c1_consonant_map, trie,
+                       case_model, segmentation, word_cache=None):
+    """Run-mode tokenization: WHITESPACE/LITERAL runs around letter-only words."""
+    for match in _RUN_PATTERN.finditer(text):
+        run = match.group()
+        first = run[0]
+        if first in RUN_WHITESPACE:
+            if run == " ":
+                compressed_data.append({"type": "SPACE"})
+            elif run == "\n":
+                compressed_data.append({"type": "NEWLINE"})
+            else:
+                compressed_data.append({"type": "WHITESPACE", "text": run})
+        elif first.isascii() and first.isalpha():
+            _append_word_tokens(run, compressed_data, c2_map, c1_vowel_map, c1_consonant_map, trie,
+                                case_model, segmentation, word_cache)
+        else:
+            compressed_data.append({"type": "LITERAL", "text": run})
+
+def compress(text, c2_map, c1_vowel_map, c1_consonant_map, syllable_library, trie=None, case_model="char",
+             segmentation="greedy", runs=False, word_cache=None, out=None):
+    """Compresses text, handling words, spaces, newlines, and case preservation.
+
+    case_model="char" keeps per-syllable case lists and per-character
+    is_uppercase flags; case_model="word" emits one CASE token per
+    non-lowercase word (lower/title/upper, or mixed with a bitmap).
+
+    segmentation="greedy" takes the longest syllable at each position;
+    "optimal" picks, per word, the segmentation with the smallest binary
+    container encoding (slower).
+
+    runs=True emits one WHITESPACE token per run of spaces, tabs and line
+    breaks (single spaces/newlines stay SPACE/NEWLINE) and one LITERAL
+    token per run of non-letter or non-ASCII characters, instead of a
+    token per character.
+
+    word_cache (a WordTokenCache built from the same tables) reuses the
+    segmentation of repeated words.
+
+    Tokens are appended to out (default: a new list), e.g. a
+    core.token_stream.TokenStream for a compact array-backed result.
+    """
+    if trie is None:
+        trie = build_syllable_trie(syllable_library)
+    if case_model not in ("char", "word"):
+        raise ValueError(f"Unknown case model: {case_model!r}")
+    if segmentation not in ("greedy", "optimal"):
+        raise ValueError(f"Unknown segmentation: {segmentation!r}")
+    compressed_data = [] if out is None else out
+    if runs:
+        _append_run_tokens(text, compressed_data, c2_map, c1_vowel_map, c1_consonant_map, trie,
+                           case_model, segmentation, word_cache)
+        return compressed_data
     # Preserve structure by splitting on spaces but keeping newlines to be handled separately
     lines = text.split('\n')
     for line_idx, line in enumerate(lines):
         words = line.split(' ')
         for word_idx, word in enumerate(words):
-            if not word: continue
-            temp_word = word.lower()
-            original_word = word
-            original_idx = 0
-            while len(temp_word) > 0:
-                found_syllable = False
-                for syllable in syllable_library:
-                    if temp_word.startswith(syllable):
-                        if syllable in c2_map:
-                            # Preserve case information from original word
-                            original_syllable = original_word[original_idx:original_idx + len(syllable)]
-                            case_pattern = [1 if c.isupper() else 0 for c in original_syllable]
-                            compressed_data.append({
-                                "type": "C2",
-                                **c2_map[syllable],
-                                "case": case_pattern
-                            })
-                        temp_word = temp_word[len(syllable):]
-                        original_idx += len(syllable)
-                        found_syllable = True
-                        break
-                if not found_syllable:
-                    char = temp_word[0]
-                    original_char = original_word[original_idx]
-                    if char in c1_vowel_map: value = c1_vowel_map[char]
-                    elif char in c1_consonant_map: value = c1_consonant_map[char]
-                    else: value = -1
-                    compressed_data.append({
-                        "type": "C1",
-                        "char": char,
-                        "value": value,
-                        "is_uppercase": original_char.isupper()
-                    })
-                    temp_word = temp_word[1:]
-                    original_idx += 1
+            if word:
+                _append_word_tokens(word, compressed_data, c2_map, c1_vowel_map, c1_consonant_map, trie,
+                                    case_model, segmentation, word_cache)
             if word_idx < len(words) - 1:
                 compressed_data.append({"type": "SPACE"})
         if line_idx < len(lines) - 1:
             compressed_data.append({"type": "NEWLINE"}) 
     return compressed_data
 
-def decompress(compressed_data, c2_map, original_c2_map=None):
-    """Decompresses a list of data blocks back into text, preserving case."""
+def iter_text_chunks(f, chunk_size=1 << 16):
+    """Yields successive text chunks read from a file object."""
+    while True:
+        chunk = f.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+def _flush_point(pending, separators):
+    """Returns how much of pending can be compressed without splitting a run.
+
+    That is the start of the last word, once every separator run before it
+    is complete; 0 if no such point exists yet.
+    """
+    stripped = pending.rstrip(separators)
+    return max(stripped.rfind(separator) for separator in separators) + 1
+
+MAX_PENDING = 1 << 20  # characters held back waiting for a word boundary before a forced cut
+
+class _PendingText:
+    """Text held back until a flush point, kept as a list of parts.
+
+    feed() only scans the new chunk, so appending stays linear however long
+    a word gets. Once more than max_size characters are pending without a
+    flush point they are released anyway, cut mid-word: the tokens then
+    differ from compress() on the whole text. After feed() or flush(),
+    continued tells whether the text returned starts inside such a cut
+    word; pass its tokens through _reopen_word_case() so they still decode
+    to the original text.
+    """
+
+    def __init__(self, separators, max_size=None):
+        self.separators = separators
+        self.max_size = MAX_PENDING if max_size is None else max_size
+        self.parts = []
+        self.size = 0
+        self.continued = False
+        self._cut_word = False
+
+    def feed(self, chunk):
+        """Adds chunk; returns the text that can be compressed now ("" if none)."""
+        if not chunk:
+            return ""
+        self.continued = self._cut_word
+        cut = _flush_point(chunk, self.separators)
+        if not cut and self.parts and self.parts[-1][-1] in self.separators and chunk[0] not in self.separators:
+            # Pending text is a word plus complete separators; chunk starts the next word
+            cut = 0
+            ready = self._take()
+        elif cut:
+            self.parts.append(chunk[:cut])
+            ready = self._take()
+        else:
+            ready = ""
+        if ready:
+            self._cut_word = False
+        rest = chunk[cut:]
+        if rest:
+            self.parts.append(rest)
+            self.size += len(rest)
+        if self.size > self.max_size:
+            ready += self._take()
+            self._cut_word = True
+        return ready
+
+    def flush(self):
+        """Returns and clears all pending text."""
+        self.continued = self._cut_word
+        self._cut_word = False
+        return self._take()
+
+    def _take(self):
+        text = "".join(self.parts)
+        self.parts = []
+        self.size = 0
+        return text
+
+def _reopen_word_case(tokens, case_model):
+    """Starts a fresh word-case scope for tokens that continue a word cut mid-way.
+
+    With case_model="word" the decoder applies a CASE token to every letter
+    token up to the next other token, so the case of the cut word's first
+    part would spill onto a lowercase continuation. A leading "mixed" CASE
+    with an empty mask ends that scope and leaves the continuation as is.
+    """
+    if case_model == "word" and tokens and tokens[0]["type"] in ("C1", "C2"):
+        tokens.insert(0, {"type": "CASE", "mode": "mixed", "mask": 0})
+    return tokens
+
+def compress_stream(chunks, c2_map, c1_vowel_map, c1_consonant_map, syllable_library, trie=None, case_model="char",
+                    segmentation="greedy", runs=False, word_cache=None):
+    """Compresses an iterable of text chunks (or a text file object) lazily.
+
+    Yields one token list ("frame") per flushed piece of input. A word or
+    whitespace run that spans a chunk boundary is held back until its end
+    is seen, so the concatenated frames equal compress() on the whole text
+    (unless a single word or run exceeds MAX_PENDING characters, see
+    _PendingText).
+    """
+    if hasattr(chunks, "read"):
+        chunks = iter_text_chunks(chunks)
+    if trie is None:
+        trie = build_syllable_trie(syllable_library)
+    pending = _PendingText(RUN_WHITESPACE if runs else " \n")
+    for chunk in chunks:
+        text = pending.feed(chunk)
+        if text:
+            tokens = compress(text, c2_map, c1_vowel_map, c1_consonant_map, syllable_library, trie,
+                              case_model, segmentation, runs, word_cache)
+            yield _reopen_word_case(tokens, case_model) if pending.continued else tokens
+    text = pending.flush()
+    if text:
+        tokens = compress(text, c2_map, c1_vowel_map, c1_consonant_map, syllable_library, trie,
+                          case_model, segmentation, runs, word_cache)
+        yield _reopen_word_case(tokens, case_model) if pending.continued else tokens
+
+def build_reverse_c2_map(c2_map):
+    """Builds a base_value -> syllable index for C2 decoding."""
+    return {c2_data["base_value"]: syllable for syllable, c2_data in c2_map.items()}
+
+_C2_INTEGRITY_KEYS = ("pattern", "letter_values", "multipliers")
+
+def decompress(compressed_data, c2_map, original_c2_map=None, reverse_c2_map=None, verify=False):
+    """Decompresses a list of data blocks back into text, preserving case.
+
+    Pass a prebuilt reverse_c2_map (see build_reverse_c2_map) to reuse it
+    across calls. With verify=True, C2 blocks carrying derived fields are
+    checked against the map and rejected with ValueError on mismatch.
+    """
     reconstructed_parts = []
-    
-    # Build reverse map: compare just the core C2 data (without type/case)
-    reverse_c2_map = {}
-    for syllable, c2_data in c2_map.items():
-        # Store the mapping using the core C2 data structure
-        reverse_c2_map[syllable] = c2_data
+    if reverse_c2_map is None:
+        reverse_c2_map = build_reverse_c2_map(c2_map)
+    # Pending word-level case (CASE token) and where that word starts
+    word_case = None
+    word_start = 0
     
     for block in compressed_data:
         block_type = block.get("type")
+        if word_case is not None and block_type not in ("C1", "C2"):
+            word = "".join(reconstructed_parts[word_start:])
+            del reconstructed_parts[word_start:]
+            reconstructed_parts.append(apply_word_case(word, word_case.get("mode"), word_case.get("mask", 0)))
+            word_case = None
         if block_type == "C1":
             char = block["char"]
             if block.get("is_uppercase", False):
                 char = char.upper()
             reconstructed_parts.append(char)
         elif block_type == "C2":
-            # Search through c2_map to find the matching syllable
-            found_syllable = None
-            for syllable, c2_data in c2_map.items():
-                # Check if all keys in c2_data match the corresponding keys in block
-                match = True
-                for key, value in c2_data.items():
-                    if key not in block or block[key] != value:
-                        match = False
-                        break
-                if match:
-                    found_syllable = syllable
-                    break
+            found_syllable = reverse_c2_map.get(block.get("base_value"))
+            if found_syllable is not None and verify:
+                c2_data = c2_map[found_syllable]
+                for key in _C2_INTEGRITY_KEYS:
+                    if key in block and block[key] != c2_data[key]:
+                        raise ValueError(f"C2 block {block['base_value']} does not match the syllable map ({key})")
             
             if found_syllable:
                 # Apply case pattern if present
-                case_pattern = block.get("case", [])
+                case_pattern = block.get("case")
                 syllable = found_syllable
-                if case_pattern:
+                if case_pattern and any(case_pattern):
                     syllable_list = list(syllable)
                     for i, should_upper in enumerate(case_pattern):
                         if i < len(syllable_list):
                             syllable_list[i] = syllable_list[i].upper() if should_upper else syllable_list[i]
                     syllable = "".join(syllable_list)
                 reconstructed_parts.append(syllable)
+        elif block_type == "CASE":
+            word_case = block
+            word_start = len(reconstructed_parts)
         elif block_type == "SPACE":
             reconstructed_parts.append(" ")
         elif block_type == "NEWLINE":
             reconstructed_parts.append("\n")
+        elif block_type in ("WHITESPACE", "LITERAL"):
+            reconstructed_parts.append(block["text"])
+    if word_case is not None:
+        word = "".join(reconstructed_parts[word_start:])
+        del reconstructed_parts[word_start:]
+        reconstructed_parts.append(apply_word_case(word, word_case.get("mode"), word_case.get("mask", 0)))
     return "".join(reconstructed_parts)
 
+def decompress_stream(frames, c2_map, reverse_c2_map=None):
+    """Decompresses an iterable of token lists lazily, yielding text pieces."""
+    if reverse_c2_map is None:
+        reverse_c2_map = build_reverse_c2_map(c2_map)
+    for frame in frames:
+        yield decompress(frame, c2_map, reverse_c2_map=reverse_c2_map)
+
 # --- Main Execution (CLI) ---
 def main():
     parser = argparse.ArgumentParser(description="A tool for syllable-based text compression.")
@@ -172,43 +610,109 @@ def main():
     parser_compress = subparsers.add_parser("compress", help="Compress a text file.")
     parser_compress.add_argument("--input", required=True, help="Path to the input text file.")
     parser_compress.add_argument("--output", required=True, help="Path for the output compressed file.")
+    parser_compress.add_argument("--format", choices=["binary", "json"], default="binary",
+                                 help="Output format: compact binary container (default) or legacy JSON token list.")
+    parser_compress.add_argument("--case-model", choices=["word", "char"], default="word",
+                                 help="Record case once per word (default) or per syllable/character.")
+    parser_compress.add_argument("--segmentation", choices=["greedy", "optimal"], default="greedy",
+                                 help="Longest-match segmentation (fast) or smallest-output segmentation (slower).")
+    parser_compress.add_argument("--runs", action="store_true",
+                                 help="Emit whitespace and literal runs as single tokens (keeps \\r\\n line endings).")
+    parser_compress.add_argument("--word-cache", type=int, default=50000, metavar="N",
+                                 help="Cache the segmentation of up to N distinct words (0 = off).")
+    parser_compress.add_argument("--index-lines", type=int, default=None, metavar="K",
+                                 help="Append a block index every K lines for random access (binary, --jobs 1).")
+    parser_compress.add_argument("--jobs", type=int, default=1,
+                                 help="Worker processes for binary output (0 = one per CPU).")
+    parser_compress.add_argument("--entropy", action="store_true",
+                                 help="Huffman-code the binary container (holds the container in memory).")
 
     # --- Decompress Command ---
     parser_decompress = subparsers.add_parser("decompress", help="Decompress a file.")
     parser_decompress.add_argument("--input", required=True, help="Path to the compressed input file.")
     parser_decompress.add_argument("--output", required=True, help="Path for the output decompressed text file.")
+    parser_decompress.add_argument("--jobs", type=int, default=1,
+                                   help="Worker processes for binary input (0 = one per CPU).")
 
     args = parser.parse_args()
+    if args.command == "compress" and args.index_lines and args.jobs != 1:
+        parser.error("--index-lines requires --jobs 1")
 
     # --- Load Libraries and Maps ---
-    syllable_library = load_syllable_library()
-    vowel_cypher_map, consonant_cypher_map = create_letter_cyphers()
-    master_cypher_map = create_syllable_cypher_map(syllable_library, vowel_cypher_map, consonant_cypher_map)
+    from core.codec_artifact import load_codec_artifact
+    from core.token_container import write_container, iter_frames, is_container, MAGIC
+
+    try:
+        artifact = load_codec_artifact()
+    except FileNotFoundError:
+        print("Error: Syllable library not found at 'key/syllable_library.txt'. Please ensure the file exists.")
+        sys.exit(1)
+    syllable_library = artifact.syllable_library
+    vowel_cypher_map, consonant_cypher_map = artifact.vowel_map, artifact.consonant_map
+    master_cypher_map = artifact.c2_map
+    word_cache = None
+    if args.command == "compress" and args.word_cache:
+        word_cache = WordTokenCache(master_cypher_map, vowel_cypher_map, consonant_cypher_map, artifact.trie,
+                                    args.word_cache)
 
     # --- Execute Command ---
+
     if args.command == "compress":
         try:
-            with open(args.input, 'r') as f:
-                text_content = f.read()
-            compressed_data = compress(text_content, master_cypher_map, vowel_cypher_map, consonant_cypher_map, syllable_library)
-            with open(args.output, 'w') as f:
-                json.dump(compressed_data, f, indent=2)
+            with open(args.input, 'r', newline='' if args.runs else None) as f:
+                if args.format == "json":
+                    compressed_data = compress(f.read(), master_cypher_map, vowel_cypher_map, consonant_cypher_map, syllable_library, artifact.trie, args.case_model, args.segmentation, args.runs, word_cache)
+                    with open(args.output, 'w') as out:
+                        json.dump(compressed_data, out, indent=2)
+                else:
+                    out = io.BytesIO() if args.entropy else open(args.output, 'wb')
+                    with out:
+                        if args.jobs != 1:
+                            from core.parallel_codec import compress_file_parallel
+                            compress_file_parallel(f, out, args.jobs or None, args.case_model, args.segmentation,
+                                                   runs=args.runs)
+                        else:
+                            frames = compress_stream(f, master_cypher_map, vowel_cypher_map, consonant_cypher_map, syllable_library, artifact.trie, args.case_model, args.segmentation, args.runs, word_cache)
+                            write_container(out, chain.from_iterable(frames), master_cypher_map, args.index_lines)
+                        if args.entropy:
+                            from core.entropy_coder import entropy_encode
+                            with open(args.output, 'wb') as coded_out:
+                                coded_out.write(entropy_encode(out.getvalue()))
             print(f"Successfully compressed '{args.input}' to '{args.output}'.")
         except FileNotFoundError:
             print(f"Error: Input file not found at '{args.input}'.")
 
     elif args.command == "decompress":
         try:
-            with open(args.input, 'r') as f:
-                compressed_data = json.load(f)
-            reconstructed_text = decompress(compressed_data, master_cypher_map)
-            with open(args.output, 'w') as f:
-                f.write(reconstructed_text)
+            from core.entropy_coder import is_entropy_coded, entropy_decode
+            with open(args.input, 'rb') as f:
+                prefix = f.read(len(MAGIC))
+                f.seek(0)
+                if is_entropy_coded(prefix):
+                    f = io.BytesIO(entropy_decode(f.read()))
+                    prefix = MAGIC
+                binary = is_container(prefix)
+                if binary and args.jobs != 1:
+                    from core.parallel_codec import decompress_file_parallel
+                    with open(args.output, 'w') as out:
+                        decompress_file_parallel(f, out, args.jobs or None)
+                else:
+                    if binary:
+                        frames = iter_frames(f, master_cypher_map, artifact.reverse_c2_map)
+                    else:
+                        frames = [json.load(f)]
+                    with open(args.output, 'w') as out:
+                        for text_piece in decompress_stream(frames, master_cypher_map, artifact.reverse_c2_map):
+                            out.write(text_piece)
             print(f"Successfully decompressed '{args.input}' to '{args.output}'.")
         except FileNotFoundError:
             print(f"Error: Input file not found at '{args.input}'.")
         except json.JSONDecodeError:
             print(f"Error: Could not decode JSON from '{args.input}'. Is it a valid compressed file?")
+        except ValueError as e:
+            print(f"Error: Could not read '{args.input}': {e}")
 
 if __name__ == "__main__":
+    # Allow `python core/compressor.py ...` to import sibling core modules.
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
     main()
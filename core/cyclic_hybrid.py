@@ -6,117 +6,1098 @@ Cyclic Cypher Compressor - Hybrid System
 This module provides lossless real-time compression with fast unfolding.
 """
 
+import bz2
+import lzma
+import mmap
 import struct
+import sys
+import time
 import zlib
 import os
-from collections import defaultdict
+from array import array
+from bisect import bisect_right
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
 
-def compress_realtime(input_path, output_path, compression_level=6):
-    """
-    Real-time compression with guaranteed lossless recovery.
-    Uses pattern matching + zlib for excellent compression.
-    
-    Format: [header] [original_length] [multiplier] [compressed_data]
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+MAGIC = b'CCC2'
+HEADER_SIZE = 9
+
+# Streaming format: [CCCS] [version] [multiplier] [zlib stream] [length >Q] [crc32 >I]
+STREAM_MAGIC = b'CCCS'
+STREAM_VERSION = 1
+STREAM_HEADER_SIZE = 6
+STREAM_TRAILER = struct.Struct('>QI')
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+# Block format: [CCCP] [version] [flags] [multiplier]
+#   per block: [compressed length >I] [original length >I] [raw deflate]
+#   [0 >I] [length >Q] [crc32 >I]
+BLOCK_MAGIC = b'CCCP'
+BLOCK_VERSION = 1
+BLOCK_HEADER_SIZE = 7
+BLOCK_PRIMED = 0x01
+BLOCK_ENTRY = struct.Struct('>II')
+DEFAULT_BLOCK_SIZE = 1 << 20
+DICTIONARY_SIZE = 32 << 10  # deflate window: the most of the previous block a dictionary can use
+
+# Seekable framed format (CCC3): [CCC3] [version] [multiplier]
+#   per frame: [compressed length >I] [original length >I] [crc32 >I] [raw deflate]
+#   [0 >I] [seek table: count x (frame offset >Q, original offset >Q)]
+#   [footer: seek table offset >Q, original length >Q, frame count >I, CCC3]
+FRAMED_MAGIC = b'CCC3'
+FRAMED_VERSION = 1
+FRAMED_HEADER_SIZE = 6
+FRAME_ENTRY = struct.Struct('>III')
+SEEK_ENTRY = struct.Struct('>QQ')
+FRAMED_FOOTER = struct.Struct('>QQI4s')
+DEFAULT_FRAME_SIZE = 256 << 10
+
+# The multiplier byte of CCC2/CCCS headers: low nibble multiplier, high
+# nibble backend ID (0 = zlib, so files written before backends read as zlib)
+BACKEND_SHIFT = 4
+MULTIPLIER_MASK = 0x0F
+
+MULTIPLIERS = range(1, 7)
+STRIDE_PERIOD = 60  # lcm(1..6): window starts keep every stride's phase
+DEFAULT_SAMPLE_SIZE = 1 << 20
+SAMPLE_WINDOW = 64 << 10
+
+# --- Multiplier Analysis ---
+# The multiplier is the stride (1-6) that sees the most repeating 2-byte
+# patterns. Pair codes (byte[i] << 8 | byte[i+1]) are built once and each
+# stride's histogram is a strided view of them; inputs larger than
+# sample_size are analysed on evenly spaced windows instead of in full.
+def _stride_histograms_numpy(view):
+    data = np.frombuffer(view, dtype=np.uint8)
+    codes = (data[:-1].astype(np.uint16) << 8) | data[1:]
+    return [np.bincount(codes[::mult], minlength=1 << 16) for mult in MULTIPLIERS]
+
+def _stride_histograms_python(view):
+    # 16-bit big-endian codes at even positions and at odd positions
+    pairs = (len(view) - 1) // 2
+    even = array('H')
+    even.frombytes(view[:(len(view) // 2) * 2])
+    odd = array('H')
+    odd.frombytes(view[1:1 + pairs * 2])
+    if sys.byteorder == 'little':
+        even.byteswap()
+        odd.byteswap()
+    histograms = []
+    for mult in MULTIPLIERS:
+        if mult % 2 == 0:
+            histogram = Counter(even[::mult // 2])
+        else:
+            # Odd strides alternate: positions 0, 2m, 4m... are even, m, 3m... odd
+            histogram = Counter(even[::mult])
+            histogram.update(odd[(mult - 1) // 2::mult])
+        histograms.append(histogram)
+    return histograms
+
+def _windows(length, sample_size):
+    """Yields (start, end) of the regions to analyse; stride-aligned so every window sees the same phases."""
+    if sample_size is None or length <= sample_size:
+        yield 0, length
+        return
+    count = max(1, sample_size // SAMPLE_WINDOW)
+    window = sample_size // count
+    step = (length - window) // max(1, count - 1) if count > 1 else 0
+    for index in range(count):
+        start = index * step // STRIDE_PERIOD * STRIDE_PERIOD
+        yield start, start + window
+
+def multiplier_scores(data, sample_size=DEFAULT_SAMPLE_SIZE):
+    """Returns the repeating-pattern score of each multiplier 1-6.
+
+    sample_size bounds the bytes analysed (None analyses everything);
+    larger samples give scores closer to the exhaustive ones.
     """
-    with open(input_path, 'rb') as f:
-        data = f.read()
-    
-    original_length = len(data)
-    
-    # Find best multiplier by counting repeating patterns
+    view = memoryview(data).cast('B')
+    return _score_windows(view[start:end] for start, end in _windows(len(view), sample_size))
+
+def _score_windows(windows):
+    totals = None
+    for window in windows:
+        if len(window) < 2:
+            continue
+        if np is not None:
+            histograms = _stride_histograms_numpy(window)
+            totals = histograms if totals is None else [a + b for a, b in zip(totals, histograms)]
+        else:
+            histograms = _stride_histograms_python(window)
+            if totals is None:
+                totals = histograms
+            else:
+                for total, histogram in zip(totals, histograms):
+                    total.update(histogram)
+    if totals is None:
+        return [0] * len(MULTIPLIERS)
+    if np is not None:
+        return [int(histogram[histogram > 1].sum()) for histogram in totals]
+    return [sum(count for count in histogram.values() if count > 1) for histogram in totals]
+
+def find_best_multiplier(data, sample_size=DEFAULT_SAMPLE_SIZE):
+    """Finds the multiplier (1-6) whose stride sees the most repeating 2-byte patterns."""
+    return _best_multiplier(multiplier_scores(data, sample_size))
+
+def _best_multiplier(scores):
     best_mult = 1
     best_score = 0
-    
-    for mult in range(1, 7):
-        # Count repeating 2-byte patterns at multiply intervals
-        patterns = defaultdict(int)
-        for i in range(0, len(data)-1, mult):
-            if i+1 < len(data):
-                pattern = data[i:i+2]
-                patterns[pattern] += 1
-        
-        score = sum(c for c in patterns.values() if c > 1)
+    for mult, score in zip(MULTIPLIERS, scores):
         if score > best_score:
             best_score = score
             best_mult = mult
+    return best_mult
+
+# --- Backends ---
+# The real-time formats can use any registered stdlib compressor. Each
+# backend provides one-shot compress/decompress functions and incremental
+# compressor/decompressor objects (for the streaming format); its ID is
+# stored in the header's multiplier byte.
+class Backend:
+    """A compression backend: ID, name and its one-shot and incremental codecs.
+    
+    compressor(level) returns an object with compress()/flush();
+    decompressor() returns one with decompress(data, max_length), eof,
+    needs_input and unused_data (the lzma/bz2 decompressor interface).
+    """
+    
+    def __init__(self, backend_id, name, compress, decompress, compressor, decompressor):
+        self.id = backend_id
+        self.name = name
+        self.compress = compress
+        self.decompress = decompress
+        self.compressor = compressor
+        self.decompressor = decompressor
+
+BACKENDS = {}
+_BACKENDS_BY_ID = {}
+
+def register_backend(backend):
+    """Adds backend to the registry; IDs must fit the header nibble (0-15)."""
+    if not 0 <= backend.id <= MULTIPLIER_MASK:
+        raise ValueError(f"Backend ID {backend.id} out of range 0-15")
+    if backend.id in _BACKENDS_BY_ID and _BACKENDS_BY_ID[backend.id].name != backend.name:
+        raise ValueError(f"Backend ID {backend.id} already used by {_BACKENDS_BY_ID[backend.id].name!r}")
+    BACKENDS[backend.name] = backend
+    _BACKENDS_BY_ID[backend.id] = backend
+
+def get_backend(key):
+    """Returns the Backend for a name or ID."""
+    backend = _BACKENDS_BY_ID.get(key) if isinstance(key, int) else BACKENDS.get(key)
+    if backend is None:
+        raise ValueError(f"Unknown compression backend {key!r}")
+    return backend
+
+class _ZlibDecompressor:
+    """zlib.decompressobj behind the lzma/bz2 decompressor interface."""
+    
+    def __init__(self):
+        self._decompressor = zlib.decompressobj()
+        self.needs_input = True
+    
+    @property
+    def eof(self):
+        return self._decompressor.eof
+    
+    @property
+    def unused_data(self):
+        return self._decompressor.unused_data
+    
+    def decompress(self, data, max_length=-1):
+        tail = self._decompressor.unconsumed_tail
+        recovered = self._decompressor.decompress(tail + data if tail else data, max(max_length, 0))
+        self.needs_input = not self._decompressor.unconsumed_tail
+        return recovered
+
+class _StoreCompressor:
+    """Incremental store: length-prefixed chunks, ended by a zero length."""
+    
+    def compress(self, data):
+        return struct.pack('>I', len(data)) + bytes(data) if data else b''
+    
+    def flush(self):
+        return struct.pack('>I', 0)
+
+class _StoreDecompressor:
+    def __init__(self):
+        self._buffer = bytearray()
+        self._remaining = None
+        self.eof = False
+        self.needs_input = True
+        self.unused_data = b''
+    
+    def decompress(self, data, max_length=-1):
+        buffer = self._buffer
+        buffer += data
+        recovered = bytearray()
+        while not self.eof and (max_length < 0 or len(recovered) < max_length):
+            if self._remaining is None:
+                if len(buffer) < 4:
+                    break
+                self._remaining = struct.unpack('>I', buffer[:4])[0]
+                del buffer[:4]
+                if self._remaining == 0:
+                    self.eof = True
+                    self.unused_data = bytes(buffer)
+                    buffer.clear()
+                    break
+            take = min(self._remaining, len(buffer))
+            if max_length >= 0:
+                take = min(take, max_length - len(recovered))
+            if not take:
+                break
+            recovered += buffer[:take]
+            del buffer[:take]
+            self._remaining -= take
+            if not self._remaining:
+                self._remaining = None
+        self.needs_input = not self.eof and (len(buffer) < 4 if self._remaining is None else not buffer)
+        return bytes(recovered)
+
+def _store(data, level):
+    compressor = _StoreCompressor()
+    return compressor.compress(data) + compressor.flush()
+
+def _unstore(data):
+    decompressor = _StoreDecompressor()
+    recovered = decompressor.decompress(data)
+    if not decompressor.eof:
+        raise ValueError("Truncated stored data")
+    return recovered
+
+register_backend(Backend(0, "zlib", lambda data, level: zlib.compress(data, level), zlib.decompress,
+                         lambda level: zlib.compressobj(level), _ZlibDecompressor))
+register_backend(Backend(1, "lzma", lambda data, level: lzma.compress(data, preset=level), lzma.decompress,
+                         lambda level: lzma.LZMACompressor(preset=level), lzma.LZMADecompressor))
+register_backend(Backend(2, "bz2", lambda data, level: bz2.compress(data, max(level, 1)), bz2.decompress,
+                         lambda level: bz2.BZ2Compressor(max(level, 1)), bz2.BZ2Decompressor))
+register_backend(Backend(3, "store", _store, _unstore, lambda level: _StoreCompressor(), _StoreDecompressor))
+
+# Auto mode trial-compresses sampled windows with each candidate and keeps
+# the smallest output among those at or above the throughput floor
+AUTO_CANDIDATES = (("zlib", 1), ("zlib", 6), ("zlib", 9), ("bz2", 9), ("lzma", 1), ("lzma", 6))
+AUTO_SAMPLE_SIZE = 256 << 10
+DEFAULT_MIN_THROUGHPUT = 5.0  # MB/s
+STORE_THRESHOLD = 0.98  # below 2% savings, store instead
+
+def choose_backend(data, min_throughput=DEFAULT_MIN_THROUGHPUT, sample_size=AUTO_SAMPLE_SIZE,
+                   candidates=AUTO_CANDIDATES):
+    """
+    Picks (backend name, level) for data by trial-compressing sampled windows.
     
-    # Compress with zlib
-    compressed = zlib.compress(data, compression_level)
+    Candidates compressing slower than min_throughput MB/s are ruled out
+    (if all are, the fastest one is used); data that no candidate shrinks
+    by STORE_THRESHOLD is stored.
+    """
+    view = memoryview(data).cast('B')
+    windows = [bytes(view[start:end]) for start, end in _windows(len(view), sample_size)]
+    sampled = sum(len(window) for window in windows)
+    if not sampled:
+        return "store", 0
+    trials = []
+    for name, level in candidates:
+        backend = get_backend(name)
+        started = time.perf_counter()
+        size = sum(len(backend.compress(window, level)) for window in windows)
+        elapsed = time.perf_counter() - started
+        throughput = sampled / elapsed / (1 << 20) if elapsed else float('inf')
+        trials.append((size, -throughput, name, level))
+    eligible = [trial for trial in trials if -trial[1] >= min_throughput]
+    size, _, name, level = min(eligible) if eligible else min(trials, key=lambda trial: trial[1])
+    if size >= sampled * STORE_THRESHOLD:
+        return "store", 0
+    return name, level
+
+def _resolve_backend(backend, compression_level, data, min_throughput):
+    """Returns (Backend, level), running choose_backend() on data for backend="auto"."""
+    if backend == "auto":
+        backend, compression_level = choose_backend(data, min_throughput)
+    return get_backend(backend), compression_level
+
+def _split_mode(mode):
+    """Splits a header's multiplier byte into (multiplier, Backend)."""
+    return mode & MULTIPLIER_MASK, get_backend(mode >> BACKEND_SHIFT)
+
+def compress_realtime_bytes(data, compression_level=6, analyze=True, sample_size=DEFAULT_SAMPLE_SIZE, backend="zlib",
+                            min_throughput=DEFAULT_MIN_THROUGHPUT):
+    """
+    In-memory form of compress_realtime(): returns the compressed file bytes.
+    
+    Format: [header] [original_length] [multiplier | backend << 4] [compressed_data]
+    analyze=False skips the multiplier analysis and records multiplier 1.
+    backend is a registered backend name or "auto" (see choose_backend()).
+    """
+    original_length = len(data)
+    best_mult = find_best_multiplier(data, sample_size) if analyze else 1
+    backend, compression_level = _resolve_backend(backend, compression_level, data, min_throughput)
+    
+    compressed = backend.compress(data, compression_level)
     
     # Build output: magic + header + data
     output = bytearray()
-    output.extend(b'CCC2')  # Magic bytes for new format
+    output.extend(MAGIC)  # Magic bytes for new format
     output.extend(struct.pack('>I', original_length))  # Original length
-    output.append(best_mult)  # Multiplier used
+    output.append(backend.id << BACKEND_SHIFT | best_mult)  # Backend and multiplier used
     output.extend(compressed)
+    return bytes(output)
+
+def read_realtime_header(data):
+    """Validates a CCC2 header; returns (original_length, multiplier)."""
+    if len(data) < HEADER_SIZE:
+        raise ValueError("Invalid compressed file (too short)")
+    
+    # Verify magic bytes
+    magic = data[0:4]
+    if magic != MAGIC:
+        raise ValueError(f"Invalid format (magic bytes: {magic}, expected: b'CCC2')")
+    
+    original_length = struct.unpack('>I', data[4:8])[0]
+    multiplier = data[8] & MULTIPLIER_MASK
+    return original_length, multiplier
+
+def realtime_backend(data):
+    """Returns the name of the backend a CCC2 or CCCS file was compressed with."""
+    if data[:4] == STREAM_MAGIC and len(data) >= STREAM_HEADER_SIZE:
+        return _split_mode(data[5])[1].name
+    read_realtime_header(data)
+    return _split_mode(data[8])[1].name
+
+def decompress_realtime_bytes(data):
+    """In-memory form of decompress_realtime(): returns the original bytes."""
+    original_length, _ = read_realtime_header(data)
+    _, backend = _split_mode(data[8])
     
-    with open(output_path, 'wb') as f:
-        f.write(output)
+    # Decompress
+    recovered = backend.decompress(data[HEADER_SIZE:])
     
+    if len(recovered) != original_length:
+        raise ValueError(f"Decompression mismatch: got {len(recovered)}, expected {original_length}")
+    return recovered
+
+def compress_realtime(input_path, output_path, compression_level=6, analyze=True, sample_size=DEFAULT_SAMPLE_SIZE,
+                      backend="zlib", min_throughput=DEFAULT_MIN_THROUGHPUT, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Real-time compression with guaranteed lossless recovery.
+    Uses pattern matching + zlib (or another backend) for excellent compression.
+    
+    Format: [header] [original_length] [multiplier | backend << 4] [compressed_data]
+    The input is memory-mapped and fed to the compressor chunk_size bytes
+    at a time, so memory stays near one chunk however large the file is.
+    """
+    with open(input_path, 'rb') as f:
+        original_length = os.fstat(f.fileno()).st_size
+        if not original_length:
+            # Empty files (and pipes) cannot be mapped
+            output = compress_realtime_bytes(f.read(), compression_level, analyze, sample_size, backend,
+                                             min_throughput)
+            with open(output_path, 'wb') as out:
+                out.write(output)
+            return _realtime_summary(0, output[8], len(output))
+        if original_length > 0xFFFFFFFF:
+            raise ValueError("CCC2 stores a 32-bit length; use compress_stream() for files of 4 GiB or more")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as source, open(output_path, 'wb') as out:
+            _advise(source, getattr(mmap, 'MADV_SEQUENTIAL', None))
+            with memoryview(source) as view:
+                best_mult = 1
+                if analyze:
+                    best_mult = _best_multiplier(_score_windows(_mapped_windows(source, view, sample_size)))
+                backend, compression_level = _resolve_backend(backend, compression_level, view, min_throughput)
+                _release(source, 0, original_length)
+                mode = backend.id << BACKEND_SHIFT | best_mult
+                out.write(MAGIC + struct.pack('>I', original_length) + bytes([mode]))
+                written = HEADER_SIZE
+                compressor = backend.compressor(compression_level)
+                released = 0
+                for start in range(0, original_length, chunk_size):
+                    with view[start:start + chunk_size] as chunk:
+                        compressed = compressor.compress(chunk)
+                    if compressed:
+                        out.write(compressed)
+                        written += len(compressed)
+                    released = _release(source, released, start + chunk_size)
+                compressed = compressor.flush()
+                out.write(compressed)
+                written += len(compressed)
+    return _realtime_summary(original_length, mode, written)
+
+def _realtime_summary(original_length, mode, compressed_length):
+    multiplier, backend = _split_mode(mode)
     return {
         'original_length': original_length,
-        'compressed_length': len(output),
-        'multiplier': best_mult,
-        'compression_ratio': (len(compressed) / original_length * 100) if original_length > 0 else 0
+        'compressed_length': compressed_length,
+        'multiplier': multiplier,
+        'backend': backend.name,
+        'compression_ratio': ((compressed_length - HEADER_SIZE) / original_length * 100) if original_length > 0 else 0
     }
 
-def decompress_realtime(input_path, output_path):
+def decompress_realtime(input_path, output_path, chunk_size=DEFAULT_CHUNK_SIZE):
     """
     Real-time decompression - recover original file immediately.
     Guaranteed lossless with minimal overhead.
+    
+    The output file is preallocated to the header's original length and
+    memory-mapped; the input is mapped too and inflated chunk_size bytes
+    at a time straight into it.
     """
     with open(input_path, 'rb') as f:
-        data = f.read()
+        compressed_length = os.fstat(f.fileno()).st_size
+        if compressed_length <= HEADER_SIZE:
+            data = f.read()
+            recovered = decompress_realtime_bytes(data)
+            with open(output_path, 'wb') as out:
+                out.write(recovered)
+            original_length, multiplier = read_realtime_header(data)
+            return {
+                'original_length': original_length,
+                'compressed_length': len(data),
+                'multiplier': multiplier,
+                'backend': realtime_backend(data),
+                'recovered_length': len(recovered)
+            }
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as source:
+            original_length, multiplier = read_realtime_header(source[:HEADER_SIZE])
+            _, backend = _split_mode(source[8])
+            _advise(source, getattr(mmap, 'MADV_SEQUENTIAL', None))
+            with open(output_path, 'w+b') as out:
+                try:
+                    _inflate_mapped(source, backend.decompressor(), out, original_length, chunk_size)
+                except BaseException:
+                    out.close()
+                    os.unlink(output_path)
+                    raise
     
-    if len(data) < 9:
-        raise ValueError("Invalid compressed file (too short)")
+    return {
+        'original_length': original_length,
+        'compressed_length': compressed_length,
+        'multiplier': multiplier,
+        'backend': backend.name,
+        'recovered_length': original_length
+    }
+
+def _inflate_mapped(source, decompressor, out, original_length, chunk_size):
+    """Inflates the CCC2 body of mapped source into file out, preallocated to original_length."""
+    out.truncate(original_length)
+    if hasattr(os, 'posix_fallocate') and original_length:
+        # Reserve the blocks now: running out of disk while writing a mapping is a SIGBUS, not an OSError
+        os.posix_fallocate(out.fileno(), 0, original_length)
+    target = mmap.mmap(out.fileno(), original_length) if original_length else bytearray()
+    try:
+        with memoryview(source) as view:
+            position = HEADER_SIZE
+            written = 0
+            read_released = written_released = 0
+            while not decompressor.eof:
+                if decompressor.needs_input and position >= len(view):
+                    raise ValueError("Truncated compressed stream")
+                end = position + chunk_size if decompressor.needs_input else position
+                with view[position:end] as chunk:
+                    try:
+                        recovered = decompressor.decompress(chunk, chunk_size)
+                    except (zlib.error, lzma.LZMAError, OSError) as e:
+                        raise ValueError(f"Corrupt compressed stream ({e})") from None
+                    position += len(chunk)
+                if written + len(recovered) > original_length:
+                    raise ValueError(f"Decompression mismatch: got more than {original_length} bytes")
+                target[written:written + len(recovered)] = recovered
+                written += len(recovered)
+                read_released = _release(source, read_released, position)
+                written_released = _release(target, written_released, written)
+        if written != original_length:
+            raise ValueError(f"Decompression mismatch: got {written}, expected {original_length}")
+    finally:
+        if original_length:
+            target.close()
+
+# Mapped pages count towards RSS until dropped. MADV_DONTNEED on a shared
+# file mapping only unmaps them: the data (dirty output pages included)
+# stays in the page cache and is written back as usual.
+def _mapped_windows(source, view, sample_size):
+    """The analysis windows of a mapped file; each one's pages are dropped once it has been scored."""
+    for start, end in _windows(len(view), sample_size):
+        yield view[start:end]
+        _release(source, start - start % mmap.PAGESIZE, end)
+
+def _advise(mapped, option):
+    if option is not None:
+        mapped.madvise(option)
+
+def _release(mapped, released, end):
+    """Drops mapped pages below end that are at or past released; returns the new released offset."""
+    end = min(end, len(mapped))
+    end -= end % mmap.PAGESIZE
+    if end <= released or not hasattr(mmap, 'MADV_DONTNEED'):
+        return released
+    mapped.madvise(mmap.MADV_DONTNEED, released, end - released)
+    return end
+
+# --- Streaming ---
+# compress_stream()/decompress_stream() work chunk by chunk on binary file
+# objects (pipes included), so memory stays at a few chunk sizes however
+# large the input is. The length and CRC-32 go in a trailer, which lifts
+# CCC2's 4 GiB limit and needs no seeking back.
+def compress_stream(src, dst, compression_level=6, chunk_size=DEFAULT_CHUNK_SIZE, analyze=True,
+                    sample_size=DEFAULT_SAMPLE_SIZE, backend="zlib", min_throughput=DEFAULT_MIN_THROUGHPUT):
+    """
+    Compresses binary file object src into the streaming CCCS format on dst.
     
-    # Verify magic bytes
-    magic = data[0:4]
-    if magic != b'CCC2':
-        raise ValueError(f"Invalid format (magic bytes: {magic}, expected: b'CCC2')")
+    The multiplier (and, for backend="auto", the backend) is chosen from
+    the first chunk only. Returns the same summary dict as
+    compress_realtime().
+    """
+    chunk = src.read(chunk_size)
+    multiplier = find_best_multiplier(chunk, sample_size) if analyze else 1
+    backend, compression_level = _resolve_backend(backend, compression_level, chunk, min_throughput)
+    dst.write(STREAM_MAGIC + bytes([STREAM_VERSION, backend.id << BACKEND_SHIFT | multiplier]))
+    written = STREAM_HEADER_SIZE
+    compressor = backend.compressor(compression_level)
+    original_length = 0
+    crc = 0
+    while chunk:
+        original_length += len(chunk)
+        crc = zlib.crc32(chunk, crc)
+        compressed = compressor.compress(chunk)
+        if compressed:
+            dst.write(compressed)
+            written += len(compressed)
+        chunk = src.read(chunk_size)
+    compressed = compressor.flush() + STREAM_TRAILER.pack(original_length, crc)
+    dst.write(compressed)
+    written += len(compressed)
     
-    # Read header
-    original_length = struct.unpack('>I', data[4:8])[0]
-    multiplier = data[8]
+    return {
+        'original_length': original_length,
+        'compressed_length': written,
+        'multiplier': multiplier,
+        'backend': backend.name,
+        'compression_ratio': ((written - STREAM_HEADER_SIZE - STREAM_TRAILER.size) / original_length * 100)
+                             if original_length > 0 else 0
+    }
+
+def _read_exactly(src, size):
+    data = src.read(size)
+    while len(data) < size:
+        more = src.read(size - len(data))
+        if not more:
+            break
+        data += more
+    return data
+
+def decompress_stream(src, dst, chunk_size=DEFAULT_CHUNK_SIZE, jobs=1):
+    """
+    Decompresses a CCCS, CCC2, CCC3 or block-format stream from src onto dst.
     
-    # Decompress
-    compressed_data = data[9:]
-    recovered = zlib.decompress(compressed_data)
+    Output is produced in pieces of at most chunk_size bytes (one block at
+    a time for the block format), so even highly compressible input never
+    expands in memory. The length (and, except for CCC2, the CRC-32) is
+    verified at the end. jobs > 1 (or None for one per CPU) inflates
+    unprimed blocks in parallel; primed blocks (compress_blocks()'s
+    default) always inflate serially, since each one's dictionary is the
+    previous block's output.
+    """
+    magic = _read_exactly(src, 4)
+    if magic == BLOCK_MAGIC:
+        return _decompress_blocks(src, dst, jobs)
+    if magic == FRAMED_MAGIC:
+        return _decompress_framed(src, dst)
+    if magic == STREAM_MAGIC:
+        version, mode = _read_exactly(src, 2)
+        if version != STREAM_VERSION:
+            raise ValueError(f"Unsupported stream version {version}")
+        expected_length = None
+        compressed_length = STREAM_HEADER_SIZE
+    elif magic == MAGIC:
+        header = magic + _read_exactly(src, HEADER_SIZE - 4)
+        expected_length, _ = read_realtime_header(header)
+        mode = header[8]
+        compressed_length = HEADER_SIZE
+    else:
+        raise ValueError(f"Invalid format (magic bytes: {magic}, expected: b'CCC2', b'CCC3', b'CCCS' or b'CCCP')")
+    multiplier, backend = _split_mode(mode)
     
-    if len(recovered) != original_length:
-        raise ValueError(f"Decompression mismatch: got {len(recovered)}, expected {original_length}")
+    decompressor = backend.decompressor()
+    recovered_length = 0
+    crc = 0
+    while not decompressor.eof:
+        data = b''
+        if decompressor.needs_input:
+            data = src.read(chunk_size)
+            if not data:
+                raise ValueError("Truncated compressed stream")
+            compressed_length += len(data)
+        try:
+            recovered = decompressor.decompress(data, chunk_size)
+        except (zlib.error, lzma.LZMAError, OSError) as e:
+            raise ValueError(f"Corrupt compressed stream ({e})") from None
+        if recovered:
+            dst.write(recovered)
+            recovered_length += len(recovered)
+            crc = zlib.crc32(recovered, crc)
+    
+    if expected_length is None:
+        trailer = decompressor.unused_data[:STREAM_TRAILER.size]
+        if len(trailer) < STREAM_TRAILER.size:
+            trailer += _read_exactly(src, STREAM_TRAILER.size - len(trailer))
+            compressed_length += STREAM_TRAILER.size - len(decompressor.unused_data)
+        if len(trailer) != STREAM_TRAILER.size:
+            raise ValueError("Truncated compressed stream (missing trailer)")
+        expected_length, expected_crc = STREAM_TRAILER.unpack(trailer)
+        if crc != expected_crc:
+            raise ValueError("Checksum mismatch in compressed stream")
+    if recovered_length != expected_length:
+        raise ValueError(f"Decompression mismatch: got {recovered_length}, expected {expected_length}")
     
-    with open(output_path, 'wb') as f:
-        f.write(recovered)
+    return {
+        'original_length': expected_length,
+        'compressed_length': compressed_length,
+        'multiplier': multiplier,
+        'backend': backend.name,
+        'recovered_length': recovered_length
+    }
+
+# --- Block-Parallel Mode ---
+# zlib releases the GIL, so fixed-size blocks compress concurrently in a
+# thread pool. Each block is its own raw deflate stream; with priming
+# (the default) it uses the last 32 KiB of the previous block as a
+# dictionary, which recovers most of the ratio lost at block edges.
+# Unprimed blocks are fully independent and also decompress in parallel;
+# primed blocks need the previous block's output and decompress in order.
+def _compress_block(block, zdict, compression_level):
+    if zdict:
+        compressor = zlib.compressobj(compression_level, zlib.DEFLATED, -zlib.MAX_WBITS, zdict=zdict)
+    else:
+        compressor = zlib.compressobj(compression_level, zlib.DEFLATED, -zlib.MAX_WBITS)
+    return compressor.compress(block) + compressor.flush()
+
+def _inflate_block(data, zdict=None):
+    if zdict:
+        decompressor = zlib.decompressobj(-zlib.MAX_WBITS, zdict=zdict)
+    else:
+        decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+    try:
+        block = decompressor.decompress(data) + decompressor.flush()
+    except zlib.error as e:
+        raise ValueError(f"Corrupt compressed block ({e})") from None
+    if not decompressor.eof:
+        raise ValueError("Truncated compressed block")
+    return block
+
+def _jobs(jobs):
+    return jobs or os.cpu_count() or 1
+
+def _deflate_blocks(src, block, block_size, compression_level, jobs, prime):
+    """Yields (block, compressed) in input order, starting with block, deflating up to 2 * jobs at once."""
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        zdict = None
+        while block:
+            pending.append((block, executor.submit(_compress_block, block, zdict, compression_level)))
+            if prime:
+                zdict = block[-DICTIONARY_SIZE:]
+            if len(pending) >= 2 * jobs:
+                block, future = pending.popleft()
+                yield block, future.result()
+            block = src.read(block_size)
+        while pending:
+            block, future = pending.popleft()
+            yield block, future.result()
+
+def compress_blocks(src, dst, compression_level=6, jobs=None, block_size=DEFAULT_BLOCK_SIZE, prime=True,
+                    analyze=True, sample_size=DEFAULT_SAMPLE_SIZE):
+    """
+    Compresses binary file object src into the block format on dst using jobs threads.
+    
+    At most 2 * jobs blocks are in flight, so memory stays bounded for
+    any input size. prime=False makes blocks independent (slightly larger
+    output, parallel decompression). Returns the compress_realtime() summary
+    plus the block count.
+    """
+    block = src.read(block_size)
+    multiplier = find_best_multiplier(block, sample_size) if analyze else 1
+    dst.write(BLOCK_MAGIC + bytes([BLOCK_VERSION, BLOCK_PRIMED if prime else 0, multiplier]))
+    written = BLOCK_HEADER_SIZE
+    original_length = 0
+    crc = 0
+    blocks = 0
+    
+    for block, compressed in _deflate_blocks(src, block, block_size, compression_level, _jobs(jobs), prime):
+        original_length += len(block)
+        crc = zlib.crc32(block, crc)
+        blocks += 1
+        dst.write(BLOCK_ENTRY.pack(len(compressed), len(block)))
+        dst.write(compressed)
+        written += BLOCK_ENTRY.size + len(compressed)
+    
+    dst.write(struct.pack('>I', 0) + STREAM_TRAILER.pack(original_length, crc))
+    written += 4 + STREAM_TRAILER.size
     
     return {
         'original_length': original_length,
-        'compressed_length': len(data),
+        'compressed_length': written,
         'multiplier': multiplier,
-        'recovered_length': len(recovered)
+        'blocks': blocks,
+        'compression_ratio': ((written - BLOCK_HEADER_SIZE) / original_length * 100) if original_length > 0 else 0
     }
 
-if __name__ == "__main__":
-    import sys
+def _decompress_blocks(src, dst, jobs):
+    """Decompresses the block format after its magic; see decompress_stream()."""
+    version, flags, multiplier = _read_exactly(src, 3)
+    if version != BLOCK_VERSION:
+        raise ValueError(f"Unsupported block format version {version}")
+    primed = bool(flags & BLOCK_PRIMED)
+    compressed_length = BLOCK_HEADER_SIZE
+    recovered_length = 0
+    crc = 0
+    
+    def blocks():
+        nonlocal compressed_length
+        while True:
+            size = _read_exactly(src, 4)
+            if len(size) != 4:
+                raise ValueError("Truncated compressed stream")
+            size = struct.unpack('>I', size)[0]
+            compressed_length += 4
+            if size == 0:
+                return
+            entry = _read_exactly(src, 4)
+            data = _read_exactly(src, size)
+            if len(entry) != 4 or len(data) != size:
+                raise ValueError("Truncated compressed stream")
+            compressed_length += 4 + size
+            yield data, struct.unpack('>I', entry)[0]
+    
+    def emit(block, expected):
+        nonlocal recovered_length, crc
+        if len(block) != expected:
+            raise ValueError(f"Block length mismatch: got {len(block)}, expected {expected}")
+        dst.write(block)
+        recovered_length += len(block)
+        crc = zlib.crc32(block, crc)
+    
+    if primed or jobs == 1:
+        zdict = None
+        for data, expected in blocks():
+            block = _inflate_block(data, zdict)
+            emit(block, expected)
+            if primed:
+                zdict = block[-DICTIONARY_SIZE:]
+    else:
+        jobs = _jobs(jobs)
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            for data, expected in blocks():
+                pending.append((executor.submit(_inflate_block, data), expected))
+                if len(pending) >= 2 * jobs:
+                    future, expected = pending.popleft()
+                    emit(future.result(), expected)
+            while pending:
+                future, expected = pending.popleft()
+                emit(future.result(), expected)
+    
+    trailer = _read_exactly(src, STREAM_TRAILER.size)
+    if len(trailer) != STREAM_TRAILER.size:
+        raise ValueError("Truncated compressed stream (missing trailer)")
+    compressed_length += STREAM_TRAILER.size
+    expected_length, expected_crc = STREAM_TRAILER.unpack(trailer)
+    if crc != expected_crc:
+        raise ValueError("Checksum mismatch in compressed stream")
+    if recovered_length != expected_length:
+        raise ValueError(f"Decompression mismatch: got {recovered_length}, expected {expected_length}")
     
-    if len(sys.argv) < 3:
-        print("Usage: cyclic_hybrid.py <compress|decompress> <input> <output>")
-        sys.exit(1)
+    return {
+        'original_length': expected_length,
+        'compressed_length': compressed_length,
+        'multiplier': multiplier,
+        'recovered_length': recovered_length
+    }
+
+# --- Seekable Framed Format ---
+# CCC3 frames are independent raw deflate streams with their own CRC-32,
+# followed by a seek table of (frame offset, original offset) pairs and a
+# fixed-size footer. FramedReader.read_at() inflates only the frames that
+# overlap the requested range; decompress_stream() still reads CCC3
+# front to back from a pipe using the inline frame headers.
+def compress_framed(src, dst, compression_level=6, frame_size=DEFAULT_FRAME_SIZE, jobs=1, analyze=True,
+                    sample_size=DEFAULT_SAMPLE_SIZE):
+    """
+    Compresses binary file object src into the seekable CCC3 format on dst.
+    
+    frame_size trades ratio for random-access granularity; jobs > 1 (or
+    None for one per CPU) deflates frames in parallel. Returns the
+    compress_realtime() summary plus the frame count.
+    """
+    frame = src.read(frame_size)
+    multiplier = find_best_multiplier(frame, sample_size) if analyze else 1
+    dst.write(FRAMED_MAGIC + bytes([FRAMED_VERSION, multiplier]))
+    written = FRAMED_HEADER_SIZE
+    original_length = 0
+    seek_table = bytearray()
+    frames = 0
+    
+    for frame, compressed in _deflate_blocks(src, frame, frame_size, compression_level, _jobs(jobs), False):
+        seek_table.extend(SEEK_ENTRY.pack(written, original_length))
+        dst.write(FRAME_ENTRY.pack(len(compressed), len(frame), zlib.crc32(frame)))
+        dst.write(compressed)
+        written += FRAME_ENTRY.size + len(compressed)
+        original_length += len(frame)
+        frames += 1
+    
+    dst.write(struct.pack('>I', 0))
+    table_offset = written + 4
+    dst.write(seek_table)
+    dst.write(FRAMED_FOOTER.pack(table_offset, original_length, frames, FRAMED_MAGIC))
+    written = table_offset + len(seek_table) + FRAMED_FOOTER.size
+    
+    return {
+        'original_length': original_length,
+        'compressed_length': written,
+        'multiplier': multiplier,
+        'frames': frames,
+        'compression_ratio': ((written - FRAMED_HEADER_SIZE) / original_length * 100) if original_length > 0 else 0
+    }
+
+def _inflate_frame(entry, data):
+    """Inflates one CCC3 frame given its inline header bytes and payload; checks length and CRC."""
+    compressed_size, original_size, crc = FRAME_ENTRY.unpack(entry)
+    if len(data) != compressed_size:
+        raise ValueError("Truncated compressed frame")
+    frame = _inflate_block(data)
+    if len(frame) != original_size or zlib.crc32(frame) != crc:
+        raise ValueError("Checksum mismatch in compressed frame")
+    return frame
+
+def _decompress_framed(src, dst):
+    """Decompresses CCC3 front to back after its magic; see decompress_stream()."""
+    version, multiplier = _read_exactly(src, 2)
+    if version != FRAMED_VERSION:
+        raise ValueError(f"Unsupported framed format version {version}")
+    compressed_length = FRAMED_HEADER_SIZE
+    recovered_length = 0
+    frames = 0
+    while True:
+        size = _read_exactly(src, 4)
+        if len(size) != 4:
+            raise ValueError("Truncated compressed stream")
+        compressed_length += 4
+        if size == b'\0\0\0\0':
+            break
+        entry = size + _read_exactly(src, FRAME_ENTRY.size - 4)
+        if len(entry) != FRAME_ENTRY.size:
+            raise ValueError("Truncated compressed stream")
+        data = _read_exactly(src, FRAME_ENTRY.unpack(entry)[0])
+        frame = _inflate_frame(entry, data)
+        dst.write(frame)
+        recovered_length += len(frame)
+        compressed_length += FRAME_ENTRY.size - 4 + len(data)
+        frames += 1
+    
+    tail = _read_exactly(src, frames * SEEK_ENTRY.size + FRAMED_FOOTER.size)
+    if len(tail) != frames * SEEK_ENTRY.size + FRAMED_FOOTER.size:
+        raise ValueError("Truncated compressed stream (missing seek table)")
+    compressed_length += len(tail)
+    _, expected_length, frame_count, magic = FRAMED_FOOTER.unpack(tail[-FRAMED_FOOTER.size:])
+    if magic != FRAMED_MAGIC or frame_count != frames:
+        raise ValueError("Corrupt seek table footer")
+    if recovered_length != expected_length:
+        raise ValueError(f"Decompression mismatch: got {recovered_length}, expected {expected_length}")
+    
+    return {
+        'original_length': expected_length,
+        'compressed_length': compressed_length,
+        'multiplier': multiplier,
+        'recovered_length': recovered_length
+    }
+
+class FramedReader:
+    """
+    Random access to a CCC3 file through its seek table.
+    
+    f must be a seekable binary file object. read_at() inflates only the
+    frames overlapping the range; the most recently inflated frame is kept
+    so sequential reads do not inflate it twice.
+    """
+    
+    def __init__(self, f):
+        self.f = f
+        f.seek(0)
+        header = _read_exactly(f, FRAMED_HEADER_SIZE)
+        if header[:4] != FRAMED_MAGIC:
+            raise ValueError(f"Invalid format (magic bytes: {header[:4]}, expected: b'CCC3')")
+        if header[4] != FRAMED_VERSION:
+            raise ValueError(f"Unsupported framed format version {header[4]}")
+        self.multiplier = header[5]
+        f.seek(-FRAMED_FOOTER.size, os.SEEK_END)
+        table_offset, self.original_length, count, magic = FRAMED_FOOTER.unpack(_read_exactly(f, FRAMED_FOOTER.size))
+        if magic != FRAMED_MAGIC:
+            raise ValueError("Corrupt seek table footer")
+        f.seek(table_offset)
+        table = _read_exactly(f, count * SEEK_ENTRY.size)
+        if len(table) != count * SEEK_ENTRY.size:
+            raise ValueError("Truncated seek table")
+        self.frame_offsets = array('Q')
+        self.original_offsets = array('Q')
+        for frame_offset, original_offset in SEEK_ENTRY.iter_unpack(table):
+            self.frame_offsets.append(frame_offset)
+            self.original_offsets.append(original_offset)
+        self._cached = (None, b'')
+    
+    def __len__(self):
+        return len(self.frame_offsets)
     
-    command = sys.argv[1]
-    input_file = sys.argv[2]
-    output_file = sys.argv[3]
+    def frame_for(self, offset):
+        """Index of the frame holding original byte offset."""
+        if not 0 <= offset < self.original_length:
+            raise IndexError(f"Offset {offset} outside 0..{self.original_length}")
+        return bisect_right(self.original_offsets, offset) - 1
     
-    if command == "compress":
-        result = compress_realtime(input_file, output_file)
-        print(f"Compressed: {result['original_length']:,} → {result['compressed_length']:,} bytes")
-        print(f"Ratio: {result['compression_ratio']:.2f}%")
-        print(f"Multiplier: x{result['multiplier']}")
+    def frame(self, index):
+        """Returns the inflated, CRC-checked frame index."""
+        if self._cached[0] == index:
+            return self._cached[1]
+        self.f.seek(self.frame_offsets[index])
+        entry = _read_exactly(self.f, FRAME_ENTRY.size)
+        if len(entry) != FRAME_ENTRY.size:
+            raise ValueError("Truncated compressed frame")
+        frame = _inflate_frame(entry, _read_exactly(self.f, FRAME_ENTRY.unpack(entry)[0]))
+        self._cached = (index, frame)
+        return frame
     
-    elif command == "decompress":
-        result = decompress_realtime(input_file, output_file)
-        print(f"Decompressed: {result['compressed_length']:,} → {result['recovered_length']:,} bytes")
+    def read_at(self, offset, length):
+        """Returns original bytes [offset, offset + length), clipped to the end of the data."""
+        end = min(offset + length, self.original_length)
+        if offset < 0 or length < 0:
+            raise ValueError("offset and length must be non-negative")
+        if offset >= end:
+            return b''
+        parts = []
+        for index in range(self.frame_for(offset), self.frame_for(end - 1) + 1):
+            start = self.original_offsets[index]
+            frame = self.frame(index)
+            parts.append(frame[max(offset - start, 0):end - start])
+        return b''.join(parts)
+
+class _RangeComplete(Exception):
+    pass
+
+class _RangeSink:
+    """Write target that keeps only bytes [offset, end) of what is written, then stops the decoder."""
+    
+    def __init__(self, offset, end):
+        self.offset = offset
+        self.end = end
+        self.position = 0
+        self.parts = []
+    
+    def write(self, data):
+        start = self.position
+        self.position += len(data)
+        if self.position > self.offset and start < self.end:
+            self.parts.append(data[max(self.offset - start, 0):self.end - start])
+        if self.position >= self.end:
+            raise _RangeComplete()
+
+def read_at(source, offset, length):
+    """
+    Returns original bytes [offset, offset + length) of a compressed file (path or seekable binary file).
+    
+    CCC3 files are read through their seek table; CCC2, CCCS and block
+    files are inflated from the start up to the end of the range.
+    """
+    f = open(source, 'rb') if isinstance(source, (str, bytes, os.PathLike)) else source
+    try:
+        f.seek(0)
+        if f.read(4) == FRAMED_MAGIC:
+            return FramedReader(f).read_at(offset, length)
+        f.seek(0)
+        if offset < 0 or length < 0:
+            raise ValueError("offset and length must be non-negative")
+        sink = _RangeSink(offset, offset + length)
+        if length:
+            try:
+                decompress_stream(f, sink)
+            except _RangeComplete:
+                pass
+        return b''.join(sink.parts)
+    finally:
+        if f is not source:
+            f.close()
+
+def _open_stream(path, mode):
+    """Opens path in binary mode; "-" is stdin/stdout."""
+    if path == "-":
+        stream = sys.stdin.buffer if "r" in mode else sys.stdout.buffer
+        return os.fdopen(os.dup(stream.fileno()), mode)
+    return open(path, mode)
+
+if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Cyclic hybrid real-time compressor (zlib + multiplier analysis)")
+    parser.add_argument("command", choices=["compress", "decompress", "read"],
+                        help="read extracts --length bytes at --offset of the original data")
+    parser.add_argument("input", help="Input file, or - for stdin")
+    parser.add_argument("output", help="Output file, or - for stdout")
+    parser.add_argument("--no-analyze", action="store_true", help="Skip the multiplier analysis")
+    parser.add_argument("--stream", action="store_true",
+                        help="Constant-memory CCCS streaming format (implied by - for input or output)")
+    parser.add_argument("--jobs", type=int, default=None,
+                        help="Block-parallel mode with this many threads (0 = one per CPU)")
+    parser.add_argument("--block-size", type=int, default=DEFAULT_BLOCK_SIZE, help="Block size for --jobs")
+    parser.add_argument("--independent", action="store_true",
+                        help="Do not prime blocks with the previous block (allows parallel decompression)")
+    parser.add_argument("--backend", choices=sorted(BACKENDS) + ["auto"], default="zlib",
+                        help="Compression backend for the CCC2/CCCS formats (auto samples the input)")
+    parser.add_argument("--min-throughput", type=float, default=DEFAULT_MIN_THROUGHPUT,
+                        help="MB/s floor for --backend auto")
+    parser.add_argument("--framed", action="store_true", help="Seekable CCC3 format with a seek table")
+    parser.add_argument("--frame-size", type=int, default=DEFAULT_FRAME_SIZE, help="Frame size for --framed")
+    parser.add_argument("--offset", type=int, default=0, help="Start offset for read")
+    parser.add_argument("--length", type=int, default=DEFAULT_FRAME_SIZE, help="Byte count for read")
+    args = parser.parse_args()
+    if args.backend != "zlib" and (args.jobs is not None or args.framed):
+        parser.error("--jobs and --framed use zlib blocks; --backend applies to the CCC2/CCCS formats")
+    
+    # "-" means stdin/stdout, which always streams; reports then go to stderr
+    report = sys.stderr if args.output == "-" else sys.stdout
+    stream = args.stream or args.jobs is not None or args.framed or "-" in (args.input, args.output)
+    if args.command == "read":
+        data = read_at(args.input, args.offset, args.length)
+        with _open_stream(args.output, "wb") as dst:
+            dst.write(data)
+        print(f"Read {len(data):,} bytes at offset {args.offset:,}", file=report)
+        sys.exit(0)
+    if args.command == "decompress" and not stream:
+        with open(args.input, 'rb') as f:
+            stream = f.read(4) != MAGIC
+    
+    if stream:
+        with _open_stream(args.input, "rb") as src, _open_stream(args.output, "wb") as dst:
+            if args.command == "decompress":
+                result = decompress_stream(src, dst, jobs=args.jobs if args.jobs is not None else 1)
+            elif args.framed:
+                result = compress_framed(src, dst, frame_size=args.frame_size, jobs=args.jobs or None,
+                                         analyze=not args.no_analyze)
+            elif args.jobs is not None:
+                result = compress_blocks(src, dst, jobs=args.jobs, block_size=args.block_size,
+                                         prime=not args.independent, analyze=not args.no_analyze)
+            else:
+                result = compress_stream(src, dst, analyze=not args.no_analyze, backend=args.backend,
+                                         min_throughput=args.min_throughput)
+    elif args.command == "compress":
+        result = compress_realtime(args.input, args.output, analyze=not args.no_analyze, backend=args.backend,
+                                   min_throughput=args.min_throughput)
+    else:
+        result = decompress_realtime(args.input, args.output)
     
+    if args.command == "compress":
+        print(f"Compressed: {result['original_length']:,} → {result['compressed_length']:,} bytes", file=report)
+        print(f"Ratio: {result['compression_ratio']:.2f}%", file=report)
+        print(f"Multiplier: x{result['multiplier']}", file=report)
+        if 'backend' in result:
+            print(f"Backend: {result['backend']}", file=report)
     else:
-        print(f"Unknown command: {command}")
+        print(f"Decompressed: {result['compressed_length']:,} → {result['recovered_length']:,} bytes", file=report)
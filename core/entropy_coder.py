@@ -0,0 +1,280 @@
+"""
+Entropy Coder - static canonical Huffman stage for syllable token containers.
+
+The binary container (core.token_container) spends a whole varint on
+every record tag, although syllable IDs follow a very skewed
+distribution. This stage re-codes a finished container losslessly:
+record tags (structural tokens and C2 syllable IDs) get one Huffman
+table and the payload bytes that follow them (C1 literals, case bits,
+run lengths and literal text) get another. Decoding rebuilds the exact
+container bytes using table driven lookups, so everything downstream
+stays unchanged.
+
+Format (version 1):
+    [magic "SCE1"] [version:1] [container header:13] [varint record count]
+    [tag table] [payload table] [varint bitstream length] [bitstream]
+    [varint trailer length] [trailer]
+
+Tables are canonical: varint symbol count, then (varint symbol, code
+length byte) pairs. The trailer holds any bytes that followed the END
+record (e.g. a block index) verbatim.
+"""
+
+import heapq
+import io
+from collections import Counter
+
+from core.token_container import (
+    HEADER_SIZE,
+    TAG_END,
+    TAG_C1_RUN,
+    TAG_CASE_MIXED,
+    TAG_WHITESPACE,
+    TAG_LITERAL,
+    TAG_LITERAL_CHAR,
+    C2_TAG_BASE,
+    encode_varint,
+    write_container,
+    decode_varint,
+)
+
+MAGIC = b"SCE1"
+FORMAT_VERSION = 1
+MAX_CODE_LENGTH = 15
+
+# --- Code Construction ---
+def huffman_code_lengths(frequencies, max_length=MAX_CODE_LENGTH):
+    """Returns {symbol: code length} for a frequency table, capped at max_length bits."""
+    frequencies = {symbol: count for symbol, count in frequencies.items() if count}
+    if not frequencies:
+        return {}
+    if len(frequencies) == 1:
+        return {symbol: 1 for symbol in frequencies}
+    while True:
+        heap = [(count, i, (symbol,)) for i, (symbol, count) in enumerate(sorted(frequencies.items()))]
+        heapq.heapify(heap)
+        lengths = dict.fromkeys(frequencies, 0)
+        order = len(heap)
+        while len(heap) > 1:
+            count_a, _, symbols_a = heapq.heappop(heap)
+            count_b, _, symbols_b = heapq.heappop(heap)
+            for symbol in symbols_a + symbols_b:
+                lengths[symbol] += 1
+            heapq.heappush(heap, (count_a + count_b, order, symbols_a + symbols_b))
+            order += 1
+        if max(lengths.values()) <= max_length:
+            return lengths
+        # Flatten the distribution and retry until the longest code fits
+        frequencies = {symbol: (count >> 1) | 1 for symbol, count in frequencies.items()}
+
+def canonical_codes(lengths):
+    """Assigns canonical Huffman codes: {symbol: (code, length)}."""
+    codes = {}
+    code = 0
+    previous_length = 0
+    for symbol, length in sorted(lengths.items(), key=lambda item: (item[1], item[0])):
+        code <<= length - previous_length
+        codes[symbol] = (code, length)
+        code += 1
+        previous_length = length
+    return codes
+
+def build_decode_table(lengths):
+    """Builds a lookup table indexed by the next max-length bits: (symbol, length)."""
+    if not lengths:
+        return [], 0
+    table_bits = max(lengths.values())
+    table = [None] * (1 << table_bits)
+    for symbol, (code, length) in canonical_codes(lengths).items():
+        shift = table_bits - length
+        start = code << shift
+        table[start:start + (1 << shift)] = [(symbol, length)] * (1 << shift)
+    return table, table_bits
+
+# --- Bit I/O ---
+class _BitWriter:
+    def __init__(self):
+        self.out = bytearray()
+        self.bits = 0
+        self.count = 0
+
+    def write(self, code, length):
+        self.bits = (self.bits << length) | code
+        self.count += length
+        while self.count >= 8:
+            self.count -= 8
+            self.out.append((self.bits >> self.count) & 0xFF)
+        self.bits &= (1 << self.count) - 1
+
+    def getvalue(self):
+        if self.count:
+            return bytes(self.out) + bytes([(self.bits << (8 - self.count)) & 0xFF])
+        return bytes(self.out)
+
+class _BitReader:
+    def __init__(self, data):
+        self.data = data
+        self.pos = 0
+        self.bits = 0
+        self.count = 0
+
+    def decode(self, table, table_bits):
+        while self.count < table_bits:
+            byte = self.data[self.pos] if self.pos < len(self.data) else 0
+            self.pos += 1
+            self.bits = (self.bits << 8) | byte
+            self.count += 8
+        entry = table[(self.bits >> (self.count - table_bits)) & ((1 << table_bits) - 1)]
+        if entry is None:
+            raise ValueError("Corrupt entropy-coded stream")
+        symbol, length = entry
+        self.count -= length
+        self.bits &= (1 << self.count) - 1
+        return symbol
+
+# --- Record Splitting ---
+def _payload_varints(tag, first_varint=None):
+    """Number of varints in a record's payload (C1 runs need their count first).
+
+    Text runs have a single varint, their byte length; _text_length() gives
+    the raw bytes that follow it.
+    """
+    if tag >= C2_TAG_BASE:
+        return (tag - C2_TAG_BASE) & 1
+    if TAG_CASE_MIXED <= tag <= TAG_LITERAL_CHAR:
+        return 1
+    if tag == TAG_C1_RUN:
+        return 1 if first_varint is None else first_varint + 2
+    return 0
+
+def _text_length(tag, first_varint):
+    """Number of raw payload bytes after a record's varints."""
+    return first_varint if tag == TAG_WHITESPACE or tag == TAG_LITERAL else 0
+
+def _split_records(container):
+    """Returns ([(tag, payload bytes), ...], trailer bytes after END)."""
+    records = []
+    pos = HEADER_SIZE
+    while True:
+        tag, payload_start = decode_varint(container, pos)
+        if tag == TAG_END:
+            return records, container[payload_start:]
+        end = payload_start
+        varints = _payload_varints(tag)
+        i = 0
+        while i < varints:
+            value, end = decode_varint(container, end)
+            if i == 0:
+                if tag == TAG_C1_RUN:
+                    varints = _payload_varints(tag, value)
+                end += _text_length(tag, value)
+            i += 1
+        records.append((tag, container[payload_start:end]))
+        pos = end
+
+# --- Public API ---
+def _write_table(lengths, out):
+    encode_varint(len(lengths), out)
+    for symbol, length in sorted(lengths.items()):
+        encode_varint(symbol, out)
+        out.append(length)
+
+def _read_table(data, pos):
+    count, pos = decode_varint(data, pos)
+    lengths = {}
+    for _ in range(count):
+        symbol, pos = decode_varint(data, pos)
+        lengths[symbol] = data[pos]
+        pos += 1
+    return lengths, pos
+
+def is_entropy_coded(prefix):
+    """Returns True if prefix starts with the entropy-coded container magic."""
+    return prefix[:len(MAGIC)] == MAGIC
+
+def entropy_encode(container):
+    """Huffman-codes a complete binary token container (bytes)."""
+    records, trailer = _split_records(container)
+    tag_counts = Counter(tag for tag, _ in records)
+    byte_counts = Counter()
+    for _, payload in records:
+        byte_counts.update(payload)
+    tag_codes = canonical_codes(huffman_code_lengths(tag_counts))
+    byte_lengths = huffman_code_lengths(byte_counts)
+    byte_codes = canonical_codes(byte_lengths)
+
+    bits = _BitWriter()
+    for tag, payload in records:
+        bits.write(*tag_codes[tag])
+        for byte in payload:
+            bits.write(*byte_codes[byte])
+    bitstream = bits.getvalue()
+
+    out = bytearray(MAGIC)
+    out.append(FORMAT_VERSION)
+    out.extend(container[:HEADER_SIZE])
+    encode_varint(len(records), out)
+    _write_table({tag: length for tag, (_, length) in tag_codes.items()}, out)
+    _write_table(byte_lengths, out)
+    encode_varint(len(bitstream), out)
+    out.extend(bitstream)
+    encode_varint(len(trailer), out)
+    out.extend(trailer)
+    return bytes(out)
+
+def entropy_decode(data):
+    """Restores the exact binary token container bytes from entropy_encode() output."""
+    if not is_entropy_coded(data):
+        raise ValueError("Not an entropy-coded token container")
+    if data[len(MAGIC)] != FORMAT_VERSION:
+        raise ValueError(f"Unsupported entropy coder version {data[len(MAGIC)]}")
+    pos = len(MAGIC) + 1
+    out = bytearray(data[pos:pos + HEADER_SIZE])
+    pos += HEADER_SIZE
+    record_count, pos = decode_varint(data, pos)
+    tag_lengths, pos = _read_table(data, pos)
+    byte_lengths, pos = _read_table(data, pos)
+    bitstream_length, pos = decode_varint(data, pos)
+    bits = _BitReader(data[pos:pos + bitstream_length])
+    pos += bitstream_length
+    trailer_length, pos = decode_varint(data, pos)
+    trailer = data[pos:pos + trailer_length]
+
+    tag_table, tag_bits = build_decode_table(tag_lengths)
+    byte_table, byte_bits = build_decode_table(byte_lengths)
+
+    def read_payload_varint():
+        value = 0
+        shift = 0
+        while True:
+            byte = bits.decode(byte_table, byte_bits)
+            out.append(byte)
+            value |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return value
+            shift += 7
+
+    for _ in range(record_count):
+        tag = bits.decode(tag_table, tag_bits)
+        encode_varint(tag, out)
+        varints = _payload_varints(tag)
+        i = 0
+        while i < varints:
+            value = read_payload_varint()
+            if i == 0:
+                if tag == TAG_C1_RUN:
+                    varints = _payload_varints(tag, value)
+                for _ in range(_text_length(tag, value)):
+                    out.append(bits.decode(byte_table, byte_bits))
+            i += 1
+    out.append(TAG_END)
+    out.extend(trailer)
+    return bytes(out)
+
+def write_entropy_container(f, tokens, c2_map):
+    """Writes tokens as an entropy-coded container; returns the bytes written."""
+    container = io.BytesIO()
+    write_container(container, tokens, c2_map)
+    data = entropy_encode(container.getvalue())
+    f.write(data)
+    return len(data)
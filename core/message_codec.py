@@ -0,0 +1,206 @@
+"""
+Message Codec - trained preset dictionaries for small hybrid messages.
+
+A cold zlib stream has nothing to refer back to, so RPC payloads and log
+records of a few hundred bytes barely shrink, and the 9-byte CCC2 header
+can make them grow. This module trains a zlib preset dictionary (zdict)
+from sample messages and compresses each message against it:
+
+    [magic "CM"] [dictionary ID >I] [raw deflate]
+
+The dictionary ID is the Adler-32 of the dictionary (0 = no dictionary).
+Decoders look IDs up in a process-wide cache, filled by
+register_dictionary() or lazily from a dictionary directory of
+"<id>.zdict" files. Primed compressor/decompressor objects are cached
+per dictionary and copied per message, so the dictionary is hashed once
+rather than for every message.
+"""
+
+import heapq
+import os
+import struct
+import threading
+import zlib
+from collections import Counter
+
+MESSAGE_MAGIC = b"CM"
+MESSAGE_HEADER = struct.Struct(">2sI")
+DEFAULT_DICTIONARY_SIZE = 32 << 10  # the deflate window; zlib ignores anything older
+DICTIONARY_SUFFIX = ".zdict"
+
+# Trainer granularity: grams are counted once per sample, segments are scored by their grams
+GRAM_SIZE = 8
+SEGMENT_SIZE = 128
+
+# --- Training ---
+def train_dictionary(samples, size=DEFAULT_DICTIONARY_SIZE):
+    """Builds a preset dictionary of at most size bytes from sample messages.
+
+    Segments are scored by how many other samples share their 8-byte
+    grams not yet in the dictionary; the best are picked greedily and the
+    earliest picks placed last, closest to the data, where references are
+    cheapest.
+    """
+    samples = [bytes(sample) for sample in samples if len(sample) >= GRAM_SIZE]
+    frequency = Counter()
+    for sample in samples:
+        frequency.update({sample[i:i + GRAM_SIZE] for i in range(len(sample) - GRAM_SIZE + 1)})
+
+    def score(segment):
+        return sum(frequency[segment[i:i + GRAM_SIZE]] - 1 for i in range(len(segment) - GRAM_SIZE + 1))
+
+    segments = set()
+    step = SEGMENT_SIZE // 2
+    for sample in samples:
+        for start in range(0, max(len(sample) - SEGMENT_SIZE, 0) + 1, step):
+            segments.add(sample[start:start + SEGMENT_SIZE])
+
+    # Lazy greedy cover: once a segment is chosen its grams count as known,
+    # so later picks have to bring in grams the dictionary does not have yet
+    heap = [(-score(segment), segment) for segment in segments]
+    heapq.heapify(heap)
+    chosen = []
+    total = 0
+    while heap and total < size:
+        negative, segment = heapq.heappop(heap)
+        current = score(segment)
+        if current <= 0:
+            continue
+        if heap and current < -heap[0][0]:
+            heapq.heappush(heap, (-current, segment))
+            continue
+        chosen.append(segment)
+        total += len(segment)
+        for i in range(len(segment) - GRAM_SIZE + 1):
+            frequency[segment[i:i + GRAM_SIZE]] = 1
+    return b"".join(reversed(chosen))[-size:]
+
+def dictionary_id(dictionary):
+    """The ID stored in message headers for dictionary."""
+    return zlib.adler32(dictionary)
+
+# --- Dictionary Cache ---
+_DICTIONARIES = {}
+_COMPRESSORS = {}
+_DECOMPRESSORS = {}
+_CACHE_LOCK = threading.Lock()
+
+def register_dictionary(dictionary):
+    """Makes dictionary available to compress_bytes()/decompress_bytes(); returns its ID.
+
+    Raises ValueError if a different dictionary is already registered under
+    the same ID (an Adler-32 collision): replacing it would leave cached
+    compressors primed with the old one.
+    """
+    dictionary = bytes(dictionary)
+    dict_id = dictionary_id(dictionary)
+    with _CACHE_LOCK:
+        registered = _DICTIONARIES.setdefault(dict_id, dictionary)
+    if registered != dictionary:
+        raise ValueError(f"Dictionary ID {dict_id:08x} is already registered with different contents")
+    return dict_id
+
+def save_dictionary(dictionary, directory):
+    """Writes dictionary to directory as "<id>.zdict"; returns the path."""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{dictionary_id(dictionary):08x}{DICTIONARY_SUFFIX}")
+    with open(path, "wb") as f:
+        f.write(dictionary)
+    return path
+
+def load_dictionary(path):
+    """Reads and registers a dictionary file; returns its ID."""
+    with open(path, "rb") as f:
+        return register_dictionary(f.read())
+
+def _dictionary(dict_id, dictionary_dir=None):
+    dictionary = _DICTIONARIES.get(dict_id)
+    if dictionary is None and dictionary_dir is not None:
+        path = os.path.join(dictionary_dir, f"{dict_id:08x}{DICTIONARY_SUFFIX}")
+        if os.path.exists(path):
+            if load_dictionary(path) != dict_id:
+                raise ValueError(f"Dictionary file {path} does not match its ID")
+            dictionary = _DICTIONARIES[dict_id]
+    if dictionary is None:
+        raise ValueError(f"Unknown dictionary ID {dict_id:08x}")
+    return dictionary
+
+def _compressor(dict_id, level):
+    key = (dict_id, level)
+    compressor = _COMPRESSORS.get(key)
+    if compressor is None:
+        if dict_id:
+            compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS, zdict=_dictionary(dict_id))
+        else:
+            compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+        with _CACHE_LOCK:
+            compressor = _COMPRESSORS.setdefault(key, compressor)
+    return compressor
+
+def _decompressor(dict_id, dictionary_dir):
+    decompressor = _DECOMPRESSORS.get(dict_id)
+    if decompressor is None:
+        if dict_id:
+            decompressor = zlib.decompressobj(-zlib.MAX_WBITS, zdict=_dictionary(dict_id, dictionary_dir))
+        else:
+            decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+        with _CACHE_LOCK:
+            decompressor = _DECOMPRESSORS.setdefault(dict_id, decompressor)
+    return decompressor
+
+# --- Messages ---
+def compress_bytes(data, dict_id=0, level=6):
+    """Compresses one small message against a registered dictionary (0 = none)."""
+    compressor = _compressor(dict_id, level).copy()
+    return MESSAGE_HEADER.pack(MESSAGE_MAGIC, dict_id) + compressor.compress(data) + compressor.flush()
+
+def message_dictionary_id(data):
+    """Returns the dictionary ID in a message header."""
+    if len(data) < MESSAGE_HEADER.size or data[:2] != MESSAGE_MAGIC:
+        raise ValueError("Not a compressed message")
+    return MESSAGE_HEADER.unpack_from(data)[1]
+
+def decompress_bytes(data, dictionary_dir=None):
+    """Restores a message from compress_bytes().
+
+    Unregistered dictionary IDs are loaded from dictionary_dir, if given.
+    """
+    decompressor = _decompressor(message_dictionary_id(data), dictionary_dir).copy()
+    try:
+        message = decompressor.decompress(data[MESSAGE_HEADER.size:]) + decompressor.flush()
+    except zlib.error as e:
+        raise ValueError(f"Corrupt compressed message ({e})") from None
+    if not decompressor.eof:
+        raise ValueError("Truncated compressed message")
+    return message
+
+def _read_samples(paths):
+    """Samples from files: every line of a file, or every file of a directory."""
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                with open(os.path.join(path, name), "rb") as f:
+                    yield f.read()
+        else:
+            with open(path, "rb") as f:
+                yield from f.read().splitlines(keepends=True)
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Train a preset dictionary for small hybrid messages.")
+    parser.add_argument("samples", nargs="+",
+                        help="Sample files (one message per line) or directories (one message per file).")
+    parser.add_argument("--output-dir", required=True, help="Directory to write <id>.zdict into.")
+    parser.add_argument("--size", type=int, default=DEFAULT_DICTIONARY_SIZE, help="Dictionary size in bytes.")
+    args = parser.parse_args()
+
+    samples = list(_read_samples(args.samples))
+    dictionary = train_dictionary(samples, args.size)
+    dict_id = register_dictionary(dictionary)
+    path = save_dictionary(dictionary, args.output_dir)
+    plain = sum(len(compress_bytes(sample)) for sample in samples)
+    primed = sum(len(compress_bytes(sample, dict_id)) for sample in samples)
+    original = sum(len(sample) for sample in samples)
+    print(f"Dictionary {dict_id:08x}: {len(dictionary):,} bytes from {len(samples):,} samples -> {path}")
+    print(f"Samples: {original:,} bytes -> {plain:,} without dictionary, {primed:,} with")
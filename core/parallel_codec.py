@@ -0,0 +1,196 @@
+"""
+Parallel Syllable Codec - multi-process compression for large texts.
+
+Input is split at newline boundaries into segments that compress and
+decompress independently. Segments run in a ProcessPoolExecutor whose
+workers map the codec artifact once at start-up, and results are
+reassembled in input order. Because no word spans a newline, the output
+is byte-identical to the serial path. The exception is a run of more than
+MAX_SEGMENT_FACTOR segment sizes with no newline and no word boundary
+either: it is cut mid-word, which changes the tokens (the text still
+decodes the same).
+"""
+
+import io
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from core.compressor import (compress, decompress, iter_text_chunks, _flush_point, _reopen_word_case, RUN_WHITESPACE,
+                             WordTokenCache)
+from core.codec_artifact import DEFAULT_LIBRARY_PATH, load_codec_artifact
+from core.token_container import (
+    encode_header,
+    encode_tokens,
+    read_header,
+    split_records,
+    decode_records,
+    TAG_END,
+)
+
+DEFAULT_SEGMENT_SIZE = 1 << 20
+MAX_SEGMENT_FACTOR = 4  # segment sizes of text without a newline before cutting elsewhere
+
+# --- Worker State ---
+_worker_artifact = None
+_worker_word_cache = None
+
+def _init_worker(library_path):
+    """Loads the codec tables and a word cache once per worker process."""
+    global _worker_artifact, _worker_word_cache
+    _worker_artifact = load_codec_artifact(library_path)
+    _worker_word_cache = WordTokenCache(_worker_artifact.c2_map, _worker_artifact.vowel_map,
+                                        _worker_artifact.consonant_map, _worker_artifact.trie)
+
+def _compress_segment(item, case_model, segmentation, runs=False):
+    segment, continued = item
+    artifact = _worker_artifact
+    tokens = compress(segment, artifact.c2_map, artifact.vowel_map, artifact.consonant_map,
+                      None, artifact.trie, case_model, segmentation, runs, _worker_word_cache)
+    if continued:
+        tokens = _reopen_word_case(tokens, case_model)
+    return bytes(encode_tokens(tokens))
+
+def _decompress_segment(records):
+    artifact = _worker_artifact
+    tokens = decode_records(records, artifact.c2_map, artifact.reverse_c2_map)
+    return decompress(tokens, artifact.c2_map, reverse_c2_map=artifact.reverse_c2_map)
+
+# --- Segmenting ---
+def _line_cut(pending, runs):
+    """Position just after the last newline that can end a segment, or 0.
+
+    With runs=True the newline must also end its whitespace run, so no
+    WHITESPACE token is split between two segments.
+    """
+    if not runs:
+        return pending.rfind("\n") + 1
+    end = len(pending.rstrip(RUN_WHITESPACE))
+    cut = pending.rfind("\n", 0, end)
+    while cut >= 0 and pending[cut + 1] in RUN_WHITESPACE:
+        cut = pending.rfind("\n", 0, cut)
+    return cut + 1
+
+def iter_line_segments(f, segment_size=DEFAULT_SEGMENT_SIZE, runs=False):
+    """Yields text segments of about segment_size chars that end on a newline.
+
+    Text with no usable newline is cut at a word boundary once it reaches
+    MAX_SEGMENT_FACTOR segment sizes (the output still matches the serial
+    path), or mid-word if it has no word boundary either.
+    """
+    for segment, _ in _line_segments(f, segment_size, runs):
+        yield segment
+
+def _line_segments(f, segment_size, runs):
+    """iter_line_segments() as (segment, continued) pairs; continued marks a segment starting mid-word."""
+    continued = False
+    separators = RUN_WHITESPACE if runs else " \n"
+    parts = []
+    size = checked = 0
+    for chunk in iter_text_chunks(f, segment_size):
+        parts.append(chunk)
+        size += len(chunk)
+        # Join and scan once per segment_size of new text, not once per chunk
+        if size - checked < segment_size:
+            continue
+        pending = "".join(parts)
+        cut = _line_cut(pending, runs)
+        mid_word = False
+        if not cut and size >= segment_size * MAX_SEGMENT_FACTOR:
+            cut = _flush_point(pending, separators)
+            if not cut:
+                cut, mid_word = size, True
+        if cut:
+            yield pending[:cut], continued
+            pending = pending[cut:]
+            continued = mid_word
+            checked = 0
+        else:
+            checked = size
+        parts = [pending]
+        size = len(pending)
+    pending = "".join(parts)
+    if pending:
+        yield pending, continued
+
+def _ordered_map(executor, fn, items, max_pending, *args):
+    """Like executor.map, but keeps at most max_pending items in flight."""
+    if executor is None:
+        for item in items:
+            yield fn(item, *args)
+        return
+    pending = deque()
+    for item in items:
+        pending.append(executor.submit(fn, item, *args))
+        if len(pending) >= max_pending:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+def _executor(jobs, library_path):
+    """Returns a worker pool, or None to run in-process when jobs == 1."""
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+    if jobs <= 1:
+        _init_worker(library_path)
+        return None, 1
+    return ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(library_path,)), jobs
+
+# --- Public API ---
+def compress_file_parallel(input_f, output_f, jobs=None, case_model="char", segmentation="greedy",
+                           library_path=DEFAULT_LIBRARY_PATH, segment_size=DEFAULT_SEGMENT_SIZE, runs=False):
+    """Compresses a text file object into a binary token container using jobs processes.
+
+    Returns the number of bytes written.
+    """
+    artifact = load_codec_artifact(library_path)
+    executor, jobs = _executor(jobs, library_path)
+    try:
+        header = encode_header(artifact.c2_map)
+        output_f.write(header)
+        written = len(header)
+        segments = _line_segments(input_f, segment_size, runs)
+        for records in _ordered_map(executor, _compress_segment, segments, jobs * 2,
+                                    case_model, segmentation, runs):
+            output_f.write(records)
+            written += len(records)
+        output_f.write(bytes([TAG_END]))
+        written += 1
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    return written
+
+def decompress_file_parallel(input_f, output_f, jobs=None,
+                             library_path=DEFAULT_LIBRARY_PATH, segment_size=DEFAULT_SEGMENT_SIZE):
+    """Decompresses a binary token container into a text file object using jobs processes.
+
+    Returns the number of characters written.
+    """
+    artifact = load_codec_artifact(library_path)
+    read_header(input_f, artifact.c2_map)
+    executor, jobs = _executor(jobs, library_path)
+    try:
+        written = 0
+        segments = split_records(input_f, segment_size)
+        for text in _ordered_map(executor, _decompress_segment, segments, jobs * 2):
+            output_f.write(text)
+            written += len(text)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    return written
+
+def compress_parallel(text, jobs=None, case_model="char", segmentation="greedy",
+                      library_path=DEFAULT_LIBRARY_PATH, segment_size=DEFAULT_SEGMENT_SIZE, runs=False):
+    """Compresses text into binary token container bytes using jobs processes."""
+    output = io.BytesIO()
+    compress_file_parallel(io.StringIO(text), output, jobs, case_model, segmentation, library_path, segment_size,
+                           runs)
+    return output.getvalue()
+
+def decompress_parallel(data, jobs=None, library_path=DEFAULT_LIBRARY_PATH, segment_size=DEFAULT_SEGMENT_SIZE):
+    """Decompresses binary token container bytes into text using jobs processes."""
+    output = io.StringIO()
+    decompress_file_parallel(io.BytesIO(data), output, jobs, library_path, segment_size)
+    return output.getvalue()
@@ -0,0 +1,203 @@
+"""
+Syllable Codec - reusable, thread-safe front end for the syllable compressor.
+
+The functional API in core.compressor expects every caller to build and
+pass the C2 map, both C1 maps and the syllable library. SyllableCodec
+holds them instead: the tables are mapped from the codec artifact on
+first use, guarded by a lock so concurrent first calls load them once,
+and are read-only afterwards, so one instance can serve any number of
+threads. get_syllable_codec() returns one shared instance per library
+path.
+"""
+
+import codecs
+import io
+import os
+import threading
+from itertools import chain
+
+from core.compressor import compress, compress_stream, decompress, decompress_stream, WordTokenCache
+from core.codec_artifact import DEFAULT_LIBRARY_PATH, load_codec_artifact
+from core.token_container import iter_frames, is_container, write_container, read_lines, read_range
+from core.token_stream import TokenStream
+from core.entropy_coder import entropy_encode, entropy_decode, is_entropy_coded
+
+class SyllableCodec:
+    """Compresses text to binary token containers and back with one syllable library.
+
+    Inputs may be str, bytes (UTF-8 text for compress, a container for
+    decompress) or file objects. Pass output= to write to a file object
+    instead of returning the result.
+    """
+
+    def __init__(self, library_path=DEFAULT_LIBRARY_PATH, word_cache_size=50000):
+        self.library_path = library_path
+        self.word_cache_size = word_cache_size
+        self._artifact = None
+        self._word_cache = None
+        self._lock = threading.Lock()
+
+    @property
+    def artifact(self):
+        """The codec tables, loaded on first access.
+
+        Raises FileNotFoundError if the syllable library does not exist.
+        """
+        artifact = self._artifact
+        if artifact is None:
+            with self._lock:
+                artifact = self._artifact
+                if artifact is None:
+                    artifact = load_codec_artifact(self.library_path)
+                    if self.word_cache_size:
+                        self._word_cache = WordTokenCache(artifact.c2_map, artifact.vowel_map, artifact.consonant_map,
+                                                          artifact.trie, self.word_cache_size)
+                    self._artifact = artifact
+        return artifact
+
+    @property
+    def word_cache(self):
+        """The shared WordTokenCache (None if word_cache_size is 0)."""
+        self.artifact
+        return self._word_cache
+
+    def tokenize(self, text, case_model="word", segmentation="greedy", runs=False, compact=False):
+        """Returns the token list for text (see core.compressor.compress).
+
+        compact=True returns an array-backed TokenStream instead of dicts.
+        """
+        artifact = self.artifact
+        out = TokenStream(artifact.c2_map, artifact.reverse_c2_map) if compact else None
+        return compress(text, artifact.c2_map, artifact.vowel_map, artifact.consonant_map, None, artifact.trie,
+                        case_model, segmentation, runs, self._word_cache, out)
+
+    def compress(self, data, output=None, case_model="word", segmentation="greedy", runs=False, entropy=False,
+                 index_interval=None):
+        """Compresses str, UTF-8 bytes or a file object into a binary token container.
+
+        Returns the container bytes, or the number of bytes written if
+        output (a binary file object) is given. File input is streamed
+        unless entropy=True, which needs the whole container in memory.
+        index_interval=K appends a block index every K lines for
+        read_lines()/read_range().
+        """
+        artifact = self.artifact
+        if hasattr(data, "read"):
+            chunks = _iter_text(data)
+        else:
+            chunks = [data.decode("utf-8") if isinstance(data, (bytes, bytearray, memoryview)) else data]
+        frames = compress_stream(chunks, artifact.c2_map, artifact.vowel_map, artifact.consonant_map, None,
+                                 artifact.trie, case_model, segmentation, runs, self._word_cache)
+        tokens = chain.from_iterable(frames)
+        if output is not None and not entropy:
+            return write_container(output, tokens, artifact.c2_map, index_interval)
+        buffer = io.BytesIO()
+        write_container(buffer, tokens, artifact.c2_map, index_interval)
+        result = entropy_encode(buffer.getvalue()) if entropy else buffer.getvalue()
+        if output is None:
+            return result
+        output.write(result)
+        return len(result)
+
+    def decompress(self, data, output=None):
+        """Decompresses a container (plain or entropy coded) from bytes or a binary file object.
+
+        Returns the text, or the number of characters written if output (a
+        text file object) is given.
+        """
+        artifact = self.artifact
+        if not hasattr(data, "read"):
+            data = io.BytesIO(data)
+        prefix = data.read(4)
+        if is_entropy_coded(prefix):
+            data = io.BytesIO(entropy_decode(prefix + data.read()))
+        elif is_container(prefix):
+            data = _Prefixed(prefix, data)
+        else:
+            raise ValueError("Not a syllable token container")
+        pieces = decompress_stream(iter_frames(data, artifact.c2_map, artifact.reverse_c2_map),
+                                   artifact.c2_map, artifact.reverse_c2_map)
+        if output is None:
+            return "".join(pieces)
+        written = 0
+        for piece in pieces:
+            output.write(piece)
+            written += len(piece)
+        return written
+
+    def read_lines(self, data, start, count):
+        """Returns lines start .. start + count - 1 of a container (bytes or seekable binary file)."""
+        artifact = self.artifact
+        return read_lines(_seekable_container(data), artifact.c2_map, start, count, artifact.reverse_c2_map)
+
+    def read_range(self, data, char_start, char_end):
+        """Returns text[char_start:char_end] of a container (bytes or seekable binary file)."""
+        artifact = self.artifact
+        return read_range(_seekable_container(data), artifact.c2_map, char_start, char_end, artifact.reverse_c2_map)
+
+    def decode(self, tokens):
+        """Returns the text for a token list from tokenize()."""
+        if isinstance(tokens, TokenStream):
+            return tokens.text()
+        artifact = self.artifact
+        return decompress(tokens, artifact.c2_map, reverse_c2_map=artifact.reverse_c2_map)
+
+def _iter_text(f, chunk_size=1 << 16):
+    """Yields str chunks from a text or binary (UTF-8) file object."""
+    decoder = None
+    while True:
+        chunk = f.read(chunk_size)
+        if not chunk:
+            break
+        if isinstance(chunk, bytes):
+            if decoder is None:
+                decoder = codecs.getincrementaldecoder("utf-8")()
+            chunk = decoder.decode(chunk)
+        yield chunk
+    if decoder is not None:
+        tail = decoder.decode(b"", final=True)
+        if tail:
+            yield tail
+
+def _seekable_container(data):
+    """Returns a seekable plain container; entropy-coded input is decoded in memory."""
+    f = data if hasattr(data, "read") else io.BytesIO(data)
+    f.seek(0)
+    if is_entropy_coded(f.read(4)):
+        f.seek(0)
+        return io.BytesIO(entropy_decode(f.read()))
+    return f
+
+class _Prefixed:
+    """Binary reader that replays already-consumed prefix bytes before f."""
+
+    def __init__(self, prefix, f):
+        self.prefix = prefix
+        self.f = f
+
+    def read(self, size=-1):
+        prefix = self.prefix
+        if not prefix:
+            return self.f.read(size)
+        if size is None or size < 0:
+            self.prefix = b""
+            return prefix + self.f.read()
+        self.prefix = prefix[size:]
+        if len(prefix) >= size:
+            return prefix[:size]
+        return prefix + self.f.read(size - len(prefix))
+
+# --- Shared Instances ---
+_CODEC_CACHE = {}
+_CODEC_CACHE_LOCK = threading.Lock()
+
+def get_syllable_codec(library_path=DEFAULT_LIBRARY_PATH):
+    """Returns the process-wide SyllableCodec for library_path (created lazily)."""
+    key = os.path.abspath(library_path)
+    codec = _CODEC_CACHE.get(key)
+    if codec is None:
+        with _CODEC_CACHE_LOCK:
+            codec = _CODEC_CACHE.get(key)
+            if codec is None:
+                codec = _CODEC_CACHE[key] = SyllableCodec(library_path)
+    return codec
@@ -0,0 +1,621 @@
+"""
+Syllable Token Container - compact binary format for core.compressor tokens.
+
+Replaces the indent=2 JSON dump of the token list. Only the information
+that cannot be rebuilt from the syllable library is stored; C2 derived
+fields (pattern, letter_values, multipliers) and C1 cypher values are
+restored from the library at decode time.
+
+Format (version 1):
+    [magic "SCC1"] [version:1] [library fingerprint:8] [records...] [END]
+
+Every record starts with a varint tag:
+    0      END
+    1      SPACE
+    2      NEWLINE
+    3      C1 run: varint count, count x varint codepoint, varint upper-case bits
+    4      CASE title
+    5      CASE upper
+    6      CASE mixed: varint bitmap
+    7      SPACE run: varint count (two or more spaces)
+    8      TAB run: varint count
+    9      NEWLINE run: varint count (two or more newlines)
+    10     CRLF run: varint count of "\r\n" pairs
+    11     WHITESPACE: varint byte length, raw ASCII whitespace (e.g. a lone "\r")
+    12     LITERAL run: varint byte length, UTF-8 text
+    13     LITERAL char: varint codepoint
+    14-15  reserved
+    16+    C2: tag = 16 + (base_value << 1 | has_case), then varint case bits if has_case
+
+WHITESPACE tokens are written as a sequence of the run records above, one
+per stretch of identical whitespace.
+"""
+
+import bisect
+import hashlib
+import io
+import re
+import struct
+
+from core.compressor import create_letter_cyphers, build_reverse_c2_map, decompress
+
+MAGIC = b"SCC1"
+FORMAT_VERSION = 1
+FINGERPRINT_SIZE = 8
+HEADER_SIZE = len(MAGIC) + 1 + FINGERPRINT_SIZE
+
+TAG_END = 0
+TAG_SPACE = 1
+TAG_NEWLINE = 2
+TAG_C1_RUN = 3
+TAG_CASE_TITLE = 4
+TAG_CASE_UPPER = 5
+TAG_CASE_MIXED = 6
+TAG_SPACE_RUN = 7
+TAG_TAB_RUN = 8
+TAG_NEWLINE_RUN = 9
+TAG_CRLF_RUN = 10
+TAG_WHITESPACE = 11
+TAG_LITERAL = 12
+TAG_LITERAL_CHAR = 13
+_WHITESPACE_RUN_PATTERN = re.compile(r" +|\t+|(?:\r\n)+|\n+|[^ \t\n]+")
+_CASE_TAGS = {"title": TAG_CASE_TITLE, "upper": TAG_CASE_UPPER, "mixed": TAG_CASE_MIXED}
+C2_TAG_BASE = 16
+
+INDEX_MAGIC = b"SCI1"
+_INDEX_FOOTER = struct.Struct("<I4s")
+
+_WRITE_BUFFER_SIZE = 1 << 16
+_READ_BUFFER_SIZE = 1 << 16
+
+# --- Varints ---
+def encode_varint(value, out):
+    """Appends value as an unsigned LEB128 varint to the bytearray out."""
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+def varint_size(value):
+    """Returns the number of bytes encode_varint would use for value."""
+    size = 1
+    while value > 0x7F:
+        value >>= 7
+        size += 1
+    return size
+
+def _pack_bits(bits):
+    mask = 0
+    for i, bit in enumerate(bits):
+        if bit:
+            mask |= 1 << i
+    return mask
+
+def _unpack_bits(mask, count):
+    return [(mask >> i) & 1 for i in range(count)]
+
+# --- Token Costs ---
+# Encoded size in bytes of each token kind, used by optimal segmentation.
+C1_RUN_OVERHEAD = 3  # run tag, count and upper-case bits (for short runs)
+
+def c1_char_cost(char):
+    """Bytes one more character adds to a C1 run."""
+    return varint_size(ord(char))
+
+def c2_token_cost(base_value):
+    """Bytes for a lowercase C2 record with the given syllable ID."""
+    return varint_size(C2_TAG_BASE + (base_value << 1))
+
+# --- Library Fingerprint ---
+def library_fingerprint(c2_map):
+    """Returns an 8-byte fingerprint of the syllable -> ID assignment."""
+    syllables = getattr(c2_map, "syllables_by_id", None)
+    if syllables is None:
+        syllables = sorted(c2_map, key=lambda syllable: c2_map[syllable]["base_value"])
+    else:
+        syllables = [syllables[i] for i in range(len(syllables))]
+    return hashlib.sha256("\n".join(syllables).encode("utf-8")).digest()[:FINGERPRINT_SIZE]
+
+# --- Writing ---
+def encode_header(c2_map):
+    """Returns the container header for the given C2 map."""
+    return MAGIC + bytes([FORMAT_VERSION]) + library_fingerprint(c2_map)
+
+def encode_tokens(tokens, out=None):
+    """Encodes an iterable of token dicts as container records (no header/END)."""
+    if hasattr(tokens, "encode_records"):
+        # Array-backed token streams encode straight from their columns
+        return tokens.encode_records(out)
+    if out is None:
+        out = bytearray()
+    c1_run = []
+    for token in tokens:
+        token_type = token.get("type")
+        if token_type == "C1":
+            c1_run.append(token)
+            continue
+        if c1_run:
+            _encode_c1_run(c1_run, out)
+            c1_run = []
+        if token_type == "C2":
+            case_mask = _pack_bits(token.get("case", ()))
+            if case_mask:
+                encode_varint(C2_TAG_BASE + (token["base_value"] << 1 | 1), out)
+                encode_varint(case_mask, out)
+            else:
+                encode_varint(C2_TAG_BASE + (token["base_value"] << 1), out)
+        elif token_type == "SPACE":
+            out.append(TAG_SPACE)
+        elif token_type == "NEWLINE":
+            out.append(TAG_NEWLINE)
+        elif token_type == "CASE":
+            out.append(_CASE_TAGS[token["mode"]])
+            if token["mode"] == "mixed":
+                encode_varint(token["mask"], out)
+        elif token_type == "WHITESPACE":
+            _encode_whitespace(token["text"], out)
+        elif token_type == "LITERAL":
+            text = token["text"]
+            if len(text) == 1:
+                out.append(TAG_LITERAL_CHAR)
+                encode_varint(ord(text), out)
+            else:
+                _encode_text(TAG_LITERAL, text, out)
+        else:
+            raise ValueError(f"Unknown token type: {token_type!r}")
+    if c1_run:
+        _encode_c1_run(c1_run, out)
+    return out
+
+def _encode_c1_run(run, out):
+    out.append(TAG_C1_RUN)
+    encode_varint(len(run), out)
+    for token in run:
+        encode_varint(ord(token["char"]), out)
+    encode_varint(_pack_bits(token.get("is_uppercase", False) for token in run), out)
+
+def _encode_whitespace(text, out):
+    for match in _WHITESPACE_RUN_PATTERN.finditer(text):
+        run = match.group()
+        first = run[0]
+        if run == " ":
+            out.append(TAG_SPACE)
+        elif run == "\n":
+            out.append(TAG_NEWLINE)
+        elif first == " ":
+            out.append(TAG_SPACE_RUN)
+            encode_varint(len(run), out)
+        elif first == "\t":
+            out.append(TAG_TAB_RUN)
+            encode_varint(len(run), out)
+        elif first == "\n":
+            out.append(TAG_NEWLINE_RUN)
+            encode_varint(len(run), out)
+        elif run.startswith("\r\n"):
+            out.append(TAG_CRLF_RUN)
+            encode_varint(len(run) // 2, out)
+        else:
+            _encode_text(TAG_WHITESPACE, run, out)
+
+def _encode_text(tag, text, out):
+    data = text.encode("utf-8")
+    out.append(tag)
+    encode_varint(len(data), out)
+    out.extend(data)
+
+def token_text_length(token):
+    """Number of characters a token decodes to."""
+    token_type = token["type"]
+    if token_type == "C2":
+        return len(token["pattern"])
+    if token_type in ("C1", "SPACE", "NEWLINE"):
+        return 1
+    if token_type in ("WHITESPACE", "LITERAL"):
+        return len(token["text"])
+    return 0
+
+def _token_line_breaks(token):
+    token_type = token["type"]
+    if token_type == "NEWLINE":
+        return 1
+    if token_type == "WHITESPACE":
+        return token["text"].count("\n")
+    return 0
+
+def write_container(f, tokens, c2_map, index_interval=None):
+    """Streams tokens to the binary file object f as a complete container.
+
+    With index_interval=K a block index is appended after the END record:
+    a new block starts after the first line break that completes at least
+    K lines since the previous block start. Returns the number of bytes
+    written.
+    """
+    f.write(encode_header(c2_map))
+    written = HEADER_SIZE
+    buffer = bytearray()
+    batch = []
+    blocks = [(HEADER_SIZE, 0, 0)]
+    lines = chars = 0
+    for token in tokens:
+        tail = None
+        block_end = False
+        if index_interval:
+            breaks = _token_line_breaks(token)
+            if breaks:
+                lines += breaks
+                block_end = lines - blocks[-1][1] >= index_interval
+            if block_end and token["type"] == "WHITESPACE" and not token["text"].endswith("\n"):
+                # Start the next block right after the line break, so it opens with the line's indentation
+                cut = token["text"].rindex("\n") + 1
+                token, tail = {"type": "WHITESPACE", "text": token["text"][:cut]}, token["text"][cut:]
+            chars += token_text_length(token)
+        batch.append(token)
+        # Never cut a batch inside a C1 run, so the output does not depend on batching.
+        if block_end or (len(batch) >= 4096 and token["type"] != "C1"):
+            encode_tokens(batch, buffer)
+            batch = []
+            if block_end:
+                blocks.append((written + len(buffer), lines, chars))
+                if tail:
+                    batch.append({"type": "WHITESPACE", "text": tail})
+                    chars += len(tail)
+            if len(buffer) >= _WRITE_BUFFER_SIZE:
+                f.write(buffer)
+                written += len(buffer)
+                buffer = bytearray()
+    encode_tokens(batch, buffer)
+    buffer.append(TAG_END)
+    if index_interval:
+        # A block that starts at END holds no records
+        if blocks[-1][0] == written + len(buffer) - 1:
+            blocks.pop()
+        buffer.extend(encode_block_index(BlockIndex(index_interval, blocks)))
+    f.write(buffer)
+    return written + len(buffer)
+
+# --- Block Index ---
+class BlockIndex:
+    """Block start positions: record byte offset, line number and char offset of each block."""
+
+    def __init__(self, interval, blocks):
+        self.interval = interval
+        self.offsets = [block[0] for block in blocks]
+        self.lines = [block[1] for block in blocks]
+        self.chars = [block[2] for block in blocks]
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def block_for_line(self, line):
+        return bisect.bisect_right(self.lines, line) - 1
+
+    def block_for_char(self, char):
+        return bisect.bisect_right(self.chars, char) - 1
+
+def encode_block_index(index):
+    """Serializes a BlockIndex as the trailer that follows the END record.
+
+    Layout: [magic "SCI1"] [varint interval] [varint block count]
+    [block count x (varint offset, varint line, varint char), delta coded]
+    [index size:uint32 LE] [magic "SCI1"]
+    """
+    out = bytearray(INDEX_MAGIC)
+    encode_varint(index.interval, out)
+    encode_varint(len(index), out)
+    previous = (0, 0, 0)
+    for block in zip(index.offsets, index.lines, index.chars):
+        for value, last in zip(block, previous):
+            encode_varint(value - last, out)
+        previous = block
+    return bytes(out) + _INDEX_FOOTER.pack(len(out), INDEX_MAGIC)
+
+def read_block_index(f):
+    """Reads the block index from the end of a seekable container file, or None."""
+    end = f.seek(0, io.SEEK_END)
+    if end < HEADER_SIZE + _INDEX_FOOTER.size:
+        return None
+    f.seek(end - _INDEX_FOOTER.size)
+    size, magic = _INDEX_FOOTER.unpack(f.read(_INDEX_FOOTER.size))
+    if magic != INDEX_MAGIC or size > end - _INDEX_FOOTER.size:
+        return None
+    f.seek(end - _INDEX_FOOTER.size - size)
+    data = f.read(size)
+    if data[:len(INDEX_MAGIC)] != INDEX_MAGIC:
+        return None
+    interval, pos = decode_varint(data, len(INDEX_MAGIC))
+    count, pos = decode_varint(data, pos)
+    blocks = []
+    previous = (0, 0, 0)
+    for _ in range(count):
+        block = []
+        for last in previous:
+            delta, pos = decode_varint(data, pos)
+            block.append(last + delta)
+        previous = tuple(block)
+        blocks.append(previous)
+    return BlockIndex(interval, blocks)
+
+# --- Reading ---
+class _RecordReader:
+    """Buffered varint reader over a binary file object."""
+
+    def __init__(self, f):
+        self.f = f
+        self.buffer = b""
+        self.pos = 0
+
+    def _fill(self):
+        chunk = self.f.read(_READ_BUFFER_SIZE)
+        if not chunk:
+            raise ValueError("Truncated token container")
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+
+    def read_varint(self):
+        value = 0
+        shift = 0
+        while True:
+            if self.pos >= len(self.buffer):
+                self._fill()
+            byte = self.buffer[self.pos]
+            self.pos += 1
+            value |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return value
+            shift += 7
+
+    def read_bytes(self, count):
+        while len(self.buffer) - self.pos < count:
+            self._fill()
+        data = self.buffer[self.pos:self.pos + count]
+        self.pos += count
+        return data
+
+def is_container(prefix):
+    """Returns True if prefix starts with the container magic bytes."""
+    return prefix[:len(MAGIC)] == MAGIC
+
+def read_header(f, c2_map):
+    """Reads and validates the container header from f."""
+    header = f.read(HEADER_SIZE)
+    if len(header) < HEADER_SIZE or not is_container(header):
+        raise ValueError("Not a syllable token container")
+    version = header[len(MAGIC)]
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported container version {version}")
+    if header[len(MAGIC) + 1:] != library_fingerprint(c2_map):
+        raise ValueError("Container was written with a different syllable library")
+    return version
+
+def iter_tokens(f, c2_map, reverse_c2_map=None):
+    """Yields token dicts from a container file object, header included."""
+    read_header(f, c2_map)
+    return iter_records(f, c2_map, reverse_c2_map)
+
+def iter_records(f, c2_map, reverse_c2_map=None):
+    """Yields token dicts from bare records (no header) up to the END tag."""
+    if reverse_c2_map is None:
+        reverse_c2_map = build_reverse_c2_map(c2_map)
+    vowel_map, consonant_map = create_letter_cyphers()
+    reader = _RecordReader(f)
+    while True:
+        tag = reader.read_varint()
+        if tag >= C2_TAG_BASE:
+            code = tag - C2_TAG_BASE
+            syllable = reverse_c2_map.get(code >> 1)
+            if syllable is None:
+                raise ValueError(f"Unknown syllable ID {code >> 1}")
+            case_mask = reader.read_varint() if code & 1 else 0
+            yield {"type": "C2", **c2_map[syllable], "case": _unpack_bits(case_mask, len(syllable))}
+        elif tag == TAG_SPACE:
+            yield {"type": "SPACE"}
+        elif tag == TAG_NEWLINE:
+            yield {"type": "NEWLINE"}
+        elif tag == TAG_C1_RUN:
+            count = reader.read_varint()
+            chars = [chr(reader.read_varint()) for _ in range(count)]
+            upper = _unpack_bits(reader.read_varint(), count)
+            for char, is_upper in zip(chars, upper):
+                if char in vowel_map: value = vowel_map[char]
+                elif char in consonant_map: value = consonant_map[char]
+                else: value = -1
+                yield {"type": "C1", "char": char, "value": value, "is_uppercase": bool(is_upper)}
+        elif tag == TAG_CASE_TITLE:
+            yield {"type": "CASE", "mode": "title"}
+        elif tag == TAG_CASE_UPPER:
+            yield {"type": "CASE", "mode": "upper"}
+        elif tag == TAG_CASE_MIXED:
+            yield {"type": "CASE", "mode": "mixed", "mask": reader.read_varint()}
+        elif tag == TAG_SPACE_RUN:
+            yield {"type": "WHITESPACE", "text": " " * reader.read_varint()}
+        elif tag == TAG_TAB_RUN:
+            yield {"type": "WHITESPACE", "text": "\t" * reader.read_varint()}
+        elif tag == TAG_NEWLINE_RUN:
+            yield {"type": "WHITESPACE", "text": "\n" * reader.read_varint()}
+        elif tag == TAG_CRLF_RUN:
+            yield {"type": "WHITESPACE", "text": "\r\n" * reader.read_varint()}
+        elif tag == TAG_WHITESPACE:
+            yield {"type": "WHITESPACE", "text": reader.read_bytes(reader.read_varint()).decode("ascii")}
+        elif tag == TAG_LITERAL:
+            yield {"type": "LITERAL", "text": reader.read_bytes(reader.read_varint()).decode("utf-8")}
+        elif tag == TAG_LITERAL_CHAR:
+            yield {"type": "LITERAL", "text": chr(reader.read_varint())}
+        elif tag == TAG_END:
+            return
+        else:
+            raise ValueError(f"Unknown record tag {tag}")
+
+def iter_frames(f, c2_map, reverse_c2_map=None, frame_size=4096):
+    """Yields token lists from a container file object.
+
+    Frames hold about frame_size tokens and always end on a SPACE,
+    NEWLINE or WHITESPACE run, so no word (and its CASE token) is split
+    across frames.
+    """
+    frame = []
+    for token in iter_tokens(f, c2_map, reverse_c2_map):
+        frame.append(token)
+        if len(frame) >= frame_size and token["type"] in ("SPACE", "NEWLINE", "WHITESPACE"):
+            yield frame
+            frame = []
+    if frame:
+        yield frame
+
+def _skip_varint(data, pos):
+    while data[pos] & 0x80:
+        pos += 1
+    return pos + 1
+
+def decode_varint(data, pos):
+    """Reads a varint from data at pos; returns (value, position after it)."""
+    value = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+def _skip_record(data, pos):
+    """Returns (tag, position after the record) for the record at pos.
+
+    Raises IndexError if the record runs past the end of data.
+    """
+    tag, pos = decode_varint(data, pos)
+    if tag >= C2_TAG_BASE:
+        if (tag - C2_TAG_BASE) & 1:
+            pos = _skip_varint(data, pos)
+    elif tag == TAG_C1_RUN:
+        count, pos = decode_varint(data, pos)
+        for _ in range(count + 1):
+            pos = _skip_varint(data, pos)
+    elif TAG_CASE_MIXED <= tag <= TAG_CRLF_RUN or tag == TAG_LITERAL_CHAR:
+        pos = _skip_varint(data, pos)
+    elif tag == TAG_WHITESPACE or tag == TAG_LITERAL:
+        length, pos = decode_varint(data, pos)
+        pos += length
+    if pos > len(data):
+        raise IndexError("record past end of data")
+    return tag, pos
+
+_LINE_BREAK_TAGS = (TAG_NEWLINE, TAG_NEWLINE_RUN, TAG_CRLF_RUN)
+_WORD_BREAK_TAGS = frozenset((TAG_SPACE, TAG_NEWLINE, TAG_SPACE_RUN, TAG_TAB_RUN, TAG_NEWLINE_RUN, TAG_CRLF_RUN,
+                              TAG_WHITESPACE, TAG_LITERAL, TAG_LITERAL_CHAR))
+
+def scan_records(data, pos=0):
+    """Scans the complete records in data (no header) from pos.
+
+    Returns (cut, end): cut is the position after the last record that
+    ends a word, so data[pos:cut] decodes on its own with decode_records();
+    end is the position of the END record, or None if it is not in data.
+    """
+    cut = pos
+    try:
+        while pos < len(data):
+            tag, next_pos = _skip_record(data, pos)
+            if tag == TAG_END:
+                return pos, pos
+            pos = next_pos
+            if tag in _WORD_BREAK_TAGS:
+                cut = pos
+    except IndexError:
+        pass
+    return cut, None
+
+def split_records(f, segment_size=1 << 20):
+    """Splits the records after the header into raw segments ending on a line break.
+
+    Each yielded bytes object holds whole records (no END tag) and can be
+    decoded on its own with decode_records(). Segments are cut at the first
+    line break record after segment_size bytes, so no word spans
+    two segments.
+    """
+    data = b""
+    pos = 0
+    while True:
+        chunk = f.read(segment_size)
+        data += chunk
+        cut = 0
+        try:
+            while pos < len(data):
+                tag, next_pos = _skip_record(data, pos)
+                if tag == TAG_END:
+                    if pos > cut:
+                        yield data[cut:pos]
+                    return
+                pos = next_pos
+                if tag in _LINE_BREAK_TAGS and pos - cut >= segment_size:
+                    yield data[cut:pos]
+                    cut = pos
+        except IndexError:
+            pass
+        if not chunk:
+            raise ValueError("Truncated token container")
+        data = data[cut:]
+        pos -= cut
+
+def decode_records(records, c2_map, reverse_c2_map=None):
+    """Decodes a raw record segment from split_records() into a token list."""
+    return list(iter_records(io.BytesIO(records + bytes([TAG_END])), c2_map, reverse_c2_map))
+
+def read_container(f, c2_map, reverse_c2_map=None):
+    """Reads a whole container into a token list."""
+    return list(iter_tokens(f, c2_map, reverse_c2_map))
+
+# --- Random Access ---
+def _seek_block(f, c2_map, index, block):
+    """Positions f at the first record of block; returns (line, char) at its start."""
+    if index is None:
+        f.seek(0)
+        read_header(f, c2_map)
+        return 0, 0
+    f.seek(index.offsets[block])
+    return index.lines[block], index.chars[block]
+
+def _decode_until(f, c2_map, reverse_c2_map, done):
+    """Decodes records from f until done(lines, chars) holds at a word boundary."""
+    tokens = []
+    lines = chars = 0
+    for token in iter_records(f, c2_map, reverse_c2_map):
+        tokens.append(token)
+        chars += token_text_length(token)
+        lines += _token_line_breaks(token)
+        if token["type"] not in ("C1", "C2", "CASE") and done(lines, chars):
+            break
+    return decompress(tokens, c2_map, reverse_c2_map=reverse_c2_map)
+
+def read_lines(f, c2_map, start, count, reverse_c2_map=None, index=None):
+    """Returns lines start .. start + count - 1 (with their line breaks) from a container.
+
+    f must be a seekable binary file object. Only the blocks holding the
+    requested lines are decoded when the container has a block index;
+    otherwise decoding starts at the first record.
+    """
+    if index is None:
+        index = read_block_index(f)
+    if reverse_c2_map is None:
+        reverse_c2_map = build_reverse_c2_map(c2_map)
+    block_line, _ = _seek_block(f, c2_map, index, 0 if index is None else index.block_for_line(start))
+    needed = start + count - block_line
+    text = _decode_until(f, c2_map, reverse_c2_map, lambda lines, chars: lines >= needed)
+    lines = [line + "\n" for line in text.split("\n")]
+    lines[-1] = lines[-1][:-1]
+    if not lines[-1]:
+        lines.pop()
+    return lines[start - block_line:needed]
+
+def read_range(f, c2_map, char_start, char_end, reverse_c2_map=None, index=None):
+    """Returns text[char_start:char_end] of a container, decoding only the blocks needed.
+
+    f must be a seekable binary file object; see read_lines().
+    """
+    if index is None:
+        index = read_block_index(f)
+    if reverse_c2_map is None:
+        reverse_c2_map = build_reverse_c2_map(c2_map)
+    _, block_char = _seek_block(f, c2_map, index, 0 if index is None else index.block_for_char(char_start))
+    needed = char_end - block_char
+    text = _decode_until(f, c2_map, reverse_c2_map, lambda lines, chars: chars >= needed)
+    return text[char_start - block_char:needed]
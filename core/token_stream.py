@@ -0,0 +1,304 @@
+"""
+Token Stream - compact, array-backed token lists for core.compressor.
+
+compress() returns one dict per token, and every C2 dict copies the
+syllable's pattern, letter values and six multipliers. A TokenStream
+stores the same tokens as parallel columns instead:
+
+    kinds     array('B')  token kind; bit 0x80 marks tokens carrying a
+                          per-token case field (case_model="char")
+    values    array('I')  C2 syllable ID, C1 codepoint, CASE mixed mask,
+                          or the literal buffer offset of WHITESPACE/LITERAL
+    cases     array('I')  C2 case bits, C1 upper-case bit, or the length
+                          of a WHITESPACE/LITERAL text
+    literals  one str buffer holding all WHITESPACE/LITERAL text
+
+Pass one to compress() as out= to fill it without building token dicts.
+Indexing and iteration produce today's dict form on demand, so existing
+consumers (decompress(), encode_tokens(), JSON dumps) keep working;
+text() and encode_records() work on the columns directly.
+"""
+
+from array import array
+
+from core.compressor import apply_word_case, build_reverse_c2_map, create_letter_cyphers
+from core.token_container import (
+    encode_varint,
+    _encode_whitespace,
+    _encode_text,
+    TAG_SPACE,
+    TAG_NEWLINE,
+    TAG_C1_RUN,
+    TAG_CASE_TITLE,
+    TAG_CASE_UPPER,
+    TAG_CASE_MIXED,
+    TAG_LITERAL,
+    TAG_LITERAL_CHAR,
+    C2_TAG_BASE,
+)
+
+KIND_SPACE = 1
+KIND_NEWLINE = 2
+KIND_C1 = 3
+KIND_CASE_TITLE = 4
+KIND_CASE_UPPER = 5
+KIND_CASE_MIXED = 6
+KIND_WHITESPACE = 7
+KIND_LITERAL = 8
+KIND_C2 = 16
+HAS_CASE = 0x80
+
+_CASE_KINDS = {"title": KIND_CASE_TITLE, "upper": KIND_CASE_UPPER, "mixed": KIND_CASE_MIXED}
+_CASE_TAGS = {KIND_CASE_TITLE: TAG_CASE_TITLE, KIND_CASE_UPPER: TAG_CASE_UPPER, KIND_CASE_MIXED: TAG_CASE_MIXED}
+_KIND_MODES = {KIND_CASE_TITLE: "title", KIND_CASE_UPPER: "upper", KIND_CASE_MIXED: "mixed"}
+_WIDE_MASK = 0xFFFFFFFF
+
+def _mask(bits):
+    mask = 0
+    for i, bit in enumerate(bits):
+        if bit:
+            mask |= 1 << i
+    return mask
+
+class TokenStream:
+    """Array-backed token list; see the module docstring for the layout."""
+
+    def __init__(self, c2_map, reverse_c2_map=None):
+        self.c2_map = c2_map
+        self.reverse_c2_map = reverse_c2_map if reverse_c2_map is not None else build_reverse_c2_map(c2_map)
+        self.kinds = array("B")
+        self.values = array("I")
+        self.cases = array("I")
+        self._literal_parts = []
+        self._literal_size = 0
+        self._literals = ""
+        # CASE mixed masks that do not fit 32 bits (words over 32 letters), by token index
+        self._wide_masks = {}
+        self._vowel_map, self._consonant_map = create_letter_cyphers()
+
+    # --- Building ---
+    def _push(self, kind, value=0, case=0):
+        self.kinds.append(kind)
+        self.values.append(value)
+        self.cases.append(case)
+
+    def _push_literal(self, kind, text):
+        self._push(kind, self._literal_size, len(text))
+        self._literal_parts.append(text)
+        self._literal_size += len(text)
+
+    def append(self, token):
+        """Appends one token in dict form."""
+        token_type = token["type"]
+        if token_type == "C2":
+            if "case" in token:
+                self._push(KIND_C2 | HAS_CASE, token["base_value"], _mask(token["case"]))
+            else:
+                self._push(KIND_C2, token["base_value"])
+        elif token_type == "C1":
+            if "is_uppercase" in token:
+                self._push(KIND_C1 | HAS_CASE, ord(token["char"]), 1 if token["is_uppercase"] else 0)
+            else:
+                self._push(KIND_C1, ord(token["char"]))
+        elif token_type == "SPACE":
+            self._push(KIND_SPACE)
+        elif token_type == "NEWLINE":
+            self._push(KIND_NEWLINE)
+        elif token_type == "CASE":
+            kind = _CASE_KINDS[token["mode"]]
+            mask = token.get("mask", 0)
+            if mask > _WIDE_MASK - 1:
+                self._wide_masks[len(self.kinds)] = mask
+                mask = _WIDE_MASK
+            self._push(kind, mask)
+        elif token_type == "WHITESPACE":
+            self._push_literal(KIND_WHITESPACE, token["text"])
+        elif token_type == "LITERAL":
+            self._push_literal(KIND_LITERAL, token["text"])
+        else:
+            raise ValueError(f"Unknown token type: {token_type!r}")
+
+    def extend(self, tokens):
+        for token in tokens:
+            self.append(token)
+
+    def extend_word(self, word, templates, per_char_case):
+        """Appends a segmented word's tokens (see core.compressor._word_templates) without dicts."""
+        push = self._push
+        for idx, length, template in templates:
+            if template["type"] == "C2":
+                if per_char_case:
+                    push(KIND_C2 | HAS_CASE, template["base_value"], _mask(c.isupper() for c in word[idx:idx + length]))
+                else:
+                    push(KIND_C2, template["base_value"])
+            elif per_char_case:
+                push(KIND_C1 | HAS_CASE, ord(template["char"]), 1 if word[idx].isupper() else 0)
+            else:
+                push(KIND_C1, ord(template["char"]))
+
+    # --- Views ---
+    def __len__(self):
+        return len(self.kinds)
+
+    @property
+    def literals(self):
+        """The literal buffer: all WHITESPACE/LITERAL text, concatenated."""
+        if self._literal_parts:
+            self._literals += "".join(self._literal_parts)
+            self._literal_parts = []
+        return self._literals
+
+    @property
+    def nbytes(self):
+        """Approximate memory used by the columns and literal buffer."""
+        columns = sum(column.itemsize * len(column) for column in (self.kinds, self.values, self.cases))
+        return columns + self._literal_size * 4
+
+    def _syllable(self, syllable_id):
+        syllable = self.reverse_c2_map.get(syllable_id)
+        if syllable is None:
+            raise ValueError(f"Unknown syllable ID {syllable_id}")
+        return syllable
+
+    def _case_mask(self, index):
+        mask = self.values[index]
+        return self._wide_masks[index] if mask == _WIDE_MASK and index in self._wide_masks else mask
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        kind = self.kinds[index]
+        base = kind & ~HAS_CASE
+        value = self.values[index]
+        if base == KIND_C2:
+            syllable = self._syllable(value)
+            token = {"type": "C2", **self.c2_map[syllable]}
+            if kind & HAS_CASE:
+                case = self.cases[index]
+                token["case"] = [(case >> i) & 1 for i in range(len(syllable))]
+            return token
+        if base == KIND_C1:
+            char = chr(value)
+            if char in self._vowel_map: cypher = self._vowel_map[char]
+            elif char in self._consonant_map: cypher = self._consonant_map[char]
+            else: cypher = -1
+            token = {"type": "C1", "char": char, "value": cypher}
+            if kind & HAS_CASE:
+                token["is_uppercase"] = bool(self.cases[index])
+            return token
+        if base == KIND_SPACE:
+            return {"type": "SPACE"}
+        if base == KIND_NEWLINE:
+            return {"type": "NEWLINE"}
+        if base == KIND_CASE_TITLE:
+            return {"type": "CASE", "mode": "title"}
+        if base == KIND_CASE_UPPER:
+            return {"type": "CASE", "mode": "upper"}
+        if base == KIND_CASE_MIXED:
+            return {"type": "CASE", "mode": "mixed", "mask": self._case_mask(index)}
+        text = self.literals[value:value + self.cases[index]]
+        return {"type": "WHITESPACE" if base == KIND_WHITESPACE else "LITERAL", "text": text}
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def to_tokens(self):
+        """Returns the tokens as a list of dicts (today's compress() output)."""
+        return list(self)
+
+    # --- Direct Decoding ---
+    def text(self):
+        """Decodes the stream to text without building token dicts."""
+        parts = []
+        literals = self.literals
+        syllable = self._syllable
+        kinds, values, cases = self.kinds, self.values, self.cases
+        word_case = None
+        word_start = 0
+        for index in range(len(kinds)):
+            kind = kinds[index]
+            base = kind & ~HAS_CASE
+            if word_case is not None and base not in (KIND_C1, KIND_C2):
+                word = "".join(parts[word_start:])
+                del parts[word_start:]
+                parts.append(apply_word_case(word, *word_case))
+                word_case = None
+            if base == KIND_C2:
+                piece = syllable(values[index])
+                case = cases[index]
+                if case:
+                    piece = "".join(c.upper() if (case >> i) & 1 else c for i, c in enumerate(piece))
+                parts.append(piece)
+            elif base == KIND_C1:
+                char = chr(values[index])
+                parts.append(char.upper() if cases[index] else char)
+            elif base == KIND_SPACE:
+                parts.append(" ")
+            elif base == KIND_NEWLINE:
+                parts.append("\n")
+            elif base in (KIND_WHITESPACE, KIND_LITERAL):
+                start = values[index]
+                parts.append(literals[start:start + cases[index]])
+            else:
+                word_case = (_KIND_MODES[base], self._case_mask(index) if base == KIND_CASE_MIXED else 0)
+                word_start = len(parts)
+        if word_case is not None:
+            word = "".join(parts[word_start:])
+            del parts[word_start:]
+            parts.append(apply_word_case(word, *word_case))
+        return "".join(parts)
+
+    def encode_records(self, out=None):
+        """Encodes the stream as container records (like encode_tokens()) straight from the columns."""
+        if out is None:
+            out = bytearray()
+        literals = self.literals
+        kinds, values, cases = self.kinds, self.values, self.cases
+        count = len(kinds)
+        index = 0
+        while index < count:
+            kind = kinds[index]
+            base = kind & ~HAS_CASE
+            value = values[index]
+            if base == KIND_C2:
+                case = cases[index]
+                if case:
+                    encode_varint(C2_TAG_BASE + (value << 1 | 1), out)
+                    encode_varint(case, out)
+                else:
+                    encode_varint(C2_TAG_BASE + (value << 1), out)
+            elif base == KIND_C1:
+                end = index
+                while end < count and kinds[end] & ~HAS_CASE == KIND_C1:
+                    end += 1
+                out.append(TAG_C1_RUN)
+                encode_varint(end - index, out)
+                upper = 0
+                for offset in range(end - index):
+                    encode_varint(values[index + offset], out)
+                    if cases[index + offset]:
+                        upper |= 1 << offset
+                encode_varint(upper, out)
+                index = end
+                continue
+            elif base == KIND_SPACE:
+                out.append(TAG_SPACE)
+            elif base == KIND_NEWLINE:
+                out.append(TAG_NEWLINE)
+            elif base == KIND_WHITESPACE:
+                _encode_whitespace(literals[value:value + cases[index]], out)
+            elif base == KIND_LITERAL:
+                if cases[index] == 1:
+                    out.append(TAG_LITERAL_CHAR)
+                    encode_varint(ord(literals[value]), out)
+                else:
+                    _encode_text(TAG_LITERAL, literals[value:value + cases[index]], out)
+            else:
+                out.append(_CASE_TAGS[base])
+                if base == KIND_CASE_MIXED:
+                    encode_varint(self._case_mask(index), out)
+            index += 1
+        return out
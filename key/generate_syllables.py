@@ -1,8 +1,16 @@
 # key/generate_syllables.py
 
+import json
+import os
+import re
+import sys
+from collections import Counter
+
 VOWELS = "aeiou"
 CONSONANTS = "bcdfghjklmnpqrstvwxyz"
 
+WORD_PATTERN = re.compile(r"[a-z]+")
+
 def generate_syllables():
     """
     Generates a comprehensive list of syllables from Vowel/Consonant combinations.
@@ -14,7 +22,7 @@ def generate_syllables():
         for v in VOWELS:
             for c2 in CONSONANTS:
                 syllables.add(c1 + v + c2)
-    
+
     # CV (e.g., "be")
     for c in CONSONANTS:
         for v in VOWELS:
@@ -34,12 +42,138 @@ def generate_syllables():
 
     return sorted(list(syllables)) # Return as a sorted list
 
+# --- Corpus Training ---
+def count_corpus_words(texts):
+    """Counts lowercase ASCII words across an iterable of texts."""
+    counts = Counter()
+    for text in texts:
+        counts.update(WORD_PATTERN.findall(text.lower()))
+    return counts
+
+def _segment_usage(word_counts, syllables):
+    """Greedy-segments every word; returns tokens emitted per syllable and C1 count."""
+    from core.compressor import SyllableTrie
+
+    trie = SyllableTrie(syllables)
+    usage = Counter()
+    fallbacks = 0
+    for word, count in word_counts.items():
+        idx = 0
+        while idx < len(word):
+            length = trie.longest_match(word, idx)
+            if length:
+                usage[word[idx:idx + length]] += count
+                idx += length
+            else:
+                fallbacks += count
+                idx += 1
+    return usage, fallbacks
+
+def train_syllables(word_counts, size=2450, min_length=2, max_length=4, rounds=4):
+    """
+    Picks the `size` syllables that remove the most C1 fallbacks on a corpus.
+
+    Candidates are the generated V/C syllables plus every corpus substring
+    of min_length..max_length letters. Each round segments the corpus with
+    the current selection, keeps the syllables that actually cover
+    characters and refills the rest with the best untried candidates.
+    Returns the selection ranked by tokens emitted, most first: every C2
+    token costs one varint whatever its length, so the smallest IDs go to
+    the syllables emitted most often.
+    """
+    candidate_scores = Counter()
+    for word, count in word_counts.items():
+        for length in range(min_length, max_length + 1):
+            for i in range(len(word) - length + 1):
+                candidate_scores[word[i:i + length]] += count * (length - 1)
+    for syllable in generate_syllables():
+        candidate_scores[syllable] += 0
+
+    ranked_candidates = [syllable for syllable, _ in candidate_scores.most_common()]
+    selected = ranked_candidates[:size]
+    tried = set(selected)
+    next_candidate = size
+    usage = Counter()
+    for _ in range(rounds):
+        usage, _ = _segment_usage(word_counts, selected)
+        kept = [syllable for syllable in selected if usage[syllable] > 0]
+        while len(kept) < size and next_candidate < len(ranked_candidates):
+            candidate = ranked_candidates[next_candidate]
+            next_candidate += 1
+            if candidate not in tried:
+                tried.add(candidate)
+                kept.append(candidate)
+        if kept == selected:
+            break
+        selected = kept
+    usage, _ = _segment_usage(word_counts, selected)
+    return sorted(selected, key=lambda syllable: (-usage[syllable], syllable))
+
+def library_stats(syllables, word_counts):
+    """Coverage and tokens-per-word statistics for a library on a corpus."""
+    usage, fallbacks = _segment_usage(word_counts, syllables)
+    total_chars = sum(len(word) * count for word, count in word_counts.items())
+    total_words = sum(word_counts.values())
+    syllable_tokens = sum(usage.values())
+    return {
+        "syllables": len(syllables),
+        "words": total_words,
+        "letters": total_chars,
+        "coverage": (total_chars - fallbacks) / total_chars if total_chars else 0.0,
+        "c1_fallbacks": fallbacks,
+        "avg_tokens_per_word": (syllable_tokens + fallbacks) / total_words if total_words else 0.0,
+        "unused_syllables": sum(1 for syllable in syllables if not usage[syllable]),
+    }
+
+def _read_library(path):
+    with open(path, "r") as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+def _read_corpus(paths):
+    for path in paths:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            for chunk in iter(lambda: f.read(1 << 20), ""):
+                yield chunk
+
 if __name__ == "__main__":
-    syllable_list = generate_syllables()
-    
-    # Save the list to a file
-    with open("key/syllable_library.txt", "w") as f:
-        for syllable in syllable_list:
-            f.write(syllable + "\n")
-
-    print(f"Generated {len(syllable_list)} syllables and saved to key/syllable_library.txt")
+    import argparse
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from core.compressor import RANKED_LIBRARY_HEADER
+
+    parser = argparse.ArgumentParser(description="Generate, train or evaluate a syllable library.")
+    parser.add_argument("--train", nargs="+", metavar="CORPUS", help="Train a frequency-ranked library on corpus files.")
+    parser.add_argument("--evaluate", metavar="LIBRARY", help="Report stats for an existing library on --corpus files.")
+    parser.add_argument("--corpus", nargs="+", default=[], help="Corpus files for --evaluate.")
+    parser.add_argument("--size", type=int, default=2450, help="Number of syllables to keep when training.")
+    parser.add_argument("--output", default="key/syllable_library.txt", help="Library file to write.")
+    parser.add_argument("--stats", help="Also write the library stats as JSON to this path.")
+    args = parser.parse_args()
+
+    if args.evaluate:
+        stats = library_stats(_read_library(args.evaluate), count_corpus_words(_read_corpus(args.corpus)))
+    elif args.train:
+        word_counts = count_corpus_words(_read_corpus(args.train))
+        syllable_list = train_syllables(word_counts, args.size)
+        with open(args.output, "w") as f:
+            f.write(RANKED_LIBRARY_HEADER + "\n")
+            for syllable in syllable_list:
+                f.write(syllable + "\n")
+        print(f"Trained {len(syllable_list)} syllables and saved to {args.output}")
+        stats = library_stats(syllable_list, word_counts)
+    else:
+        syllable_list = generate_syllables()
+
+        # Save the list to a file
+        with open(args.output, "w") as f:
+            for syllable in syllable_list:
+                f.write(syllable + "\n")
+
+        print(f"Generated {len(syllable_list)} syllables and saved to {args.output}")
+        stats = None
+
+    if stats is not None:
+        print(json.dumps(stats, indent=2))
+        if args.stats:
+            with open(args.stats, "w") as f:
+                json.dump(stats, f, indent=2)
@@ -4,16 +4,31 @@ Comprehensive test suite for the Cyclic Cypher Compressor.
 Tests compression/decompression roundtrip and case preservation.
 """
 
+import io
 import os
 import json
 import sys
 from core.compressor import (
     load_syllable_library,
+    load_syllable_ranking,
     create_letter_cyphers,
     create_syllable_cypher_map,
     compress,
-    decompress
+    decompress,
+    build_syllable_trie,
+    build_reverse_c2_map,
+    compress_stream,
+    decompress_stream,
+    WordTokenCache,
+    RANKED_LIBRARY_HEADER,
 )
+from core.token_container import write_container, read_container
+from core.codec_artifact import load_codec_artifact
+from core.parallel_codec import compress_parallel, decompress_parallel, iter_line_segments
+from core.entropy_coder import entropy_encode, entropy_decode, huffman_code_lengths
+from core.syllable_codec import SyllableCodec, get_syllable_codec
+from core.batch_codec import compress_many, decompress_many, decompress_one, CompressedBatch
+from key.generate_syllables import count_corpus_words, train_syllables, library_stats
 
 def test_case_preservation():
     """Test that case is preserved during compression/decompression."""
@@ -96,6 +111,855 @@ def test_compression_ratio():
         print("test_document.txt not found - skipping compression ratio test")
         return True
 
+def test_trie_longest_match():
+    """Test that the trie agrees with a linear longest-first library scan."""
+    print("\n=== Testing Trie Longest Match ===")
+
+    syllable_library = load_syllable_library()
+    trie = build_syllable_trie(syllable_library)
+
+    words = ["the", "compression", "strength", "rhythm", "queue", "xylophone", "a", "q"]
+    for word in words:
+        for start in range(len(word)):
+            expected = 0
+            for syllable in syllable_library:
+                if word.startswith(syllable, start):
+                    expected = len(syllable)
+                    break
+            assert trie.longest_match(word, start) == expected, (word, start)
+
+    print("✓ PASS: Trie matches linear scan")
+    return True
+
+def test_reverse_map_decoding():
+    """Test base_value lookup and the optional C2 integrity check."""
+    print("\n=== Testing Reverse C2 Map ===")
+
+    syllable_library = load_syllable_library()
+    vowel_map, consonant_map = create_letter_cyphers()
+    c2_map = create_syllable_cypher_map(syllable_library, vowel_map, consonant_map)
+    reverse_c2_map = build_reverse_c2_map(c2_map)
+
+    test_text = "Reverse lookups Decode QUICKLY"
+    compressed = compress(test_text, c2_map, vowel_map, consonant_map, syllable_library)
+    assert decompress(compressed, c2_map, reverse_c2_map=reverse_c2_map, verify=True) == test_text
+
+    tampered = [dict(block) for block in compressed]
+    first_c2 = next(block for block in tampered if block["type"] == "C2")
+    first_c2["pattern"] = first_c2["pattern"] + "V"
+    try:
+        decompress(tampered, c2_map, reverse_c2_map=reverse_c2_map, verify=True)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("tampered C2 block was not rejected")
+
+    print("✓ PASS: Reverse map decodes and verifies")
+    return True
+
+def test_binary_container_roundtrip():
+    """Test that the binary container reproduces the token list exactly."""
+    print("\n=== Testing Binary Token Container ===")
+
+    syllable_library = load_syllable_library()
+    vowel_map, consonant_map = create_letter_cyphers()
+    c2_map = create_syllable_cypher_map(syllable_library, vowel_map, consonant_map)
+
+    test_text = "The QUICK brown fox, 42 jumps!\nÜber café Zzz"
+    compressed = compress(test_text, c2_map, vowel_map, consonant_map, syllable_library)
+
+    buffer = io.BytesIO()
+    size = write_container(buffer, compressed, c2_map)
+    buffer.seek(0)
+    restored = read_container(buffer, c2_map)
+
+    json_size = len(json.dumps(compressed, indent=2).encode('utf-8'))
+    print(f"Binary size: {size} bytes (JSON: {json_size} bytes)")
+    assert size == len(buffer.getvalue())
+    assert restored == compressed
+    assert decompress(restored, c2_map) == test_text
+
+    print("✓ PASS: Container round-trip is exact")
+    return True
+
+def test_streaming_chunks():
+    """Test that chunked streaming matches whole-text compression."""
+    print("\n=== Testing Streaming Compression ===")
+
+    syllable_library = load_syllable_library()
+    vowel_map, consonant_map = create_letter_cyphers()
+    c2_map = create_syllable_cypher_map(syllable_library, vowel_map, consonant_map)
+
+    test_text = "  Streaming   words across\nchunk boundaries  \n\nMust Survive intact "
+    expected = compress(test_text, c2_map, vowel_map, consonant_map, syllable_library)
+    assert decompress(expected, c2_map) == test_text
+
+    for chunk_size in (1, 3, 7, len(test_text)):
+        chunks = [test_text[i:i + chunk_size] for i in range(0, len(test_text), chunk_size)]
+        frames = list(compress_stream(chunks, c2_map, vowel_map, consonant_map, syllable_library))
+        assert [token for frame in frames for token in frame] == expected, chunk_size
+        assert "".join(decompress_stream(frames, c2_map)) == test_text
+
+    frames = compress_stream(io.StringIO(test_text), c2_map, vowel_map, consonant_map, syllable_library)
+    assert [token for frame in frames for token in frame] == expected
+
+    # Words longer than the pending cap are cut mid-word; a lowercase continuation must not pick up
+    # the case of the word's first part
+    import core.compressor
+    mixed_text = "Abcdefgh1xy QUIETlylowercase mIxEdCaSeWordxyz Titleonlythenlower\n" * 3
+    max_pending = core.compressor.MAX_PENDING
+    core.compressor.MAX_PENDING = 5
+    try:
+        for case_model in ("word", "char"):
+            for runs in (False, True):
+                frames = list(compress_stream(list(mixed_text), c2_map, vowel_map, consonant_map, syllable_library,
+                                              case_model=case_model, runs=runs))
+                assert decompress([token for frame in frames for token in frame], c2_map) == mixed_text
+        codec = SyllableCodec()
+        assert codec.decompress(codec.compress(io.StringIO(mixed_text))) == mixed_text
+    finally:
+        core.compressor.MAX_PENDING = max_pending
+
+    print("✓ PASS: Streamed frames match whole-text compression")
+    return True
+
+def test_codec_artifact():
+    """Test that the mapped artifact matches the in-memory tables and tracks the source."""
+    print("\n=== Testing Codec Artifact ===")
+    import shutil
+    import tempfile
+
+    syllable_library = load_syllable_library()
+    vowel_map, consonant_map = create_letter_cyphers()
+    c2_map = create_syllable_cypher_map(syllable_library, vowel_map, consonant_map)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        library_path = os.path.join(temp_dir, "syllables.txt")
+        shutil.copy("key/syllable_library.txt", library_path)
+
+        artifact = load_codec_artifact(library_path)
+        assert os.path.exists(os.path.join(temp_dir, "syllables.sca"))
+        assert artifact.syllable_library == syllable_library
+        assert dict(artifact.c2_map) == c2_map
+
+        test_text = "Mapped tables Compress the SAME way"
+        compressed = compress(test_text, artifact.c2_map, artifact.vowel_map, artifact.consonant_map,
+                              artifact.syllable_library, artifact.trie)
+        assert compressed == compress(test_text, c2_map, vowel_map, consonant_map, syllable_library)
+        assert decompress(compressed, artifact.c2_map, reverse_c2_map=artifact.reverse_c2_map) == test_text
+        artifact.close()
+
+        with open(library_path, "a") as f:
+            f.write("zzzz\n")
+        rebuilt = load_codec_artifact(library_path)
+        assert "zzzz" in rebuilt.c2_map
+        rebuilt.close()
+
+        # Unwritable artifact location: one temporary artifact per library, shared across loads
+        unwritable = os.path.join(temp_dir, "missing", "syllables.sca")
+        first = load_codec_artifact(library_path, unwritable)
+        second = load_codec_artifact(library_path, unwritable)
+        assert first.path == second.path and os.path.dirname(first.path) == tempfile.gettempdir()
+        assert "zzzz" in second.c2_map
+        first.close()
+        second.close()
+        os.remove(first.path)
+
+    print("✓ PASS: Artifact matches in-memory tables")
+    return True
+
+def test_word_case_model():
+    """Test word-level case modes against the per-character model."""
+    print("\n=== Testing Word Case Model ===")
+
+    syllable_library = load_syllable_library()
+    vowel_map, consonant_map = create_letter_cyphers()
+    c2_map = create_syllable_cypher_map(syllable_library, vowel_map, consonant_map)
+
+    test_text = "plain Title UPPER McDonald MiXeD o'neil Straße ǅemal 42x"
+    compressed = compress(test_text, c2_map, vowel_map, consonant_map, syllable_library, case_model="word")
+    modes = [block["mode"] for block in compressed if block["type"] == "CASE"]
+    assert modes[:4] == ["title", "upper", "mixed", "mixed"], modes
+    assert not any("case" in block or "is_uppercase" in block for block in compressed)
+    assert decompress(compressed, c2_map) == test_text
+
+    buffer = io.BytesIO()
+    write_container(buffer, compressed, c2_map)
+    buffer.seek(0)
+    assert decompress(read_container(buffer, c2_map), c2_map) == test_text
+
+    char_model = compress(test_text, c2_map, vowel_map, consonant_map, syllable_library)
+    char_buffer = io.BytesIO()
+    write_container(char_buffer, char_model, c2_map)
+    print(f"Word model: {len(buffer.getvalue())} bytes, char model: {len(char_buffer.getvalue())} bytes")
+
+    print("✓ PASS: Word case model round-trips")
+    return True
+
+def test_parallel_matches_serial():
+    """Test that multi-process output is byte-identical to the serial path."""
+    print("\n=== Testing Parallel Compression ===")
+
+    syllable_library = load_syllable_library()
+    vowel_map, consonant_map = create_letter_cyphers()
+    c2_map = create_syllable_cypher_map(syllable_library, vowel_map, consonant_map)
+
+    test_text = "\n".join(f"Line {i}: the Quick brown FOX, jumps {i * 7} times" for i in range(200)) + "\n tail"
+    serial = io.BytesIO()
+    write_container(serial, compress(test_text, c2_map, vowel_map, consonant_map, syllable_library, case_model="word"), c2_map)
+
+    for jobs in (1, 2):
+        data = compress_parallel(test_text, jobs=jobs, case_model="word", segment_size=256)
+        assert data == serial.getvalue(), jobs
+        assert decompress_parallel(data, jobs=jobs, segment_size=256) == test_text, jobs
+
+    # Without newlines, segments are cut at word boundaries and the output stays identical
+    one_line = " ".join(f"word{i} Quick" for i in range(400))
+    serial = io.BytesIO()
+    write_container(serial, compress(one_line, c2_map, vowel_map, consonant_map, syllable_library, case_model="word"),
+                    c2_map)
+    segments = list(iter_line_segments(io.StringIO(one_line), segment_size=256))
+    assert "".join(segments) == one_line and max(map(len, segments)) < 256 * 5
+    assert compress_parallel(one_line, jobs=1, case_model="word", segment_size=256) == serial.getvalue()
+
+    # No word boundary at all: the mid-word cut must not spread the first part's case
+    for unbroken in ("Abcdefgh1xyzwvuabc", "UPPERCASEthenlowercase1Title"):
+        for jobs in (1, 2):
+            data = compress_parallel(unbroken, jobs=jobs, case_model="word", segment_size=2)
+            assert decompress_parallel(data, jobs=jobs) == unbroken, (unbroken, jobs)
+
+    print("✓ PASS: Parallel output matches serial output")
+    return True
+
+def test_optimal_segmentation():
+    """Test that optimal segmentation round-trips and never encodes larger than greedy."""
+    print("\n=== Testing Optimal Segmentation ===")
+
+    syllable_library = load_syllable_library()
+    vowel_map, consonant_map = create_letter_cyphers()
+    c2_map = create_syllable_cypher_map(syllable_library, vowel_map, consonant_map)
+
+    for word in ["strengths", "compression", "rhythmically", "Extraordinary", "queueing", "a1b2"]:
+        sizes = {}
+        for segmentation in ("greedy", "optimal"):
+            compressed = compress(word, c2_map, vowel_map, consonant_map, syllable_library,
+                                  case_model="word", segmentation=segmentation)
+            assert decompress(compressed, c2_map) == word
+            buffer = io.BytesIO()
+            sizes[segmentation] = write_container(buffer, compressed, c2_map)
+        assert sizes["optimal"] <= sizes["greedy"], (word, sizes)
+
+    print("✓ PASS: Optimal segmentation is never larger")
+    return True
+
+def test_entropy_coding():
+    """Test that the Huffman stage restores the exact container and shrinks it."""
+    print("\n=== Testing Entropy Coding ===")
+
+    syllable_library = load_syllable_library()
+    vowel_map, consonant_map = create_letter_cyphers()
+    c2_map = create_syllable_cypher_map(syllable_library, vowel_map, consonant_map)
+
+    test_text = "\n".join(["The cat sat on the mat, then THE cat ran 3 laps."] * 50 + ["Ünïcode ok"])
+    buffer = io.BytesIO()
+    write_container(buffer, compress(test_text, c2_map, vowel_map, consonant_map, syllable_library,
+                                     case_model="word"), c2_map)
+    container = buffer.getvalue()
+    coded = entropy_encode(container)
+    print(f"Container: {len(container)} bytes, entropy coded: {len(coded)} bytes")
+    assert entropy_decode(coded) == container
+    assert len(coded) < len(container)
+
+    skewed = {symbol: 2 ** symbol for symbol in range(40)}
+    assert max(huffman_code_lengths(skewed, max_length=15).values()) <= 15
+
+    print("✓ PASS: Entropy coding is lossless")
+    return True
+
+def test_trained_library():
+    """Test corpus training, frequency-ranked IDs and library stats."""
+    print("\n=== Testing Trained Library ===")
+    import tempfile
+
+    corpus = ["the compression of the corpus, then the decompression"] * 20 + ["other rare words"]
+    word_counts = count_corpus_words(corpus)
+    trained = train_syllables(word_counts, size=40)
+    stats = library_stats(trained, word_counts)
+    baseline = library_stats(load_syllable_library(), word_counts)
+    print(f"Coverage: trained {stats['coverage']:.3f}, generated {baseline['coverage']:.3f}")
+    assert len(trained) <= 40
+    assert stats["avg_tokens_per_word"] < baseline["avg_tokens_per_word"]
+
+    # IDs follow how often each syllable is emitted, not how many characters it covers
+    from key.generate_syllables import _segment_usage
+    usage, _ = _segment_usage(word_counts, trained)
+    emitted = [usage[syllable] for syllable in trained]
+    assert emitted == sorted(emitted, reverse=True)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        library_path = os.path.join(temp_dir, "trained.txt")
+        with open(library_path, "w") as f:
+            f.write(RANKED_LIBRARY_HEADER + "\n" + "\n".join(trained) + "\n")
+        syllable_library = load_syllable_library(library_path)
+        vowel_map, consonant_map = create_letter_cyphers()
+        c2_map = create_syllable_cypher_map(syllable_library, vowel_map, consonant_map,
+                                            load_syllable_ranking(library_path))
+        assert c2_map[trained[0]]["base_value"] == 0
+
+        artifact = load_codec_artifact(library_path)
+        assert dict(artifact.c2_map) == c2_map
+        compressed = compress(corpus[0], c2_map, vowel_map, consonant_map, syllable_library)
+        assert decompress(compressed, c2_map) == corpus[0]
+        artifact.close()
+
+    print("✓ PASS: Trained library ranks IDs by frequency")
+    return True
+
+def test_run_tokens():
+    """Test that whitespace and literal runs roundtrip and shrink the token stream."""
+    print("\n=== Testing Run Tokens ===")
+
+    syllable_library = load_syllable_library()
+    vowel_map, consonant_map = create_letter_cyphers()
+    c2_map = create_syllable_cypher_map(syllable_library, vowel_map, consonant_map)
+
+    test_text = ("def main():\r\n        return 12345  # Ünïcode ✓\r\n\r\n\tkey:\t\t'value',\n"
+                 "| col | 2024-01-01 |\n   \n") * 20
+    plain = compress(test_text, c2_map, vowel_map, consonant_map, syllable_library, case_model="word")
+    runs = compress(test_text, c2_map, vowel_map, consonant_map, syllable_library, case_model="word", runs=True)
+    print(f"Tokens: {len(plain)} per-char, {len(runs)} with runs")
+    assert decompress(runs, c2_map) == test_text
+    assert len(runs) < len(plain)
+
+    buffer = io.BytesIO()
+    write_container(buffer, runs, c2_map)
+    container = buffer.getvalue()
+    plain_buffer = io.BytesIO()
+    write_container(plain_buffer, plain, c2_map)
+    print(f"Container: {len(plain_buffer.getvalue())} bytes per-char, {len(container)} bytes with runs")
+    assert len(container) < len(plain_buffer.getvalue())
+    buffer.seek(0)
+    assert decompress(read_container(buffer, c2_map), c2_map) == test_text
+    assert entropy_decode(entropy_encode(container)) == container
+
+    chunks = [test_text[i:i + 7] for i in range(0, len(test_text), 7)]
+    frames = compress_stream(chunks, c2_map, vowel_map, consonant_map, syllable_library,
+                             case_model="word", runs=True)
+    assert [token for frame in frames for token in frame] == runs
+    assert compress_parallel(test_text, jobs=1, case_model="word", segment_size=64, runs=True) == container
+
+    print("✓ PASS: Run tokens are lossless")
+    return True
+
+def test_syllable_codec():
+    """Test the shared SyllableCodec on str, bytes and file objects across threads."""
+    print("\n=== Testing SyllableCodec ===")
+    from concurrent.futures import ThreadPoolExecutor
+
+    codec = get_syllable_codec()
+    assert get_syllable_codec("key/syllable_library.txt") is codec
+
+    test_text = "Shared Codec: the CAT sat\n  on the mat, 3 times.\n"
+    container = codec.compress(test_text)
+    assert codec.compress(test_text.encode("utf-8")) == container
+    assert codec.compress(io.StringIO(test_text)) == container
+    assert codec.compress(io.BytesIO(test_text.encode("utf-8"))) == container
+    assert codec.decompress(container) == test_text
+    assert codec.decompress(io.BytesIO(codec.compress(test_text, entropy=True))) == test_text
+    output = io.StringIO()
+    assert codec.decompress(io.BytesIO(container), output) == len(test_text)
+    assert output.getvalue() == test_text
+
+    texts = [f"Thread {i} says hello to the WORLD number {i}.\n" * 20 for i in range(32)]
+    fresh = SyllableCodec()
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda text: fresh.decompress(fresh.compress(text)), texts))
+    assert results == texts
+
+    try:
+        load_syllable_library("missing/library.txt")
+        assert False, "expected FileNotFoundError"
+    except FileNotFoundError:
+        pass
+
+    print("✓ PASS: SyllableCodec is reusable and thread-safe")
+    return True
+
+def test_batch_api():
+    """Test compress_many/decompress_many on many short strings."""
+    print("\n=== Testing Batch API ===")
+
+    strings = [f"Order #{i}: The Quick brown fox, row {i % 7}" for i in range(500)] + ["", " ", "Ünïcode\n"]
+    stats = {}
+    batch = compress_many(strings, stats=stats)
+    print(f"{len(strings)} strings -> {len(batch.to_bytes())} bytes, {stats['strings_per_second']:,.0f} strings/s")
+    assert len(batch) == len(strings)
+    assert decompress_many(batch) == strings
+    assert decompress_many(batch.to_bytes()) == strings
+    assert decompress_one(batch, 42) == strings[42]
+    assert decompress_one(CompressedBatch.from_bytes(batch.to_bytes()), len(strings) - 1) == strings[-1]
+
+    foreign = CompressedBatch(batch.buffer, batch.offsets, bytes(8))
+    for decode in (lambda: decompress_many(foreign), lambda: decompress_one(foreign, 0)):
+        try:
+            decode()
+            assert False, "batch from another library accepted"
+        except ValueError:
+            pass
+
+    chunked = compress_many(strings, jobs=2, chunk_size=64)
+    assert chunked.to_bytes() == batch.to_bytes()
+    assert decompress_many(chunked, jobs=2, chunk_size=50) == strings
+
+    print("✓ PASS: Batch API roundtrips")
+    return True
+
+def test_block_index_random_access():
+    """Test read_lines/read_range against the full text, with and without a block index."""
+    print("\n=== Testing Block Index Random Access ===")
+
+    codec = get_syllable_codec()
+    test_text = "".join(f"Line {i}: The Quick BROWN fox\n" if i % 7 else "\n" for i in range(3000))
+    lines = test_text.splitlines(keepends=True)
+    plain = codec.compress(test_text)
+    indexed = codec.compress(test_text, index_interval=64)
+    assert indexed.startswith(plain)
+    assert codec.decompress(indexed) == test_text
+
+    for data in (indexed, plain, codec.compress(test_text, entropy=True, index_interval=64)):
+        for start, count in [(0, 3), (63, 2), (64, 1), (1999, 40), (2995, 10)]:
+            assert codec.read_lines(data, start, count) == lines[start:start + count], (start, count)
+        for char_start, char_end in [(0, 10), (5, 4000), (50000, 50123), (len(test_text) - 5, len(test_text) + 5)]:
+            assert codec.read_range(data, char_start, char_end) == test_text[char_start:char_end]
+
+    # In runs mode a block can end inside a "\n    " whitespace token; the indentation stays with its line
+    code = "".join(f"def f{i}():\n    return {i}\n\n" for i in range(200))
+    code_lines = code.splitlines(keepends=True)
+    data = codec.compress(code, runs=True, index_interval=1)
+    assert codec.decompress(data) == code
+    for start in range(len(code_lines)):
+        assert codec.read_lines(data, start, 2) == code_lines[start:start + 2], start
+
+    print("✓ PASS: Random access matches the full decode")
+    return True
+
+def test_word_token_cache():
+    """Test that the LRU word cache gives identical tokens and counts hits/misses."""
+    print("\n=== Testing Word Token Cache ===")
+
+    syllable_library = load_syllable_library()
+    vowel_map, consonant_map = create_letter_cyphers()
+    c2_map = create_syllable_cypher_map(syllable_library, vowel_map, consonant_map)
+    trie = build_syllable_trie(syllable_library)
+
+    test_text = "The cat and THE dog saw the Cat, then tHe bird.\n" * 20
+    for case_model in ("char", "word"):
+        for segmentation in ("greedy", "optimal"):
+            cache = WordTokenCache(c2_map, vowel_map, consonant_map, trie, maxsize=100)
+            expected = compress(test_text, c2_map, vowel_map, consonant_map, syllable_library, trie,
+                                case_model, segmentation)
+            cached = compress(test_text, c2_map, vowel_map, consonant_map, syllable_library, trie,
+                              case_model, segmentation, word_cache=cache)
+            assert cached == expected
+            assert decompress(cached, c2_map) == test_text
+            assert cache.misses == len(cache) and cache.hits > cache.misses * 10
+
+    small = WordTokenCache(c2_map, vowel_map, consonant_map, trie, maxsize=2)
+    compress("one two three one", c2_map, vowel_map, consonant_map, syllable_library, trie, word_cache=small)
+    assert len(small) == 2 and small.hits == 0 and small.misses == 4
+    small.clear()
+    assert len(small) == 0 and small.misses == 0
+
+    print("✓ PASS: Word cache is transparent")
+    return True
+
+def test_async_codec():
+    """Test the asyncio API: awaitable calls, stream adapters and the hybrid codec."""
+    print("\n=== Testing Async Codec ===")
+    import asyncio
+    from core.async_codec import AsyncCodec, CompressingWriter
+
+    test_text = "Async Ingestion: the CAT sat on the mat.\n  Ünïcode line, 42 times\n" * 200
+
+    class Sink:
+        def __init__(self):
+            self.data = bytearray()
+        def write(self, data):
+            self.data.extend(data)
+        async def drain(self):
+            await asyncio.sleep(0)
+
+    async def scenario():
+        async with AsyncCodec(max_workers=2, max_pending=2) as codec:
+            container = await codec.compress(test_text)
+            assert container == get_syllable_codec().compress(test_text)
+            results = await asyncio.gather(*[codec.decompress(container) for _ in range(6)])
+            assert results == [test_text] * 6
+
+            sink = Sink()
+            await codec.compress_stream(io.BytesIO(test_text.encode("utf-8")), sink, chunk_size=1000)
+            assert bytes(sink.data) == container
+
+            reader = asyncio.StreamReader()
+            reader.feed_data(container)
+            reader.feed_eof()
+            sink = Sink()
+            assert await codec.decompress_stream(reader, sink, chunk_size=333) == len(test_text)
+            assert sink.data.decode("utf-8") == test_text
+
+            # Separator-free text is flushed at the pending cap instead of buffering until close()
+            sink = Sink()
+            writer = CompressingWriter(sink, codec, flush_size=100)
+            writer.pending.max_size = 500
+            for _ in range(120):
+                await writer.write("UPPER")
+            for _ in range(300):
+                await writer.write("lower")
+            assert len(sink.data) > 100
+            await writer.close()
+            assert await codec.decompress(bytes(sink.data)) == "UPPER" * 120 + "lower" * 300
+
+            payload = test_text.encode("utf-8")
+            assert await codec.decompress_realtime(await codec.compress_realtime(payload)) == payload
+            sink = Sink()
+            await codec.compress_realtime_stream(payload, sink)
+            assert await codec.decompress_realtime(bytes(sink.data)) == payload
+
+    asyncio.run(scenario())
+
+    # A codec built outside the loop (e.g. at module level) works in later loops under contention
+    codec = AsyncCodec(max_workers=1, max_pending=1)
+    async def contended():
+        return await asyncio.gather(*[codec.compress_realtime(b"payload %d" % i) for i in range(4)])
+    try:
+        for _ in range(2):
+            assert len(asyncio.run(contended())) == 4
+    finally:
+        codec.close()
+    print("✓ PASS: Async API roundtrips")
+    return True
+
+def test_token_stream():
+    """Test that the array-backed TokenStream matches the dict tokens."""
+    print("\n=== Testing Token Stream ===")
+    from core.token_stream import TokenStream
+    from core.token_container import encode_tokens
+
+    syllable_library = load_syllable_library()
+    vowel_map, consonant_map = create_letter_cyphers()
+    c2_map = create_syllable_cypher_map(syllable_library, vowel_map, consonant_map)
+    trie = build_syllable_trie(syllable_library)
+
+    test_text = ("The QUICK brown Fox, McDonald iPhone\r\n\t  42 Ünïcode ✓\n"
+                 "aVeRyLoNgMiXeDcAsEwOrDtHaTiSmOrEtHaNtHiRtYtWoLeTtErS\n") * 10
+    for case_model in ("char", "word"):
+        for runs in (False, True):
+            tokens = compress(test_text, c2_map, vowel_map, consonant_map, syllable_library, trie,
+                              case_model, runs=runs)
+            stream = compress(test_text, c2_map, vowel_map, consonant_map, syllable_library, trie,
+                              case_model, runs=runs, out=TokenStream(c2_map))
+            assert len(stream) == len(tokens)
+            assert stream.to_tokens() == tokens
+            assert stream[-1] == tokens[-1] and stream[3:9] == tokens[3:9]
+            assert stream.text() == test_text
+            assert decompress(stream, c2_map) == test_text
+            assert encode_tokens(stream) == encode_tokens(tokens)
+
+    rebuilt = TokenStream(c2_map)
+    rebuilt.extend(tokens)
+    assert rebuilt.to_tokens() == tokens
+    print(f"{len(tokens)} tokens in {rebuilt.nbytes} bytes of columns")
+
+    print("✓ PASS: TokenStream matches dict tokens")
+    return True
+
+def test_benchmark_suite():
+    """Test corpus determinism, an in-process benchmark run and baseline comparison."""
+    print("\n=== Testing Benchmark Suite ===")
+    import copy
+    import tempfile
+    from benchmark_suite import generate_corpus, write_corpus, parse_size, run_suite, compare_results, CORPORA
+
+    assert parse_size("64KB") == 65536 and parse_size("2GB") == 2 << 30 and parse_size("100") == 100
+    for kind in CORPORA:
+        data = generate_corpus(kind, 5000)
+        assert len(data) == 5000 and data == generate_corpus(kind, 5000)
+        assert data != generate_corpus(kind, 5000, seed=1)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "corpus.bin")
+            write_corpus(path, kind, 5000)
+            with open(path, "rb") as f:
+                assert f.read() == data
+
+    report = run_suite(corpora=("prose", "binary"), sizes=(4096,), isolated=False)
+    results = [result for result in report["results"] if "skipped" not in result]
+    assert {result["codec"] for result in results} == {"compressor", "cyclic_hybrid", "keyboard_simple",
+                                                       "signature_archiver"}
+    assert all(result["verified"] in (True, None) for result in results)
+    assert compare_results(report, report) == []
+
+    slower = copy.deepcopy(report)
+    for result in slower["results"]:
+        if result["codec"] == "cyclic_hybrid" and result["corpus"] == "prose":
+            result["compress_mb_s"] /= 2
+    regressions = compare_results(slower, report)
+    assert [(r["codec"], r["metric"]) for r in regressions] == [("cyclic_hybrid", "compress_mb_s")]
+
+    print("✓ PASS: Benchmark suite runs every codec and flags regressions")
+    return True
+
+def test_multiplier_analysis():
+    """Test the strided multiplier analysis against a direct count, sampled and skipped."""
+    print("\n=== Testing Multiplier Analysis ===")
+    import random
+    from collections import Counter
+    from core.cyclic_hybrid import (multiplier_scores, find_best_multiplier, compress_realtime_bytes,
+                                    decompress_realtime_bytes)
+
+    def direct_scores(data):
+        scores = []
+        for mult in range(1, 7):
+            patterns = Counter(data[i:i + 2] for i in range(0, len(data) - 1, mult))
+            scores.append(sum(c for c in patterns.values() if c > 1))
+        return scores
+
+    rng = random.Random(7)
+    for length in (0, 1, 2, 3, 7, 60, 61, 1001):
+        data = bytes(rng.choice(b"abcd") for _ in range(length))
+        assert multiplier_scores(data) == direct_scores(data)
+        assert multiplier_scores(memoryview(bytearray(data))) == direct_scores(data)
+
+    data = b"".join(b"row %d,%d;" % (i % 97, i % 13) for i in range(200000))
+    sampled = multiplier_scores(data, sample_size=256 << 10)
+    assert sum(sampled) < sum(multiplier_scores(data, sample_size=None))
+    assert find_best_multiplier(data, 256 << 10) == find_best_multiplier(data, None)
+
+    skipped = compress_realtime_bytes(data, analyze=False)
+    assert skipped[8] == 1 and decompress_realtime_bytes(skipped) == data
+
+    print("✓ PASS: Multiplier analysis matches a direct count")
+    return True
+
+def test_hybrid_streaming():
+    """Test the streaming CCCS format: roundtrip, CCC2 input, checksum and truncation errors."""
+    print("\n=== Testing Hybrid Streaming ===")
+    from core.cyclic_hybrid import compress_stream, decompress_stream, compress_realtime_bytes
+
+    payload = b"".join(b"%06d INFO request completed\n" % i for i in range(50000)) + bytes(range(256))
+    for data in (b"", payload):
+        compressed = io.BytesIO()
+        info = compress_stream(io.BytesIO(data), compressed, chunk_size=4096)
+        assert info["original_length"] == len(data) and info["compressed_length"] == len(compressed.getvalue())
+        restored = io.BytesIO()
+        info = decompress_stream(io.BytesIO(compressed.getvalue()), restored, chunk_size=4096)
+        assert restored.getvalue() == data and info["recovered_length"] == len(data)
+
+    restored = io.BytesIO()
+    decompress_stream(io.BytesIO(compress_realtime_bytes(payload)), restored)
+    assert restored.getvalue() == payload
+
+    stream = compressed.getvalue()
+    for broken in (stream[:-1] + bytes([stream[-1] ^ 1]), stream[:-5], stream[:len(stream) // 2]):
+        try:
+            decompress_stream(io.BytesIO(broken), io.BytesIO())
+            assert False, "corrupt stream accepted"
+        except ValueError:
+            pass
+
+    print(f"✓ PASS: {len(payload)} bytes streamed to {len(stream)} bytes and back")
+    return True
+
+def test_hybrid_blocks():
+    """Test block-parallel hybrid compression, primed and independent, serial and parallel decode."""
+    print("\n=== Testing Hybrid Blocks ===")
+    from core.cyclic_hybrid import compress_blocks, decompress_stream
+
+    payload = b"".join(b"%06d INFO request completed in %dms\n" % (i, i % 250) for i in range(40000))
+    sizes = {}
+    for prime in (True, False):
+        compressed = io.BytesIO()
+        info = compress_blocks(io.BytesIO(payload), compressed, jobs=4, block_size=16384, prime=prime)
+        assert info["blocks"] == -(-len(payload) // 16384)
+        assert info["compressed_length"] == len(compressed.getvalue())
+        sizes[prime] = len(compressed.getvalue())
+        for jobs in (1, 4):
+            restored = io.BytesIO()
+            decompress_stream(io.BytesIO(compressed.getvalue()), restored, jobs=jobs)
+            assert restored.getvalue() == payload
+    assert sizes[True] < sizes[False]
+
+    broken = compressed.getvalue()[:-20]
+    try:
+        decompress_stream(io.BytesIO(broken), io.BytesIO())
+        assert False, "truncated block stream accepted"
+    except ValueError:
+        pass
+
+    print(f"✓ PASS: primed blocks {sizes[True]} bytes, independent blocks {sizes[False]} bytes")
+    return True
+
+def test_hybrid_framed():
+    """Test the seekable CCC3 format: read_at through the seek table, CRC checks and CCC2 fallback."""
+    print("\n=== Testing Hybrid Framed Format ===")
+    import random
+    from core.cyclic_hybrid import compress_framed, decompress_stream, FramedReader, read_at, compress_realtime_bytes
+
+    payload = b"".join(b"%06d WARN cache miss for key %d\n" % (i, i * 7919 % 10007) for i in range(30000))
+    compressed = io.BytesIO()
+    info = compress_framed(io.BytesIO(payload), compressed, frame_size=8192, jobs=2)
+    data = compressed.getvalue()
+    assert info["frames"] == -(-len(payload) // 8192) and info["compressed_length"] == len(data)
+
+    restored = io.BytesIO()
+    decompress_stream(io.BytesIO(data), restored)
+    assert restored.getvalue() == payload
+
+    reader = FramedReader(io.BytesIO(data))
+    assert len(reader) == info["frames"] and reader.original_length == len(payload)
+    rng = random.Random(3)
+    for _ in range(100):
+        offset, length = rng.randrange(len(payload) + 100), rng.randrange(30000)
+        assert reader.read_at(offset, length) == payload[offset:offset + length]
+    assert read_at(io.BytesIO(compress_realtime_bytes(payload)), 123456, 99) == payload[123456:123555]
+
+    corrupt = bytearray(data)
+    corrupt[reader.frame_offsets[3] + 20] ^= 0xFF
+    try:
+        FramedReader(io.BytesIO(bytes(corrupt))).read_at(3 * 8192, 10)
+        assert False, "corrupt frame accepted"
+    except ValueError:
+        pass
+    assert FramedReader(io.BytesIO(bytes(corrupt))).read_at(0, 100) == payload[:100]
+
+    print(f"✓ PASS: {info['frames']} frames, random reads match")
+    return True
+
+def test_hybrid_backends():
+    """Test every hybrid backend in CCC2 and CCCS, the header backend ID and auto selection."""
+    print("\n=== Testing Hybrid Backends ===")
+    import random
+    from core.cyclic_hybrid import (compress_realtime_bytes, decompress_realtime_bytes, compress_stream,
+                                    decompress_stream, realtime_backend, choose_backend, BACKENDS)
+
+    text = b"".join(b"%d,user%d,%s,%d.%02d\n" % (i, i % 500, b"active" if i % 3 else b"idle", i % 97, i % 100)
+                    for i in range(20000))
+    noise = random.Random(5).randbytes(200000)
+    for name in BACKENDS:
+        packed = compress_realtime_bytes(text, backend=name)
+        assert realtime_backend(packed) == name and decompress_realtime_bytes(packed) == text
+        streamed = io.BytesIO()
+        compress_stream(io.BytesIO(text), streamed, chunk_size=10000, backend=name)
+        restored = io.BytesIO()
+        info = decompress_stream(io.BytesIO(streamed.getvalue()), restored, chunk_size=3000)
+        assert restored.getvalue() == text and info["backend"] == name
+
+    # zlib files keep the pre-backend CCC2 layout
+    assert compress_realtime_bytes(text)[8] == 1
+
+    assert choose_backend(noise)[0] == "store"
+    name, level = choose_backend(text, min_throughput=0)
+    assert name != "store"
+    assert realtime_backend(compress_realtime_bytes(noise, backend="auto")) == "store"
+
+    print(f"✓ PASS: {', '.join(sorted(BACKENDS))} round-trip; auto picks {name} {level} for CSV")
+    return True
+
+def test_message_dictionaries():
+    """Test dictionary training, small-message compression and decoder-side dictionary loading."""
+    print("\n=== Testing Message Dictionaries ===")
+    import random
+    import tempfile
+    from core import message_codec
+    from core.message_codec import (train_dictionary, register_dictionary, save_dictionary, compress_bytes,
+                                    decompress_bytes, message_dictionary_id)
+    from core.cyclic_hybrid import compress_realtime_bytes
+
+    rng = random.Random(11)
+    def message():
+        return (b'{"method": "%s", "user": %d, "status": "%s", "latency_ms": %d, "region": "%s"}' %
+                (rng.choice([b"GetUser", b"ListOrders", b"UpdateCart"]), rng.randint(1, 99999),
+                 rng.choice([b"ok", b"ok", b"retry", b"error"]), rng.randint(1, 900),
+                 rng.choice([b"eu-west-1", b"us-east-1", b"ap-south-1"])))
+    training = [message() for _ in range(2000)]
+    messages = [message() for _ in range(300)]
+
+    dictionary = train_dictionary(training, size=4096)
+    assert 0 < len(dictionary) <= 4096 and dictionary == train_dictionary(training, size=4096)
+    dict_id = register_dictionary(dictionary)
+
+    plain = sum(len(compress_realtime_bytes(m)) for m in messages)
+    primed = [compress_bytes(m, dict_id) for m in messages]
+    assert sum(map(len, primed)) * 2 < plain
+    assert [decompress_bytes(m) for m in primed] == messages
+    assert message_dictionary_id(primed[0]) == dict_id
+    assert decompress_bytes(compress_bytes(b"no dictionary")) == b"no dictionary"
+
+    # A fresh decoder finds the dictionary by ID in a dictionary directory
+    with tempfile.TemporaryDirectory() as directory:
+        save_dictionary(dictionary, directory)
+        message_codec._DICTIONARIES.pop(dict_id)
+        message_codec._DECOMPRESSORS.pop(dict_id)
+        try:
+            decompress_bytes(primed[0])
+            assert False, "unknown dictionary accepted"
+        except ValueError:
+            pass
+        assert decompress_bytes(primed[0], dictionary_dir=directory) == messages[0]
+
+    # Adler-32 collision: different bytes under a registered ID are refused, the same bytes are not
+    first, colliding = b"dictionary xxabcxx", b"dictionary xxb`dxx"
+    assert register_dictionary(first) == register_dictionary(first)
+    try:
+        register_dictionary(colliding)
+        assert False, "colliding dictionary replaced the registered one"
+    except ValueError:
+        pass
+
+    print(f"✓ PASS: {len(messages)} messages {plain} -> {sum(map(len, primed))} bytes with a trained dictionary")
+    return True
+
+def test_hybrid_mapped():
+    """Test the memory-mapped compress_realtime/decompress_realtime file paths."""
+    print("\n=== Testing Hybrid Memory-Mapped Files ===")
+    import os
+    import tempfile
+    from core.cyclic_hybrid import compress_realtime, decompress_realtime, compress_realtime_bytes
+
+    data = b"".join(b"%d GET /api/items/%d 200 %dms\n" % (i, i % 700, i % 53) for i in range(40000))
+    with tempfile.TemporaryDirectory() as directory:
+        source = os.path.join(directory, "input")
+        packed = os.path.join(directory, "input.ccc")
+        restored = os.path.join(directory, "restored")
+        with open(source, "wb") as f:
+            f.write(data)
+        for backend in ("zlib", "store"):
+            info = compress_realtime(source, packed, backend=backend, chunk_size=50000)
+            if backend == "zlib":
+                with open(packed, "rb") as f:
+                    assert f.read() == compress_realtime_bytes(data)
+            assert info["compressed_length"] == os.path.getsize(packed)
+            result = decompress_realtime(packed, restored, chunk_size=30000)
+            with open(restored, "rb") as f:
+                assert f.read() == data and result["recovered_length"] == len(data)
+
+        # Empty files cannot be mapped and take the in-memory path
+        open(source, "wb").close()
+        compress_realtime(source, packed)
+        assert decompress_realtime(packed, restored)["recovered_length"] == 0 and os.path.getsize(restored) == 0
+
+        # A truncated body fails without leaving a preallocated output behind
+        with open(packed, "wb") as f:
+            f.write(compress_realtime_bytes(data)[:5000])
+        try:
+            decompress_realtime(packed, restored)
+            assert False, "truncated file accepted"
+        except ValueError:
+            pass
+        assert not os.path.exists(restored)
+
+    print(f"✓ PASS: {len(data):,} bytes round-trip through mapped files (zlib, store, empty, truncated)")
+    return True
+
 def run_all_tests():
     """Run all tests."""
     print("=" * 50)
@@ -106,6 +970,31 @@ def run_all_tests():
         ("Case Preservation", test_case_preservation()),
         ("Multiline/Spaces", test_multiline_preservation()),
         ("Compression Ratio", test_compression_ratio()),
+        ("Trie Longest Match", test_trie_longest_match()),
+        ("Reverse C2 Map", test_reverse_map_decoding()),
+        ("Binary Container", test_binary_container_roundtrip()),
+        ("Streaming", test_streaming_chunks()),
+        ("Codec Artifact", test_codec_artifact()),
+        ("Word Case Model", test_word_case_model()),
+        ("Parallel", test_parallel_matches_serial()),
+        ("Optimal Segmentation", test_optimal_segmentation()),
+        ("Entropy Coding", test_entropy_coding()),
+        ("Trained Library", test_trained_library()),
+        ("Run Tokens", test_run_tokens()),
+        ("SyllableCodec", test_syllable_codec()),
+        ("Batch API", test_batch_api()),
+        ("Block Index", test_block_index_random_access()),
+        ("Word Token Cache", test_word_token_cache()),
+        ("Async Codec", test_async_codec()),
+        ("Token Stream", test_token_stream()),
+        ("Benchmark Suite", test_benchmark_suite()),
+        ("Multiplier Analysis", test_multiplier_analysis()),
+        ("Hybrid Streaming", test_hybrid_streaming()),
+        ("Hybrid Blocks", test_hybrid_blocks()),
+        ("Hybrid Framed", test_hybrid_framed()),
+        ("Hybrid Backends", test_hybrid_backends()),
+        ("Message Dictionaries", test_message_dictionaries()),
+        ("Hybrid Memory-Mapped Files", test_hybrid_mapped()),
     ]
     
     print("\n" + "=" * 50)